@@ -39,6 +39,16 @@ from . import aef_basics
 from . import aef_utils
 from . import aef_eulerfilter_utils
 from . import aef_types
+from . import aef_rotation_utils
+from . import aef_filter_session
+from . import aef_filter_cache
+from . import aef_batch
+from . import aef_analysis
+from . import aef_rotation_convert
+from . import aef_bake
+from . import aef_keyframe_reduce
+from . import aef_hierarchy_filter
+from . import aef_mirror_filter
 
 
 if "bpl" in locals():
@@ -57,6 +67,26 @@ if "aef_eulerfilter_utils" in locals():
     importlib.reload(aef_eulerfilter_utils)
 if "aef_types" in locals():
     importlib.reload(aef_types)
+if "aef_rotation_utils" in locals():
+    importlib.reload(aef_rotation_utils)
+if "aef_filter_session" in locals():
+    importlib.reload(aef_filter_session)
+if "aef_filter_cache" in locals():
+    importlib.reload(aef_filter_cache)
+if "aef_batch" in locals():
+    importlib.reload(aef_batch)
+if "aef_analysis" in locals():
+    importlib.reload(aef_analysis)
+if "aef_rotation_convert" in locals():
+    importlib.reload(aef_rotation_convert)
+if "aef_bake" in locals():
+    importlib.reload(aef_bake)
+if "aef_keyframe_reduce" in locals():
+    importlib.reload(aef_keyframe_reduce)
+if "aef_hierarchy_filter" in locals():
+    importlib.reload(aef_hierarchy_filter)
+if "aef_mirror_filter" in locals():
+    importlib.reload(aef_mirror_filter)
 
 classes = (
 )
@@ -70,6 +100,7 @@ def register():
 
     bbpl.register()
     aef_addon_pref.register()
+    aef_filter_session.register()
     aef_ui.register()
 
 
@@ -80,5 +111,6 @@ def unregister():
         unregister_class(cls)
 
     aef_addon_pref.unregister()
+    aef_filter_session.unregister()
     aef_ui.unregister()
     bbpl.unregister()
\ No newline at end of file
@@ -0,0 +1,172 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+import bpy
+import csv
+import json
+import math
+import numpy
+from typing import Any, Dict, List, Optional
+from . import bbpl
+from . import aef_types
+from . import aef_utils
+
+axis_names = ("X", "Y", "Z")
+
+
+class EulerBreak():
+    """
+    Jump above the threshold between two successive keys of an euler curve.
+    """
+
+    def __init__(self, action_name: str, data_path: str, axis: int, frame_start: float, frame_end: float, jump: float):
+        self.action_name = action_name
+        self.data_path = data_path
+        self.bone_name = aef_utils.get_bone_name_from_data_path(data_path)
+        self.axis = axis
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.jump = jump
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "action": self.action_name,
+            "data_path": self.data_path,
+            "bone": self.bone_name,
+            "axis": axis_names[self.axis],
+            "frame_start": self.frame_start,
+            "frame_end": self.frame_end,
+            "jump_degrees": round(math.degrees(self.jump), 3),
+        }
+
+
+class DiscontinuityReport():
+    """
+    Read only report of the euler breaks, sorted by severity. Curves are never modified.
+    """
+
+    csv_fields = ["action", "data_path", "bone", "axis", "frame_start", "frame_end", "jump_degrees"]
+
+    def __init__(self, threshold: float = math.pi):
+        self.threshold = threshold
+        self.breaks: List[EulerBreak] = []
+        self.analyzed_actions = 0
+        self.analyzed_groups = 0
+
+    def add_euler_group(self, euler_group: aef_types.EulerGroup):
+        """
+        Adds the breaks of the group, all keys and axes are checked in one vectorized pass.
+        """
+        self.analyzed_groups += 1
+        if euler_group.get_key_count() < 2:
+            return
+
+        frames = euler_group.get_frame_array()
+        jumps = numpy.abs(numpy.diff(euler_group.get_euler_array(), axis=0))
+        key_indices, axes = numpy.nonzero(jumps > self.threshold)
+        action_name = euler_group.source_data.name
+        data_path = euler_group.selected_data_path
+        for key_index, axis in zip(key_indices.tolist(), axes.tolist()):
+            self.breaks.append(EulerBreak(action_name, data_path, axis, frames[key_index], frames[key_index + 1], float(jumps[key_index, axis])))
+
+    def add_action(self, action: bpy.types.Action, owner: Optional[bpy.types.ID] = None):
+        self.analyzed_actions += 1
+        for euler_group in aef_utils.iter_euler_groups_from_action(action, owner):
+            self.add_euler_group(euler_group)
+
+    def sort_by_severity(self):
+        self.breaks.sort(key=lambda euler_break: euler_break.jump, reverse=True)
+
+    def get_data_path_summary(self) -> List[Dict[str, Any]]:
+        """
+        Returns one entry per action and data path with the break count, max jump and frame range, sorted by severity.
+        """
+        summaries: Dict[tuple, Dict[str, Any]] = {}
+        for euler_break in self.breaks:
+            key = (euler_break.action_name, euler_break.data_path)
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = {
+                    "action": euler_break.action_name,
+                    "data_path": euler_break.data_path,
+                    "bone": euler_break.bone_name,
+                    "break_count": 0,
+                    "max_jump_degrees": 0.0,
+                    "frame_start": euler_break.frame_start,
+                    "frame_end": euler_break.frame_end,
+                }
+            summary["break_count"] += 1
+            summary["max_jump_degrees"] = max(summary["max_jump_degrees"], round(math.degrees(euler_break.jump), 3))
+            summary["frame_start"] = min(summary["frame_start"], euler_break.frame_start)
+            summary["frame_end"] = max(summary["frame_end"], euler_break.frame_end)
+        return sorted(summaries.values(), key=lambda summary: summary["max_jump_degrees"], reverse=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "threshold_degrees": round(math.degrees(self.threshold), 3),
+            "analyzed_actions": self.analyzed_actions,
+            "analyzed_curves": self.analyzed_groups,
+            "summary": self.get_data_path_summary(),
+            "breaks": [euler_break.to_dict() for euler_break in self.breaks],
+        }
+
+    def export_json(self, filepath: str):
+        with open(filepath, "w") as json_file:
+            json.dump(self.to_dict(), json_file, indent=4)
+
+    def export_csv(self, filepath: str):
+        with open(filepath, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=self.csv_fields)
+            writer.writeheader()
+            for euler_break in self.breaks:
+                writer.writerow(euler_break.to_dict())
+
+    def export_file(self, filepath: str):
+        """
+        Exports as CSV when the file extension is .csv, JSON otherwise.
+        """
+        if filepath.lower().endswith(".csv"):
+            self.export_csv(filepath)
+        else:
+            self.export_json(filepath)
+
+
+def analyze_objects(objects: List[bpy.types.Object], threshold: float = math.pi, include_nla: bool = True) -> DiscontinuityReport:
+    """
+    Analyzes the actions of the objects. Actions shared by multiple objects are analyzed once.
+    """
+    report = DiscontinuityReport(threshold)
+    analyzed_actions = set()
+    for obj in objects:
+        for action in bbpl.anim_utils.get_animation_data_actions(obj.animation_data, include_nla=include_nla):
+            if action.as_pointer() in analyzed_actions:
+                continue
+            analyzed_actions.add(action.as_pointer())
+            report.add_action(action, obj)
+    report.sort_by_severity()
+    return report
+
+
+def analyze_scene(scene: bpy.types.Scene, threshold: float = math.pi, include_nla: bool = True) -> DiscontinuityReport:
+    objects = [obj for obj in scene.objects if obj.animation_data is not None]
+    return analyze_objects(objects, threshold, include_nla)
+
+
+# Last report displayed in the graph editor panel.
+last_report: Optional[DiscontinuityReport] = None
@@ -0,0 +1,66 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+import bpy
+from typing import List
+from . import bbpl
+from . import aef_rotation_utils
+from . import aef_rotation_convert
+from . import aef_eulerfilter_utils
+
+
+def get_frame_range_frames(frame_start: int, frame_end: int, frame_step: int = 1) -> List[float]:
+    return [float(frame) for frame in range(frame_start, frame_end + 1, max(frame_step, 1))]
+
+
+def bake_visual_euler_rotation(
+    armature: bpy.types.Object,
+    action: bpy.types.Action,
+    bone_names: List[str],
+    frames: List[float],
+    method: str = None
+) -> bbpl.anim_utils.VisualPoseCache:
+    """
+    Bakes the visual rotation of the bones in their rotation_euler curves.
+    The scene is stepped once for all the bones, the local rotations are computed
+    and filtered as arrays then each curve is written in one batch.
+    Only the keys inside the baked frame range are replaced.
+    Bones not using an euler rotation mode are ignored.
+    Returns the pose cache so the captured matrices can be reused.
+    """
+    pose_cache = bbpl.anim_utils.VisualPoseCache(armature, bone_names)
+    pose_cache.capture(bpy.context.scene, frames)
+    local_matrices = pose_cache.get_local_matrices()
+
+    pose_bones = armature.pose.bones
+    for bone_name in bone_names:
+        pose_bone = pose_bones.get(bone_name)
+        if pose_bone is None or pose_bone.rotation_mode not in aef_rotation_utils.euler_orders:
+            continue
+
+        rotation_order = pose_bone.rotation_mode
+        # The upper 3x3 of a matrix in memory layout is the rotation in the same layout.
+        rotations = local_matrices[:, pose_cache.bone_indices[bone_name], :3, :3]
+        eulers = aef_rotation_utils.matrix_to_euler_array(rotations, rotation_order)
+        if len(eulers) > 1:
+            eulers = aef_eulerfilter_utils.calculate_euler_filter_array(eulers, rotation_order, method)
+
+        data_path = aef_rotation_convert.get_rotation_data_path(pose_bone.path_from_id(), rotation_order)
+        aef_rotation_convert.write_rotation_curves(action, data_path, pose_cache.frames, eulers, bone_name, keep_outside_keys=True)
+    return pose_cache
@@ -25,6 +25,7 @@ import bmesh
 import addon_utils
 from mathutils import Vector
 from mathutils import Quaternion
+from . import bbpl
 
 
 def is_deleted(o):
@@ -192,6 +193,7 @@ def getFirstDeformBoneParent(bone):
 
 def SetCollectionUse(collection):
     # Set if collection is hide and selectable
+    bbpl.save_data.scope_save.touch_collection(collection)
     collection.hide_viewport = False
     collection.hide_select = False
     layer_collection = bpy.context.view_layer.layer_collection
@@ -0,0 +1,248 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+import bpy
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import bpl
+from . import bbpl
+from . import aef_types
+from . import aef_utils
+from . import aef_filter_cache
+from . import aef_keyframe_reduce
+
+
+def get_action_owner_names() -> Dict[int, str]:
+    """
+    Returns the name of the first object using each action (Action.as_pointer() -> Object name).
+    Used to find the euler order of the animated data.
+    """
+    action_owners: Dict[int, str] = {}
+    for obj in bpy.data.objects:
+        for action in bbpl.anim_utils.get_animation_data_actions(obj.animation_data):
+            if action.as_pointer() not in action_owners:
+                action_owners[action.as_pointer()] = obj.name
+    return action_owners
+
+
+def get_library_action_names() -> List[str]:
+    """
+    Returns the names of the local actions of the file. (Linked actions can't be edited)
+    """
+    return [action.name for action in bpy.data.actions if action.library is None]
+
+
+class FilterJob():
+    """
+    Resumable filter pipeline (extract -> filter -> write back) on a list of actions.
+
+    The pipeline is a generator that yields after each extracted or filtered EulerGroup.
+    run_slice() advances it until the key budget or the slice duration is reached,
+    so a long job never blocks the UI more than one slice.
+    The curves are saved before being modified, cancel() restores them.
+    """
+
+    def __init__(
+        self,
+        action_names: List[str],
+        method: str = None,
+        reverse: bool = False,
+        use_cache: bool = True,
+        keys_per_slice: int = 50000,
+        slice_duration: float = 0.016,
+        reduce_tolerance: Optional[float] = None
+    ):
+        self.action_names = action_names
+        self.action_owners = get_action_owner_names()
+        self.method = method
+        self.reverse = reverse
+        self.use_cache = use_cache
+        self.keys_per_slice = keys_per_slice
+        self.slice_duration = slice_duration
+        self.reduce_tolerance = reduce_tolerance
+
+        self.action_index = 0
+        self.filtered_count = 0
+        self.processed_keys = 0
+        self.finished = False
+        self.cancelled = False
+        # Action name, data path, array index, saved keys.
+        self.fcurve_saves: List[Tuple[str, str, int, Optional[bbpl.anim_utils.PackedKeyframes]]] = []
+        self.filter_caches: List[aef_filter_cache.ActionFilterCache] = []
+        self.skipped_groups = 0
+        self.pipeline = self.iter_pipeline()
+
+        self.progress_bar = bpl.advprint.ProgressionBarClass()
+        self.progress_bar.name = "Filter actions"
+        self.progress_bar.total_step = max(len(self.action_names), 1)
+
+    def get_progress(self) -> float:
+        if not self.action_names:
+            return 1.0
+        return self.action_index / len(self.action_names)
+
+    def save_group_curves(self, action: bpy.types.Action, euler_group: aef_types.EulerGroup):
+        for axis in range(euler_group.channel_count):
+            fcurve = euler_group.get_axis_fcurve(axis)
+            if fcurve is None:
+                # The filter can create the curve to key a missing axis.
+                self.fcurve_saves.append((action.name, euler_group.selected_data_path, axis, None))
+            else:
+                packed_keyframes = bbpl.anim_utils.PackedKeyframes(fcurve.keyframe_points)
+                self.fcurve_saves.append((action.name, fcurve.data_path, fcurve.array_index, packed_keyframes))
+
+    def iter_pipeline(self) -> Iterator[int]:
+        """
+        Yields the number of keys processed since the previous yield.
+        """
+        for action_index, action_name in enumerate(self.action_names):
+            self.action_index = action_index
+            action = bpy.data.actions.get(action_name)
+            if action is None:
+                continue
+
+            owner_name = self.action_owners.get(action.as_pointer())
+            owner = bpy.data.objects.get(owner_name) if owner_name else None
+            filter_cache = aef_filter_cache.ActionFilterCache(action) if self.use_cache else None
+            for euler_group in aef_utils.iter_euler_groups_from_action(action, owner):
+                key_count = euler_group.get_key_count()
+                yield key_count
+
+                modified = filter_cache is None or aef_utils.euler_group_needs_filter(euler_group, filter_cache, self.method, self.reverse)
+                if modified:
+                    self.save_group_curves(action, euler_group)
+                    aef_utils.apply_euler_filter_on_all_keys(euler_group, self.method, self.reverse)
+                    if self.reduce_tolerance is not None:
+                        aef_keyframe_reduce.reduce_euler_group_keys(euler_group, self.reduce_tolerance)
+                    self.processed_keys += key_count
+                    yield key_count
+                else:
+                    self.skipped_groups += 1
+
+                if filter_cache is not None:
+                    filter_cache.mark_filtered(euler_group, self.method, self.reverse, modified)
+
+            if filter_cache is not None:
+                filter_cache.save()
+                self.filter_caches.append(filter_cache)
+            self.filtered_count += 1
+            self.progress_bar.update_progress(action_index + 1)
+
+        self.action_index = len(self.action_names)
+
+    def run_slice(self) -> bool:
+        """
+        Runs the pipeline for one slice. Returns True when the job is finished.
+        """
+        if self.finished:
+            return True
+
+        slice_start = time.perf_counter()
+        slice_keys = 0
+        while slice_keys < self.keys_per_slice and time.perf_counter() - slice_start < self.slice_duration:
+            try:
+                slice_keys += next(self.pipeline)
+            except StopIteration:
+                self.finished = True
+                break
+        return self.finished
+
+    def cancel(self):
+        """
+        Stops the job and restores all the curves modified by the job.
+        """
+        self.pipeline.close()
+        for action_name, data_path, array_index, packed_keyframes in reversed(self.fcurve_saves):
+            action = bpy.data.actions.get(action_name)
+            if action is None:
+                continue
+            fcurve = action.fcurves.find(data_path, index=array_index)
+            if fcurve is None:
+                continue
+            if packed_keyframes is None:
+                action.fcurves.remove(fcurve)
+            else:
+                packed_keyframes.paste_data_on(fcurve, clear=True)
+        self.fcurve_saves.clear()
+        for filter_cache in self.filter_caches:
+            try:
+                filter_cache.restore_source()
+            except ReferenceError:
+                pass
+        self.filter_caches.clear()
+        self.finished = True
+        self.cancelled = True
+
+    def timer_update(self) -> Optional[float]:
+        """
+        bpy.app.timers callback. Returns None when the job is finished.
+        """
+        global running_job
+        if self is not running_job or self.finished:
+            return None
+
+        if self.run_slice():
+            running_job = None
+            tag_redraw_graph_editors()
+            return None
+        tag_redraw_graph_editors()
+        return 0.0
+
+
+running_job: Optional[FilterJob] = None
+
+
+def start_filter_job(job: FilterJob) -> FilterJob:
+    global running_job
+    running_job = job
+    bpy.app.timers.register(job.timer_update)
+    return job
+
+
+def start_library_filter_job(method: str = None, reverse: bool = False, reduce_tolerance: Optional[float] = None) -> FilterJob:
+    return start_filter_job(FilterJob(get_library_action_names(), method, reverse, reduce_tolerance=reduce_tolerance))
+
+
+def stop_filter_job(restore: bool = True):
+    """
+    Stops the running job. When restore is True the curves are put back to the state before the job.
+    """
+    global running_job
+    job = running_job
+    if job is None:
+        return
+
+    running_job = None
+    if bpy.app.timers.is_registered(job.timer_update):
+        bpy.app.timers.unregister(job.timer_update)
+    if restore:
+        job.cancel()
+    else:
+        job.pipeline.close()
+        job.finished = True
+
+
+def tag_redraw_graph_editors():
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'GRAPH_EDITOR':
+                area.tag_redraw()
@@ -19,6 +19,8 @@
 
 import math
 import mathutils
+import numpy
+from . import aef_rotation_utils
 
 euler_methods = ["QUAD", "UNWRAP", "QUAD_UNWRAP"]
 euler_method = "UNWRAP"
@@ -30,7 +32,7 @@ def calculate_euler_filter(prev_euler: mathutils.Euler, current_euler: mathutils
         return calculate_euler_filter_unwrap(prev_euler, current_euler)
     elif euler_method == "QUAD_UNWRAP":
         corrected_euler = calculate_euler_filter_quat(prev_euler, current_euler)
-        return calculate_euler_filter_quat(prev_euler, corrected_euler)
+        return calculate_euler_filter_unwrap(prev_euler, corrected_euler)
 
 
 
@@ -85,4 +87,145 @@ def calculate_euler_filter_unwrap(prev_euler: mathutils.Euler, current_euler: ma
     filtered.y = unwrap_radian(prev_euler.y, filtered.y)
     filtered.z = unwrap_radian(prev_euler.z, filtered.z)
 
-    return filtered
\ No newline at end of file
+    return filtered
+
+def unwrap_radian_array(values: numpy.ndarray) -> numpy.ndarray:
+    """Vectorized unwrap_radian: each value is unwrapped to stay close to the previous unwrapped value (axis 0)."""
+    return numpy.unwrap(values, axis=0)
+
+def canonicalize_euler_array(eulers: numpy.ndarray, order: str = "XYZ") -> numpy.ndarray:
+    """Same as euler.to_quaternion().to_euler(order) on each euler of the (N, 3) array."""
+    matrices = aef_rotation_utils.euler_to_matrix_array(eulers, order)
+    return aef_rotation_utils.matrix_to_euler_array(matrices, order)
+
+def get_alternate_euler_array(eulers: numpy.ndarray, order: str = "XYZ") -> numpy.ndarray:
+    """
+    Returns the other euler solution of each rotation of the (N, 3) array.
+    (first + pi, pi - middle, last + pi) on the axes of the order gives the same rotation.
+    """
+    (i, j, k), parity = aef_rotation_utils.euler_order_infos[order]
+    alternate = numpy.array(eulers, dtype=numpy.float64).reshape(-1, 3)
+    alternate[:, i] += math.pi
+    alternate[:, j] = math.pi - alternate[:, j]
+    alternate[:, k] += math.pi
+    return alternate
+
+def get_primary_euler_array(eulers: numpy.ndarray, order: str = "XYZ") -> numpy.ndarray:
+    """
+    Returns the euler solution with the middle angle in [-pi/2, pi/2] for each rotation of the (N, 3) array,
+    so all the eulers are on the same solution.
+    """
+    (i, j, k), parity = aef_rotation_utils.euler_order_infos[order]
+    eulers = numpy.array(eulers, dtype=numpy.float64).reshape(-1, 3)
+    middles = (eulers[:, j] + math.pi) % (2 * math.pi) - math.pi
+    use_alternate = numpy.abs(middles) > math.pi / 2
+    eulers[use_alternate] = get_alternate_euler_array(eulers[use_alternate], order)
+    return eulers
+
+def get_euler_turn_distance(eulers: numpy.ndarray, target: numpy.ndarray) -> float:
+    """Sum of the angle differences per axis, ignoring whole turns."""
+    delta = numpy.asarray(target, dtype=numpy.float64) - numpy.asarray(eulers, dtype=numpy.float64)
+    return float(numpy.abs(delta - numpy.round(delta / (2 * math.pi)) * 2 * math.pi).sum())
+
+def calculate_euler_filter_array(eulers: numpy.ndarray, order: str = "XYZ", method: str = None, reverse: bool = False) -> numpy.ndarray:
+    """
+    Filters a whole euler curve with shape (N, 3) sorted by frame.
+    Gives the same result as calling calculate_euler_filter() from each filtered key to the next one.
+    The first key (the last key when reverse is True) is the reference and is not modified.
+    """
+    if method is None:
+        method = euler_method
+
+    eulers = numpy.array(eulers, dtype=numpy.float64).reshape(-1, 3)
+    if len(eulers) < 2:
+        return eulers
+
+    if reverse:
+        eulers = eulers[::-1]
+
+    filtered = canonicalize_euler_array(eulers, order)
+    filtered[0] = eulers[0]
+    if method in ("UNWRAP", "QUAD_UNWRAP"):
+        filtered = unwrap_radian_array(filtered)
+
+    if reverse:
+        filtered = filtered[::-1]
+    return filtered
+
+def calculate_quaternion_filter_array(quats: numpy.ndarray, reverse: bool = False) -> numpy.ndarray:
+    """
+    Fixes the q / -q hemisphere flips of a whole quaternion curve with shape (N, 4) sorted by frame.
+    Each key takes the sign closest to the previous filtered key (cumulative product of the dot signs).
+    The first key (the last key when reverse is True) is the reference and is not modified.
+    """
+    quats = numpy.array(quats, dtype=numpy.float64).reshape(-1, 4)
+    if len(quats) < 2:
+        return quats
+
+    if reverse:
+        quats = quats[::-1]
+
+    dots = (quats[1:] * quats[:-1]).sum(axis=1)
+    signs = numpy.ones(len(quats), dtype=numpy.float64)
+    signs[1:] = numpy.cumprod(numpy.where(dots < 0.0, -1.0, 1.0))
+    filtered = quats * signs[:, None]
+
+    if reverse:
+        filtered = filtered[::-1]
+    return filtered
+
+def calculate_mirror_euler_filter_arrays(
+    eulers: numpy.ndarray,
+    mirror_eulers: numpy.ndarray,
+    order: str = "XYZ",
+    method: str = None,
+    reverse: bool = False,
+    mirror_signs=(1.0, -1.0, -1.0)
+):
+    """
+    Filters the curves of a bone and of its mirror bone, with shapes (N, 3) and (M, 3), in one batched conversion.
+    The source curve uses the euler solution closest to its reference key and
+    the mirror curve uses the euler solution closest to the mirrored reference key (euler * mirror_signs),
+    then is moved by whole turns per axis so its reference key is on the same branch. Both curves keep the same rotations.
+    Returns (filtered eulers, filtered mirror eulers).
+    """
+    if method is None:
+        method = euler_method
+
+    eulers = numpy.array(eulers, dtype=numpy.float64).reshape(-1, 3)
+    mirror_eulers = numpy.array(mirror_eulers, dtype=numpy.float64).reshape(-1, 3)
+    if len(eulers) == 0 or len(mirror_eulers) == 0:
+        return eulers, mirror_eulers
+
+    if reverse:
+        eulers = eulers[::-1]
+        mirror_eulers = mirror_eulers[::-1]
+
+    canonical = get_primary_euler_array(canonicalize_euler_array(numpy.concatenate((eulers, mirror_eulers)), order), order)
+    filtered = canonical[:len(eulers)]
+    mirror_filtered = canonical[len(eulers):]
+    # The source curve uses the euler solution of its reference key, so a reference key
+    # on the alternate solution does not switch the next keys to the other solution.
+    alternate_filtered = get_alternate_euler_array(filtered, order)
+    if get_euler_turn_distance(alternate_filtered[0], eulers[0]) < get_euler_turn_distance(filtered[0], eulers[0]):
+        filtered = alternate_filtered
+    filtered[0] = eulers[0]
+
+    # Both solutions of the mirror curve give the same rotations, keep the one that matches the mirrored reference.
+    # The turns of the mirror reference key are set below from the reference key.
+    expected_reference = filtered[0] * numpy.asarray(mirror_signs, dtype=numpy.float64)
+    alternate_filtered = get_alternate_euler_array(mirror_filtered, order)
+    if get_euler_turn_distance(alternate_filtered[0], expected_reference) < get_euler_turn_distance(mirror_filtered[0], expected_reference):
+        mirror_filtered = alternate_filtered
+
+    if method in ("UNWRAP", "QUAD_UNWRAP"):
+        filtered = unwrap_radian_array(filtered)
+        mirror_filtered = unwrap_radian_array(mirror_filtered)
+
+    turns = numpy.round((expected_reference - mirror_filtered[0]) / (2 * math.pi))
+    mirror_filtered = mirror_filtered + turns * 2 * math.pi
+
+    if reverse:
+        filtered = filtered[::-1]
+        mirror_filtered = mirror_filtered[::-1]
+    return filtered, mirror_filtered
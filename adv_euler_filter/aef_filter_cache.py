@@ -0,0 +1,118 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+import bpy
+import json
+import math
+import hashlib
+import numpy
+from typing import Dict, Optional
+from . import aef_types
+from . import aef_eulerfilter_utils
+
+# Action ID property with the content hash and filter method of each filtered data path.
+# Stored as a JSON string because ID property names are limited to 63 characters.
+filter_hashes_prop_name = "aef_filter_hashes"
+
+
+def get_euler_group_hash(euler_group: aef_types.EulerGroup) -> str:
+    """
+    Returns a compact hash of the key (frame, value) of the group curves, read with one foreach_get per curve.
+    """
+    hasher = hashlib.blake2b(digest_size=8)
+    for axis in range(euler_group.channel_count):
+        fcurve = euler_group.get_axis_fcurve(axis)
+        if fcurve is None:
+            hasher.update(b"-")
+            continue
+        co = numpy.empty(len(fcurve.keyframe_points) * 2, dtype=numpy.float32)
+        fcurve.keyframe_points.foreach_get("co", co)
+        hasher.update(co.tobytes())
+    return hasher.hexdigest()
+
+
+def get_filter_signature(method: Optional[str], reverse: bool) -> str:
+    if method is None:
+        method = aef_eulerfilter_utils.euler_method
+    return method + ("_REVERSE" if reverse else "")
+
+
+def is_euler_group_continuous(euler_group: aef_types.EulerGroup) -> bool:
+    """
+    Returns True when no key jumps more than pi from the previous key.
+    """
+    eulers = euler_group.get_euler_array()
+    if len(eulers) < 2:
+        return True
+    return not bool((numpy.abs(numpy.diff(eulers, axis=0)) > math.pi).any())
+
+
+class ActionFilterCache():
+    """
+    Content hash and filter method of the filtered curves of an action.
+    A data path is up to date when its curves hash still matches the hash saved after the last filter.
+    """
+
+    def __init__(self, action: bpy.types.Action):
+        self.action = action
+        self.source_value: Optional[str] = action.get(filter_hashes_prop_name)
+        self.entries: Dict[str, str] = {}
+        # Hashes computed by is_up_to_date(), by data path.
+        self.checked_hashes: Dict[str, str] = {}
+        if self.source_value:
+            try:
+                self.entries = json.loads(self.source_value)
+            except ValueError:
+                self.entries = {}
+
+    def is_up_to_date(self, euler_group: aef_types.EulerGroup, method: Optional[str], reverse: bool) -> bool:
+        entry = self.entries.get(euler_group.selected_data_path)
+        if entry is None:
+            return False
+        group_hash = get_euler_group_hash(euler_group)
+        self.checked_hashes[euler_group.selected_data_path] = group_hash
+        return entry == group_hash + ":" + get_filter_signature(method, reverse)
+
+    def mark_filtered(self, euler_group: aef_types.EulerGroup, method: Optional[str], reverse: bool, modified: bool = True):
+        """
+        Saves the hash of the group curves. When the curves were not modified
+        the hash computed by is_up_to_date() is reused.
+        """
+        group_hash = self.checked_hashes.pop(euler_group.selected_data_path, None)
+        if modified or group_hash is None:
+            group_hash = get_euler_group_hash(euler_group)
+        self.entries[euler_group.selected_data_path] = group_hash + ":" + get_filter_signature(method, reverse)
+
+    def save(self):
+        self.action[filter_hashes_prop_name] = json.dumps(self.entries, separators=(",", ":"))
+
+    def restore_source(self):
+        """
+        Puts back the ID property as it was when the cache was loaded.
+        """
+        if self.source_value is None:
+            if filter_hashes_prop_name in self.action:
+                del self.action[filter_hashes_prop_name]
+        else:
+            self.action[filter_hashes_prop_name] = self.source_value
+
+
+def clear_action_filter_cache(action: bpy.types.Action):
+    if filter_hashes_prop_name in action:
+        del action[filter_hashes_prop_name]
@@ -0,0 +1,261 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+import bpy
+import numpy
+from typing import Dict, List, Optional, Set, Tuple
+from . import bbpl
+from . import aef_types
+from . import aef_eulerfilter_utils
+
+
+def get_fcurve_co_hash(fcurve: bpy.types.FCurve) -> int:
+    """
+    Hash of the (frame, value) of all the keys, read with one foreach_get.
+    """
+    co = numpy.empty(len(fcurve.keyframe_points) * 2, dtype=numpy.float32)
+    fcurve.keyframe_points.foreach_get("co", co)
+    return hash(co.tobytes())
+
+
+def get_selected_fcurve_ids(action: bpy.types.Action) -> Set[Tuple[str, int]]:
+    """
+    Returns the (data_path, array_index) of the curves with selected keys.
+    """
+    selected_ids: Set[Tuple[str, int]] = set()
+    for fcurve in action.fcurves:
+        key_count = len(fcurve.keyframe_points)
+        if key_count == 0:
+            continue
+        selects = numpy.empty(key_count, dtype=bool)
+        fcurve.keyframe_points.foreach_get("select_control_point", selects)
+        if selects.any():
+            selected_ids.add((fcurve.data_path, fcurve.array_index))
+    return selected_ids
+
+
+class FilterSession:
+    """
+    Non destructive filter on a list of EulerGroup.
+
+    The affected curves are saved once as packed arrays.
+    Each try restores the arrays directly (without Blender global undo)
+    then applies the method from the cached extracted eulers.
+
+    No FCurve reference is kept between operator calls (undo can free them),
+    curves are found again by (action name, data_path, array_index).
+    """
+
+    def __init__(self, action: bpy.types.Action, euler_groups: List[aef_types.EulerGroup]):
+        self.action_name = action.name
+        self.euler_groups = [euler_group for euler_group in euler_groups if euler_group.get_key_count() > 0]
+        self.source_eulers: List[numpy.ndarray] = []
+        # (data_path, array_index, saved keys), None when the axis had no curve.
+        self.fcurve_saves: List[Tuple[str, int, Optional[bbpl.anim_utils.PackedKeyframes]]] = []
+        # Hash of the keys written by the last session operation, by (data_path, array_index).
+        self.expected_hashes: Dict[Tuple[str, int], int] = {}
+        self.selected_ids: Set[Tuple[str, int]] = get_selected_fcurve_ids(action)
+        self.current_method: Optional[str] = None
+        self.current_reverse = False
+        self.save_source()
+
+    def get_action(self) -> Optional[bpy.types.Action]:
+        return bpy.data.actions.get(self.action_name)
+
+    def find_fcurve(self, action: bpy.types.Action, data_path: str, array_index: int) -> Optional[bpy.types.FCurve]:
+        return action.fcurves.find(data_path, index=array_index)
+
+    def save_source(self):
+        saved_fcurves = set()
+        for euler_group in self.euler_groups:
+            self.source_eulers.append(euler_group.get_euler_array())
+            for axis in range(euler_group.channel_count):
+                fcurve = euler_group.get_axis_fcurve(axis)
+                if (euler_group.selected_data_path, axis) in saved_fcurves:
+                    continue
+                saved_fcurves.add((euler_group.selected_data_path, axis))
+                if fcurve is None:
+                    # The filter can create the curve to key a missing axis.
+                    self.fcurve_saves.append((euler_group.selected_data_path, axis, None))
+                else:
+                    self.fcurve_saves.append((fcurve.data_path, fcurve.array_index, bbpl.anim_utils.PackedKeyframes(fcurve.keyframe_points)))
+        self.save_expected_hashes()
+
+    def save_expected_hashes(self):
+        action = self.get_action()
+        if action is None:
+            return
+        for data_path, array_index, packed_keyframes in self.fcurve_saves:
+            fcurve = self.find_fcurve(action, data_path, array_index)
+            if fcurve is not None and packed_keyframes is not None:
+                self.expected_hashes[(data_path, array_index)] = get_fcurve_co_hash(fcurve)
+
+    def bind_euler_groups(self, action: bpy.types.Action):
+        # The groups find their curves again from the data path.
+        for euler_group in self.euler_groups:
+            euler_group.source_data = action
+            euler_group.fcurves = {}
+
+    def is_valid(self, selected_ids: Optional[Set[Tuple[str, int]]] = None) -> bool:
+        """
+        False when the curves were removed or edited since the last session operation,
+        or when selected_ids is given and the selected curves changed.
+        """
+        action = self.get_action()
+        if action is None:
+            return False
+        if selected_ids is not None and selected_ids != self.selected_ids:
+            return False
+        for data_path, array_index, packed_keyframes in self.fcurve_saves:
+            if packed_keyframes is None:
+                continue
+            fcurve = self.find_fcurve(action, data_path, array_index)
+            if fcurve is None:
+                return False
+            if get_fcurve_co_hash(fcurve) != self.expected_hashes.get((data_path, array_index)):
+                return False
+        return True
+
+    def restore_source(self):
+        """
+        Puts the curves back to the saved state.
+        """
+        action = self.get_action()
+        if action is None:
+            return
+        for data_path, array_index, packed_keyframes in self.fcurve_saves:
+            fcurve = self.find_fcurve(action, data_path, array_index)
+            if fcurve is None:
+                continue
+            if packed_keyframes is None:
+                action.fcurves.remove(fcurve)
+            else:
+                packed_keyframes.paste_data_on(fcurve, clear=True)
+        self.bind_euler_groups(action)
+        for euler_group, source_eulers in zip(self.euler_groups, self.source_eulers):
+            # Keys inserted on the missing axes are removed, the key indices change.
+            euler_group.update_key_indices()
+            euler_group.set_euler_array(source_eulers)
+        self.current_method = None
+        self.current_reverse = False
+        self.save_expected_hashes()
+
+    def apply_method(self, method: str, reverse: bool = False):
+        """
+        Restores the saved curves then filters them with the method.
+        """
+        action = self.get_action()
+        if action is None:
+            return
+        if self.current_method is not None:
+            self.restore_source()
+        self.bind_euler_groups(action)
+
+        for euler_group, source_eulers in zip(self.euler_groups, self.source_eulers):
+            if len(source_eulers) < 2:
+                continue
+            new_eulers = aef_eulerfilter_utils.calculate_euler_filter_array(source_eulers, euler_group.rotation_order, method, reverse)
+            euler_group.apply_euler_array(new_eulers)
+
+        self.current_method = method
+        self.current_reverse = reverse
+        self.save_expected_hashes()
+
+    def revert(self):
+        if self.current_method is not None:
+            self.restore_source()
+
+
+# Running sessions per action name.
+filter_sessions: Dict[str, FilterSession] = {}
+
+
+def get_session(action: bpy.types.Action, check_selection: bool = False) -> Optional[FilterSession]:
+    """
+    Returns the running session of the action.
+    With check_selection, a session started on other selected curves is ended.
+    """
+    session = filter_sessions.get(action.name)
+    if session is None:
+        return None
+    selected_ids = get_selected_fcurve_ids(action) if check_selection else None
+    if not session.is_valid(selected_ids):
+        # Curves changed outside of the session.
+        del filter_sessions[action.name]
+        return None
+    return session
+
+
+def find_session(action: bpy.types.Action) -> Optional[FilterSession]:
+    """
+    Returns the running session of the action without checking the curves. Used to draw the UI,
+    the sessions are checked by the operators and on_depsgraph_update_post().
+    """
+    return filter_sessions.get(action.name)
+
+
+def start_session(action: bpy.types.Action, euler_groups: List[aef_types.EulerGroup]) -> FilterSession:
+    session = FilterSession(action, euler_groups)
+    filter_sessions[action.name] = session
+    return session
+
+
+def end_session(action: bpy.types.Action, revert: bool = False):
+    session = filter_sessions.pop(action.name, None)
+    if session is not None and revert and session.is_valid():
+        session.revert()
+
+
+def clear_sessions():
+    filter_sessions.clear()
+
+
+def remove_invalid_sessions():
+    """
+    Ends the sessions whose curves were removed or edited outside of the session.
+    """
+    for action_name, session in list(filter_sessions.items()):
+        if not session.is_valid():
+            del filter_sessions[action_name]
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update_post(scene, depsgraph):
+    if not filter_sessions:
+        return
+    if depsgraph.id_type_updated('ACTION'):
+        remove_invalid_sessions()
+
+
+@bpy.app.handlers.persistent
+def on_load_post(dummy):
+    filter_sessions.clear()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    if on_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    filter_sessions.clear()
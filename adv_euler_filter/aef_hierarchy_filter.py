@@ -0,0 +1,173 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+'''
+Filters the euler curves of an armature parents first, one depth level of the hierarchy at a time.
+
+The filter keeps the rotation on every key but changes the interpolated rotation between the keys.
+With validate, the world space rotation of the bones of each level is captured on the keys and
+between the keys (sub-frames) before and after the filter, with the parents already filtered.
+A bone whose rotation step between two samples grows by more than flip_angle is restored.
+'''
+
+import bpy
+import math
+import numpy
+from typing import Dict, List, Optional, Tuple
+from . import bbpl
+from . import aef_types
+from . import aef_utils
+from . import aef_rotation_utils
+
+# Largest growth of the rotation between two samples accepted by the world space validation.
+default_flip_angle = math.radians(45.0)
+
+
+class HierarchyFilterResult():
+
+    def __init__(self):
+        # Bone names of the filtered groups, an empty name for the object rotation.
+        self.filtered_bones: List[str] = []
+        # Bones restored because the filter flipped them in world space.
+        self.rejected_bones: List[str] = []
+
+
+def get_bone_levels(armature: bpy.types.Object) -> List[List[str]]:
+    """
+    Returns the bone names by depth in the hierarchy, the root bones first.
+    """
+    armature_index = bbpl.armature_index.get_armature_index(armature)
+    levels: List[List[str]] = []
+    for index in armature_index.preorder:
+        depth = armature_index.depths[index]
+        while len(levels) <= depth:
+            levels.append([])
+        levels[depth].append(armature_index.names[index])
+    return levels
+
+
+def get_sample_frames(euler_groups: List[aef_types.EulerGroup]) -> List[float]:
+    """
+    Returns the keyed frames of the groups and the sub-frames in the middle of each pair of keys.
+    """
+    frames = set()
+    for euler_group in euler_groups:
+        key_frames = euler_group.get_frame_array()
+        frames.update(key_frames.tolist())
+        frames.update(((key_frames[:-1] + key_frames[1:]) * 0.5).tolist())
+    return sorted(frames)
+
+
+def get_rotation_steps(matrices: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns the rotation angle between each pair of consecutive samples,
+    from matrices with shape (frames, bones, 4, 4). The result has the shape (frames - 1, bones).
+    """
+    frame_count, bone_count = matrices.shape[:2]
+    rotations = aef_rotation_utils.normalize_matrix_array(matrices[:, :, :3, :3].reshape(-1, 3, 3)).reshape(frame_count, bone_count, 3, 3)
+    # trace(A^T B) is the sum of the element-wise product, in any memory layout.
+    traces = (rotations[:-1] * rotations[1:]).sum(axis=(2, 3))
+    return numpy.arccos(numpy.clip((traces - 1.0) * 0.5, -1.0, 1.0))
+
+
+def save_group_curves(euler_group: aef_types.EulerGroup) -> List[Tuple[int, Optional[bbpl.anim_utils.PackedKeyframes]]]:
+    """
+    Saves the keys of each axis curve, None when the axis has no curve.
+    """
+    saves = []
+    for axis in range(euler_group.channel_count):
+        fcurve = euler_group.get_axis_fcurve(axis)
+        saves.append((axis, bbpl.anim_utils.PackedKeyframes(fcurve.keyframe_points) if fcurve is not None else None))
+    return saves
+
+
+def restore_group_curves(euler_group: aef_types.EulerGroup, saves: List[Tuple[int, Optional[bbpl.anim_utils.PackedKeyframes]]]):
+    for axis, packed_keyframes in saves:
+        fcurve = euler_group.get_axis_fcurve(axis)
+        if fcurve is None:
+            continue
+        if packed_keyframes is None:
+            # Created by the filter to key a missing axis.
+            euler_group.source_data.fcurves.remove(fcurve)
+            del euler_group.fcurves[axis]
+        else:
+            packed_keyframes.paste_data_on(fcurve, clear=True)
+
+
+def capture_world_matrices(armature: bpy.types.Object, bone_names: List[str], frames: List[float]) -> numpy.ndarray:
+    pose_cache = bbpl.anim_utils.VisualPoseCache(armature, bone_names)
+    pose_cache.capture(bpy.context.scene, frames)
+    world_matrices = pose_cache.get_world_matrices()
+    return world_matrices[:, [pose_cache.bone_indices[bone_name] for bone_name in bone_names]]
+
+
+def apply_hierarchical_filter(
+    armature: bpy.types.Object,
+    action: bpy.types.Action,
+    method: str = None,
+    reverse: bool = False,
+    validate: bool = False,
+    flip_angle: float = default_flip_angle
+) -> HierarchyFilterResult:
+    """
+    Filters the object rotation then the bones of the armature, parents first.
+    With validate, the bones that flip in world space between their keys are restored.
+    The validation needs the action to be the active action of the armature.
+    """
+    result = HierarchyFilterResult()
+    groups_by_bone: Dict[str, aef_types.EulerGroup] = {}
+    for euler_group in aef_utils.iter_euler_groups_from_action(action, armature):
+        groups_by_bone[aef_utils.get_bone_name_from_data_path(euler_group.selected_data_path)] = euler_group
+
+    # The object rotation is the parent of all the bones.
+    object_group = groups_by_bone.pop("", None)
+    if object_group is not None:
+        aef_utils.apply_euler_filter_on_all_keys(object_group, method, reverse)
+        result.filtered_bones.append("")
+
+    animation_data = armature.animation_data
+    validate = validate and animation_data is not None and animation_data.action == action
+
+    for level in get_bone_levels(armature):
+        level_names = [bone_name for bone_name in level if bone_name in groups_by_bone]
+        if not level_names:
+            continue
+        level_groups = [groups_by_bone[bone_name] for bone_name in level_names]
+
+        if validate:
+            frames = get_sample_frames(level_groups)
+            curve_saves = [save_group_curves(euler_group) for euler_group in level_groups]
+            source_steps = get_rotation_steps(capture_world_matrices(armature, level_names, frames))
+
+        for euler_group in level_groups:
+            aef_utils.apply_euler_filter_on_all_keys(euler_group, method, reverse)
+
+        if validate:
+            filtered_steps = get_rotation_steps(capture_world_matrices(armature, level_names, frames))
+            flipped = ((filtered_steps - source_steps) > flip_angle).any(axis=0)
+            for bone_name, euler_group, saves, is_flipped in zip(level_names, level_groups, curve_saves, flipped.tolist()):
+                if is_flipped:
+                    # Restored before the children of the level are checked.
+                    restore_group_curves(euler_group, saves)
+                    result.rejected_bones.append(bone_name)
+                else:
+                    result.filtered_bones.append(bone_name)
+        else:
+            result.filtered_bones.extend(level_names)
+
+    return result
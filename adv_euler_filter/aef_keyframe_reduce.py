@@ -0,0 +1,127 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+'''
+Keyframe reduction of filtered curves.
+
+Keys are removed with a Ramer-Douglas-Peucker pass where every segment
+is split at the same time, so each iteration is a few NumPy operations over the whole curve.
+'''
+
+import bpy
+import numpy
+from . import bbpl
+from . import aef_types
+
+# Default max value error of the reduced curves (radians for rotation curves).
+default_tolerance = 0.001
+
+
+def get_reduced_key_mask(frames: numpy.ndarray, values: numpy.ndarray, tolerance: float = default_tolerance) -> numpy.ndarray:
+    """
+    Returns the mask of the keys to keep. A removed key is at most tolerance away from
+    the line between the kept keys around it. The first and last keys are always kept.
+    """
+    frames = numpy.asarray(frames, dtype=numpy.float64)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    key_count = len(frames)
+    keep = numpy.zeros(key_count, dtype=bool)
+    if key_count < 3:
+        keep[:] = True
+        return keep
+
+    keep[0] = True
+    keep[-1] = True
+    key_range = numpy.arange(key_count)
+    while True:
+        kept = numpy.flatnonzero(keep)
+        # Segment of each key, between two kept keys.
+        segments = numpy.minimum(numpy.searchsorted(kept, key_range, side="right") - 1, len(kept) - 2)
+        left = kept[segments]
+        right = kept[segments + 1]
+        frame_lengths = frames[right] - frames[left]
+        frame_lengths[frame_lengths == 0.0] = 1.0
+        factors = (frames - frames[left]) / frame_lengths
+        errors = numpy.abs(values - (values[left] + factors * (values[right] - values[left])))
+        errors[keep] = 0.0
+
+        # Split each segment on its worst key.
+        segment_max_errors = numpy.maximum.reduceat(errors, kept[:-1])
+        split_keys = numpy.flatnonzero((errors > tolerance) & (errors == segment_max_errors[segments]))
+        if len(split_keys) == 0:
+            return keep
+        _, first_split_indices = numpy.unique(segments[split_keys], return_index=True)
+        keep[split_keys[first_split_indices]] = True
+
+
+def paste_kept_keys(fcurve: bpy.types.FCurve, packed_keyframes: bbpl.anim_utils.PackedKeyframes, keep: numpy.ndarray):
+    """
+    Replaces the keys of the curve by the kept keys of the packed keys.
+    The kept keys are written back in one foreach_set per key property.
+    """
+    reduced_keyframes = bbpl.anim_utils.PackedKeyframes()
+    reduced_keyframes.key_count = int(keep.sum())
+    for prop_name, _, prop_size in packed_keyframes.packed_props:
+        values = packed_keyframes.arrays[prop_name].reshape(packed_keyframes.key_count, prop_size)
+        reduced_keyframes.arrays[prop_name] = values[keep].ravel()
+    reduced_keyframes.paste_data_on(fcurve, clear=True)
+
+
+def reduce_fcurve_keys(fcurve: bpy.types.FCurve, tolerance: float = default_tolerance, max_iterations: int = 8) -> int:
+    """
+    Removes the keys of the curve that can be rebuilt within the tolerance.
+    The kept keys keep their interpolation and their handles are recomputed by Blender,
+    so the reduced curve is evaluated on the removed key frames and the keys
+    it does not rebuild within the tolerance are added back until it does.
+    Returns the number of removed keys.
+    """
+    packed_keyframes = bbpl.anim_utils.PackedKeyframes(fcurve.keyframe_points)
+    co = packed_keyframes.get_co()
+    keep = get_reduced_key_mask(co[:, 0], co[:, 1], tolerance)
+    if keep.all():
+        return 0
+
+    for _ in range(max_iterations):
+        paste_kept_keys(fcurve, packed_keyframes, keep)
+        removed_indices = numpy.flatnonzero(~keep)
+        evaluate = fcurve.evaluate
+        values = numpy.array([evaluate(frame) for frame in co[removed_indices, 0].tolist()], dtype=numpy.float64)
+        failed_indices = removed_indices[numpy.abs(values - co[removed_indices, 1]) > tolerance]
+        if len(failed_indices) == 0:
+            return int(packed_keyframes.key_count - keep.sum())
+        keep[failed_indices] = True
+        if keep.all():
+            break
+
+    # Not rebuilt within the tolerance, the source keys are restored.
+    packed_keyframes.paste_data_on(fcurve, clear=True)
+    return 0
+
+
+def reduce_euler_group_keys(euler_group: aef_types.EulerGroup, tolerance: float = default_tolerance) -> int:
+    """
+    Reduces each curve of the group. The key indices stored in the group are no longer valid after this,
+    the group must be extracted again to be used.
+    Returns the number of removed keys.
+    """
+    removed_count = 0
+    for axis in range(euler_group.channel_count):
+        fcurve = euler_group.get_axis_fcurve(axis)
+        if fcurve is not None:
+            removed_count += reduce_fcurve_keys(fcurve, tolerance)
+    return removed_count
@@ -0,0 +1,119 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+
+
+import bpy
+from typing import Dict, List, Tuple
+from . import bpl
+from . import bbpl
+from . import aef_types
+from . import aef_utils
+from . import aef_eulerfilter_utils
+
+# Sign of each euler axis between a bone and its mirror bone (mirror on the X axis).
+default_mirror_signs = (1.0, -1.0, -1.0)
+
+
+def get_mirror_bone_pairs(bone_names: List[str]) -> List[Tuple[str, str]]:
+    """
+    Returns the (source, mirror) bone pairs found in the names. The left bone is the source,
+    or the first bone of the list when the naming has no laterality suffix (LeftArm / RightArm).
+    """
+    name_set = set(bone_names)
+    mirror_names = bbpl.blender_rig.rig_utils.get_mirror_bone_name(bone_names)
+    laterality_infos = bpl.naming.get_laterality_infos(bone_names)
+    pairs: List[Tuple[str, str]] = []
+    paired = set()
+    for bone_name, mirror_name, (_, side, _) in zip(bone_names, mirror_names, laterality_infos):
+        if mirror_name == bone_name or mirror_name not in name_set or bone_name in paired:
+            continue
+        if side == "RIGHT":
+            pairs.append((mirror_name, bone_name))
+        else:
+            pairs.append((bone_name, mirror_name))
+        paired.update((bone_name, mirror_name))
+    return pairs
+
+
+class MirrorFilterResult():
+
+    def __init__(self):
+        self.mirror_pairs: List[Tuple[str, str]] = []
+        # Groups filtered alone. (center bones, bones without mirror curves or with another euler order)
+        self.single_groups: List[str] = []
+
+
+def apply_mirror_filter_on_pair(
+    euler_group: aef_types.EulerGroup,
+    mirror_euler_group: aef_types.EulerGroup,
+    method: str = None,
+    reverse: bool = False,
+    mirror_signs=default_mirror_signs
+):
+    if euler_group.get_key_count() < 1 or mirror_euler_group.get_key_count() < 1:
+        return
+    eulers, mirror_eulers = aef_eulerfilter_utils.calculate_mirror_euler_filter_arrays(
+        euler_group.get_euler_array(),
+        mirror_euler_group.get_euler_array(),
+        euler_group.rotation_order,
+        method,
+        reverse,
+        mirror_signs
+    )
+    euler_group.apply_euler_array(eulers)
+    mirror_euler_group.apply_euler_array(mirror_eulers)
+
+
+def apply_mirror_filter(
+    armature: bpy.types.Object,
+    action: bpy.types.Action,
+    method: str = None,
+    reverse: bool = False,
+    mirror_signs=default_mirror_signs
+) -> MirrorFilterResult:
+    """
+    Filters the euler curves of the action with the left and right bones filtered together:
+    each mirror curve is kept on the 2π branch of its mirrored source curve, so symmetrical
+    motions stay symmetrical in the graph editor. Other curves use the default filter.
+    """
+    result = MirrorFilterResult()
+    groups_by_bone: Dict[str, aef_types.EulerGroup] = {}
+    for euler_group in aef_utils.iter_euler_groups_from_action(action, armature):
+        bone_name = aef_utils.get_bone_name_from_data_path(euler_group.selected_data_path)
+        if bone_name:
+            groups_by_bone[bone_name] = euler_group
+        else:
+            aef_utils.apply_euler_filter_on_all_keys(euler_group, method, reverse)
+            result.single_groups.append(euler_group.selected_data_path)
+
+    paired = set()
+    for source_name, mirror_name in get_mirror_bone_pairs(list(groups_by_bone.keys())):
+        euler_group = groups_by_bone[source_name]
+        mirror_euler_group = groups_by_bone[mirror_name]
+        if euler_group.rotation_order != mirror_euler_group.rotation_order:
+            continue
+        apply_mirror_filter_on_pair(euler_group, mirror_euler_group, method, reverse, mirror_signs)
+        result.mirror_pairs.append((source_name, mirror_name))
+        paired.update((source_name, mirror_name))
+
+    for bone_name, euler_group in groups_by_bone.items():
+        if bone_name not in paired:
+            aef_utils.apply_euler_filter_on_all_keys(euler_group, method, reverse)
+            result.single_groups.append(bone_name)
+    return result
@@ -0,0 +1,379 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+'''
+Converts the rotation curves of actions between the rotation modes
+(Euler orders, Quaternion and Axis Angle) without stepping the scene.
+
+Each rotation property is read as a (frames, values) array with foreach_get,
+converted with the vectorized math of aef_rotation_utils
+and written back in bulk with keyframe_points.add() and foreach_set.
+'''
+
+import bpy
+import numpy
+from typing import Dict, List, Optional, Tuple
+from . import bbpl
+from . import aef_rotation_utils
+from . import aef_eulerfilter_utils
+
+rotation_modes = aef_rotation_utils.euler_orders + ["QUATERNION", "AXIS_ANGLE"]
+
+# Data path and channel count of each rotation property.
+rotation_properties = {
+    "rotation_euler": 3,
+    "rotation_quaternion": 4,
+    "rotation_axis_angle": 4,
+}
+
+# Values used for the channels without curve.
+default_rotation_values = {
+    "rotation_euler": (0.0, 0.0, 0.0),
+    "rotation_quaternion": (1.0, 0.0, 0.0, 0.0),
+    "rotation_axis_angle": (0.0, 0.0, 1.0, 0.0),
+}
+
+
+def get_rotation_property(rotation_mode: str) -> str:
+    if rotation_mode == "QUATERNION":
+        return "rotation_quaternion"
+    if rotation_mode == "AXIS_ANGLE":
+        return "rotation_axis_angle"
+    return "rotation_euler"
+
+
+def get_rotation_data_path(base_path: str, rotation_mode: str) -> str:
+    """
+    Returns the data path of the rotation property. base_path is empty for objects
+    and is the pose bone path for bones. (pose.bones["name"])
+    """
+    rotation_property = get_rotation_property(rotation_mode)
+    if base_path:
+        return base_path + "." + rotation_property
+    return rotation_property
+
+
+def find_rotation_fcurves(action: bpy.types.Action, data_path: str, channel_count: int) -> List[Optional[bpy.types.FCurve]]:
+    return [action.fcurves.find(data_path, index=index) for index in range(channel_count)]
+
+
+def read_fcurve_co(fcurve: bpy.types.FCurve) -> numpy.ndarray:
+    key_count = len(fcurve.keyframe_points)
+    co = numpy.empty(key_count * 2, dtype=numpy.float32)
+    fcurve.keyframe_points.foreach_get("co", co)
+    return co.reshape(key_count, 2)
+
+
+def read_rotation_curves(fcurves: List[Optional[bpy.types.FCurve]], default_values: Tuple[float, ...]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Returns the keyed frames of all the channels and the channel values on these frames
+    with shape (frame_count, channel_count).
+    Channels not keyed on a frame are evaluated, channels without curve use the default value.
+    """
+    curve_cos = [read_fcurve_co(fcurve) if fcurve is not None else None for fcurve in fcurves]
+    keyed_frames = [co[:, 0] for co in curve_cos if co is not None]
+    if not keyed_frames:
+        return numpy.empty(0, dtype=numpy.float64), numpy.empty((0, len(fcurves)), dtype=numpy.float64)
+
+    frames = numpy.unique(numpy.concatenate(keyed_frames)).astype(numpy.float64)
+    values = numpy.empty((len(frames), len(fcurves)), dtype=numpy.float64)
+    for channel, (fcurve, co) in enumerate(zip(fcurves, curve_cos)):
+        if fcurve is None:
+            values[:, channel] = default_values[channel]
+        elif len(co) == len(frames) and numpy.array_equal(co[:, 0], frames.astype(numpy.float32)):
+            values[:, channel] = co[:, 1]
+        else:
+            evaluate = fcurve.evaluate
+            values[:, channel] = [evaluate(frame) for frame in frames.tolist()]
+    return frames, values
+
+
+def get_rotation_curves_interpolations(fcurves: List[Optional[bpy.types.FCurve]], frames: numpy.ndarray) -> Optional[numpy.ndarray]:
+    """
+    Returns the interpolation of the keys of the first curve keyed on all the frames, or None.
+    """
+    for fcurve in fcurves:
+        if fcurve is None or len(fcurve.keyframe_points) != len(frames):
+            continue
+        interpolations = numpy.empty(len(frames), dtype=numpy.int32)
+        fcurve.keyframe_points.foreach_get("interpolation", interpolations)
+        return interpolations
+    return None
+
+
+def get_rotation_curves_group_name(fcurves: List[Optional[bpy.types.FCurve]]) -> Optional[str]:
+    for fcurve in fcurves:
+        if fcurve is not None and fcurve.group is not None:
+            return fcurve.group.name
+    return None
+
+
+def write_rotation_curves(
+    action: bpy.types.Action,
+    data_path: str,
+    frames: numpy.ndarray,
+    values: numpy.ndarray,
+    group_name: Optional[str] = None,
+    interpolations: Optional[numpy.ndarray] = None,
+    keep_outside_keys: bool = False
+):
+    """
+    Replaces the keys of the channels of the data path. Missing curves are created.
+    With keep_outside_keys, only the keys between the first and the last frame are replaced.
+    """
+    co = numpy.empty((len(frames), 2), dtype=numpy.float32)
+    co[:, 0] = frames
+    for channel in range(values.shape[1]):
+        fcurve = action.fcurves.find(data_path, index=channel)
+        if fcurve is None:
+            if group_name:
+                fcurve = action.fcurves.new(data_path, index=channel, action_group=group_name)
+            else:
+                fcurve = action.fcurves.new(data_path, index=channel)
+
+        keyframe_points = fcurve.keyframe_points
+        outside_keys = None
+        if keep_outside_keys and len(keyframe_points) > 0 and len(frames) > 0:
+            packed_keyframes = bbpl.anim_utils.PackedKeyframes(keyframe_points)
+            key_frames = packed_keyframes.get_co()[:, 0]
+            outside_mask = (key_frames < co[:, 0].min()) | (key_frames > co[:, 0].max())
+            if outside_mask.any():
+                outside_keys = packed_keyframes.copy_keys(outside_mask)
+
+        keyframe_points.clear()
+        keyframe_points.add(len(frames))
+        co[:, 1] = values[:, channel]
+        keyframe_points.foreach_set("co", co.ravel())
+        # Handles are recalculated by fcurve.update()
+        keyframe_points.foreach_set("handle_left", co.ravel())
+        keyframe_points.foreach_set("handle_right", co.ravel())
+        if interpolations is not None:
+            keyframe_points.foreach_set("interpolation", interpolations)
+        if outside_keys is not None:
+            # Merged with the new keys, paste_data_on() updates the curve.
+            outside_keys.paste_data_on(fcurve, clear=False)
+        else:
+            fcurve.update()
+
+
+def remove_rotation_curves(action: bpy.types.Action, fcurves: List[Optional[bpy.types.FCurve]]):
+    for fcurve in fcurves:
+        if fcurve is not None:
+            action.fcurves.remove(fcurve)
+
+
+def rotation_values_to_quaternion_array(values: numpy.ndarray, rotation_mode: str) -> numpy.ndarray:
+    if rotation_mode == "QUATERNION":
+        return aef_rotation_utils.normalize_quaternion_array(values)
+    if rotation_mode == "AXIS_ANGLE":
+        return aef_rotation_utils.axis_angle_to_quaternion_array(values)
+    return aef_rotation_utils.matrix_to_quaternion_array(aef_rotation_utils.euler_to_matrix_array(values, rotation_mode))
+
+
+def quaternion_array_to_rotation_values(quats: numpy.ndarray, rotation_mode: str, method: str = None) -> numpy.ndarray:
+    """
+    Converts the quaternions to the values of the rotation mode.
+    Euler results are continuity filtered with the method, quaternion results get their sign flips fixed.
+    """
+    if rotation_mode in ("QUATERNION", "AXIS_ANGLE"):
+        # Converted quaternions always have w >= 0, the sign flips are removed first.
+        quats = aef_eulerfilter_utils.calculate_quaternion_filter_array(quats)
+    if rotation_mode == "QUATERNION":
+        return quats
+    if rotation_mode == "AXIS_ANGLE":
+        return aef_rotation_utils.quaternion_to_axis_angle_array(quats)
+    eulers = aef_rotation_utils.matrix_to_euler_array(aef_rotation_utils.quaternion_to_matrix_array(quats), rotation_mode)
+    if len(eulers) < 2:
+        return eulers
+    return aef_eulerfilter_utils.calculate_euler_filter_array(eulers, rotation_mode, method)
+
+
+def convert_rotation_values(values: numpy.ndarray, source_mode: str, target_mode: str, method: str = None) -> numpy.ndarray:
+    if source_mode in aef_rotation_utils.euler_orders and target_mode in aef_rotation_utils.euler_orders:
+        # Euler order change, no need to pass by quaternions.
+        matrices = aef_rotation_utils.euler_to_matrix_array(values, source_mode)
+        eulers = aef_rotation_utils.matrix_to_euler_array(matrices, target_mode)
+        if len(eulers) < 2:
+            return eulers
+        return aef_eulerfilter_utils.calculate_euler_filter_array(eulers, target_mode, method)
+
+    quats = rotation_values_to_quaternion_array(values, source_mode)
+    return quaternion_array_to_rotation_values(quats, target_mode, method)
+
+
+def convert_action_rotation(action: bpy.types.Action, base_path: str, source_mode: str, target_mode: str, method: str = None) -> int:
+    """
+    Converts the rotation curves of the base path from the source mode to the target mode.
+    The source curves are replaced. Returns the number of converted frames.
+    """
+    if source_mode == target_mode:
+        return 0
+
+    source_path = get_rotation_data_path(base_path, source_mode)
+    target_path = get_rotation_data_path(base_path, target_mode)
+    source_property = get_rotation_property(source_mode)
+    source_fcurves = find_rotation_fcurves(action, source_path, rotation_properties[source_property])
+    if not any(source_fcurves):
+        return 0
+
+    frames, values = read_rotation_curves(source_fcurves, default_rotation_values[source_property])
+    if len(frames) == 0:
+        return 0
+
+    new_values = convert_rotation_values(values, source_mode, target_mode, method)
+    group_name = get_rotation_curves_group_name(source_fcurves)
+    interpolations = get_rotation_curves_interpolations(source_fcurves, frames)
+    if source_path != target_path:
+        remove_rotation_curves(action, source_fcurves)
+    write_rotation_curves(action, target_path, frames, new_values, group_name, interpolations)
+    return len(frames)
+
+
+def get_rotation_owners(obj: bpy.types.Object, bone_names: Optional[List[str]] = None) -> List[Tuple[bpy.types.bpy_struct, str]]:
+    """
+    Returns the rotation owners (Object or PoseBone) and their base data path.
+    When bone_names is None the object itself is used.
+    """
+    if bone_names is None:
+        return [(obj, "")]
+
+    owners = []
+    if obj.pose is None:
+        return owners
+    for bone_name in bone_names:
+        pose_bone = obj.pose.bones.get(bone_name)
+        if pose_bone is not None:
+            owners.append((pose_bone, pose_bone.path_from_id()))
+    return owners
+
+
+def convert_object_rotation_mode(
+    obj: bpy.types.Object,
+    target_mode: str,
+    bone_names: Optional[List[str]] = None,
+    include_nla: bool = True,
+    method: str = None
+) -> int:
+    """
+    Converts the animation of the object (or of its bones) to the target rotation mode
+    then sets the rotation mode. Returns the number of converted curves groups.
+    """
+    actions = bbpl.anim_utils.get_animation_data_actions(obj.animation_data, include_nla=include_nla)
+    converted_count = 0
+    for owner, base_path in get_rotation_owners(obj, bone_names):
+        source_mode = owner.rotation_mode
+        if source_mode == target_mode:
+            continue
+        for action in actions:
+            if convert_action_rotation(action, base_path, source_mode, target_mode, method) > 0:
+                converted_count += 1
+        owner.rotation_mode = target_mode
+    return converted_count
+
+
+def get_euler_order_gimbal_scores(eulers: numpy.ndarray, source_order: str) -> Dict[str, float]:
+    """
+    Returns the gimbal score of each euler order for the rotations: the smallest |cos| of the
+    middle angle over all the keys. 1.0 is far from gimbal lock, 0.0 is locked.
+    """
+    matrices = aef_rotation_utils.euler_to_matrix_array(eulers, source_order)
+    scores = {}
+    for order in aef_rotation_utils.euler_orders:
+        middle_axis = aef_rotation_utils.euler_order_infos[order][0][1]
+        converted = aef_rotation_utils.matrix_to_euler_array(matrices, order)
+        scores[order] = float(numpy.abs(numpy.cos(converted[:, middle_axis])).min())
+    return scores
+
+
+def suggest_euler_order(eulers: numpy.ndarray, source_order: str) -> str:
+    """
+    Returns the euler order with the rotations the farthest from gimbal lock.
+    The source order is kept when no other order is clearly better.
+    """
+    if len(eulers) == 0:
+        return source_order
+    scores = get_euler_order_gimbal_scores(eulers, source_order)
+    best_order = max(scores, key=scores.get)
+    if scores[best_order] - scores[source_order] < 1e-4:
+        return source_order
+    return best_order
+
+
+def get_selected_euler_data_paths(action: bpy.types.Action) -> List[str]:
+    """
+    Returns the rotation_euler data paths with at least one selected curve.
+    """
+    data_paths: List[str] = []
+    for fcurve in action.fcurves:
+        if fcurve.select and fcurve.data_path.endswith("rotation_euler") and fcurve.data_path not in data_paths:
+            data_paths.append(fcurve.data_path)
+    return data_paths
+
+
+def get_data_path_owner(obj: bpy.types.Object, data_path: str) -> Tuple[Optional[bpy.types.bpy_struct], str]:
+    """
+    Returns the Object or PoseBone animated by the rotation data path and its base path.
+    """
+    base_path = data_path.rpartition(".")[0]
+    if not base_path:
+        return obj, ""
+    try:
+        return obj.path_resolve(base_path), base_path
+    except ValueError:
+        return None, base_path
+
+
+def suggest_data_path_euler_order(obj: bpy.types.Object, action: bpy.types.Action, data_path: str) -> Optional[str]:
+    owner, _ = get_data_path_owner(obj, data_path)
+    if owner is None or owner.rotation_mode not in aef_rotation_utils.euler_orders:
+        return None
+    _, eulers = read_rotation_curves(find_rotation_fcurves(action, data_path, 3), default_rotation_values["rotation_euler"])
+    return suggest_euler_order(eulers, owner.rotation_mode)
+
+
+def retarget_euler_order(
+    obj: bpy.types.Object,
+    data_paths: List[str],
+    target_order: Optional[str] = None,
+    include_nla: bool = True,
+    method: str = None
+) -> List[Tuple[str, str]]:
+    """
+    Converts the euler curves of the data paths to the target order, keeping the orientation of each key.
+    When target_order is None the order is suggested per data path from the active action.
+    Returns the (data path, new order) of the converted owners.
+    """
+    animation_data = obj.animation_data
+    actions = bbpl.anim_utils.get_animation_data_actions(animation_data, include_nla=include_nla)
+    retargeted: List[Tuple[str, str]] = []
+    for data_path in data_paths:
+        owner, base_path = get_data_path_owner(obj, data_path)
+        if owner is None or owner.rotation_mode not in aef_rotation_utils.euler_orders:
+            continue
+
+        new_order = target_order
+        if new_order is None and animation_data.action is not None:
+            new_order = suggest_data_path_euler_order(obj, animation_data.action, data_path)
+        if new_order is None or new_order == owner.rotation_mode:
+            continue
+
+        for action in actions:
+            convert_action_rotation(action, base_path, owner.rotation_mode, new_order, method)
+        owner.rotation_mode = new_order
+        retargeted.append((data_path, new_order))
+    return retargeted
@@ -0,0 +1,238 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+'''
+Vectorized rotation math on whole curves with NumPy.
+
+Results match mathutils (Euler.to_matrix(), Matrix.to_euler(), ...).
+Matrices use the Blender memory layout: matrices[n][column][row],
+the same layout as the values returned by foreach_get("matrix", ...).
+'''
+
+import numpy
+
+# Axis permutation and parity of each euler order. (Same table as Blender rotOrders)
+euler_order_infos = {
+    "XYZ": ((0, 1, 2), False),
+    "XZY": ((0, 2, 1), True),
+    "YXZ": ((1, 0, 2), True),
+    "YZX": ((1, 2, 0), False),
+    "ZXY": ((2, 0, 1), False),
+    "ZYX": ((2, 1, 0), True),
+}
+euler_orders = list(euler_order_infos.keys())
+
+FLT_EPSILON = 1.1920928955078125e-07
+
+
+def euler_to_matrix_array(eulers: numpy.ndarray, order: str = "XYZ") -> numpy.ndarray:
+    """
+    Converts eulers with shape (N, 3) to rotation matrices with shape (N, 3, 3).
+    """
+    (i, j, k), parity = euler_order_infos[order]
+    eulers = numpy.asarray(eulers, dtype=numpy.float64).reshape(-1, 3)
+
+    ti = eulers[:, i]
+    tj = eulers[:, j]
+    th = eulers[:, k]
+    if parity:
+        ti = -ti
+        tj = -tj
+        th = -th
+
+    ci = numpy.cos(ti)
+    cj = numpy.cos(tj)
+    ch = numpy.cos(th)
+    si = numpy.sin(ti)
+    sj = numpy.sin(tj)
+    sh = numpy.sin(th)
+    cc = ci * ch
+    cs = ci * sh
+    sc = si * ch
+    ss = si * sh
+
+    matrices = numpy.empty((len(eulers), 3, 3), dtype=numpy.float64)
+    matrices[:, i, i] = cj * ch
+    matrices[:, j, i] = sj * sc - cs
+    matrices[:, k, i] = sj * cc + ss
+    matrices[:, i, j] = cj * sh
+    matrices[:, j, j] = sj * ss + cc
+    matrices[:, k, j] = sj * cs - sc
+    matrices[:, i, k] = -sj
+    matrices[:, j, k] = cj * si
+    matrices[:, k, k] = cj * ci
+    return matrices
+
+
+def normalize_matrix_array(matrices: numpy.ndarray) -> numpy.ndarray:
+    """
+    Normalizes each axis of the matrices (removes the scale).
+    """
+    lengths = numpy.linalg.norm(matrices, axis=2, keepdims=True)
+    lengths[lengths == 0.0] = 1.0
+    return matrices / lengths
+
+
+def matrix_to_euler_array(matrices: numpy.ndarray, order: str = "XYZ") -> numpy.ndarray:
+    """
+    Converts rotation matrices with shape (N, 3, 3) to eulers with shape (N, 3).
+    Like Matrix.to_euler(), the solution with the smallest angles is used.
+    """
+    (i, j, k), parity = euler_order_infos[order]
+    mat = normalize_matrix_array(numpy.asarray(matrices, dtype=numpy.float64).reshape(-1, 3, 3))
+
+    cy = numpy.hypot(mat[:, i, i], mat[:, i, j])
+    not_gimbal = cy > 16.0 * FLT_EPSILON
+
+    eul1 = numpy.empty((len(mat), 3), dtype=numpy.float64)
+    eul2 = numpy.empty((len(mat), 3), dtype=numpy.float64)
+
+    eul1[:, i] = numpy.where(not_gimbal, numpy.arctan2(mat[:, j, k], mat[:, k, k]), numpy.arctan2(-mat[:, k, j], mat[:, j, j]))
+    eul1[:, j] = numpy.arctan2(-mat[:, i, k], cy)
+    eul1[:, k] = numpy.where(not_gimbal, numpy.arctan2(mat[:, i, j], mat[:, i, i]), 0.0)
+
+    eul2[:, i] = numpy.where(not_gimbal, numpy.arctan2(-mat[:, j, k], -mat[:, k, k]), eul1[:, i])
+    eul2[:, j] = numpy.where(not_gimbal, numpy.arctan2(-mat[:, i, k], -cy), eul1[:, j])
+    eul2[:, k] = numpy.where(not_gimbal, numpy.arctan2(-mat[:, i, j], -mat[:, i, i]), eul1[:, k])
+
+    if parity:
+        eul1 = -eul1
+        eul2 = -eul2
+
+    # Pick the best solution.
+    use_eul2 = numpy.abs(eul1).sum(axis=1) > numpy.abs(eul2).sum(axis=1)
+    return numpy.where(use_eul2[:, None], eul2, eul1)
+
+
+def matrix_to_quaternion_array(matrices: numpy.ndarray) -> numpy.ndarray:
+    """
+    Converts rotation matrices with shape (N, 3, 3) to quaternions (w, x, y, z) with shape (N, 4).
+    Same branches as Blender mat3_normalized_to_quat(), w is never negative.
+    """
+    mat = normalize_matrix_array(numpy.asarray(matrices, dtype=numpy.float64).reshape(-1, 3, 3))
+    m00 = mat[:, 0, 0]
+    m11 = mat[:, 1, 1]
+    m22 = mat[:, 2, 2]
+    m01 = mat[:, 0, 1]
+    m10 = mat[:, 1, 0]
+    m02 = mat[:, 0, 2]
+    m20 = mat[:, 2, 0]
+    m12 = mat[:, 1, 2]
+    m21 = mat[:, 2, 1]
+
+    use_x = (m22 < 0.0) & (m00 > m11)
+    use_y = (m22 < 0.0) & ~(m00 > m11)
+    use_z = (m22 >= 0.0) & (m00 < -m11)
+    use_w = ~(use_x | use_y | use_z)
+
+    quats = numpy.empty((len(mat), 4), dtype=numpy.float64)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        # Each branch divides by its largest component to stay stable.
+        s = 2.0 * numpy.sqrt(numpy.maximum(1.0 + m00 - m11 - m22, 0.0))
+        s = numpy.where(m12 < m21, -s, s)
+        branch_x = numpy.stack((m12 - m21, s * s * 0.25, m01 + m10, m20 + m02), axis=1) / s[:, None]
+
+        s = 2.0 * numpy.sqrt(numpy.maximum(1.0 - m00 + m11 - m22, 0.0))
+        s = numpy.where(m20 < m02, -s, s)
+        branch_y = numpy.stack((m20 - m02, m01 + m10, s * s * 0.25, m12 + m21), axis=1) / s[:, None]
+
+        s = 2.0 * numpy.sqrt(numpy.maximum(1.0 - m00 - m11 + m22, 0.0))
+        s = numpy.where(m01 < m10, -s, s)
+        branch_z = numpy.stack((m01 - m10, m20 + m02, m12 + m21, s * s * 0.25), axis=1) / s[:, None]
+
+        s = 2.0 * numpy.sqrt(numpy.maximum(1.0 + m00 + m11 + m22, 0.0))
+        branch_w = numpy.stack((s * s * 0.25, m12 - m21, m20 - m02, m01 - m10), axis=1) / s[:, None]
+
+    quats[use_x] = branch_x[use_x]
+    quats[use_y] = branch_y[use_y]
+    quats[use_z] = branch_z[use_z]
+    quats[use_w] = branch_w[use_w]
+    return normalize_quaternion_array(quats)
+
+
+def normalize_quaternion_array(quats: numpy.ndarray) -> numpy.ndarray:
+    """
+    Normalizes quaternions with shape (N, 4). Null quaternions become the identity.
+    """
+    quats = numpy.asarray(quats, dtype=numpy.float64).reshape(-1, 4)
+    lengths = numpy.linalg.norm(quats, axis=1)
+    is_null = lengths == 0.0
+    lengths[is_null] = 1.0
+    result = quats / lengths[:, None]
+    result[is_null] = (1.0, 0.0, 0.0, 0.0)
+    return result
+
+
+def quaternion_to_matrix_array(quats: numpy.ndarray) -> numpy.ndarray:
+    """
+    Converts quaternions (w, x, y, z) with shape (N, 4) to rotation matrices with shape (N, 3, 3).
+    """
+    q = normalize_quaternion_array(quats)
+    w = q[:, 0]
+    x = q[:, 1]
+    y = q[:, 2]
+    z = q[:, 3]
+
+    matrices = numpy.empty((len(q), 3, 3), dtype=numpy.float64)
+    matrices[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    matrices[:, 0, 1] = 2.0 * (x * y + w * z)
+    matrices[:, 0, 2] = 2.0 * (x * z - w * y)
+    matrices[:, 1, 0] = 2.0 * (x * y - w * z)
+    matrices[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    matrices[:, 1, 2] = 2.0 * (y * z + w * x)
+    matrices[:, 2, 0] = 2.0 * (x * z + w * y)
+    matrices[:, 2, 1] = 2.0 * (y * z - w * x)
+    matrices[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return matrices
+
+
+def quaternion_to_axis_angle_array(quats: numpy.ndarray) -> numpy.ndarray:
+    """
+    Converts quaternions (w, x, y, z) to axis angles (angle, x, y, z) with shape (N, 4),
+    the layout of rotation_axis_angle. Same rules as Blender quat_to_axis_angle().
+    """
+    q = normalize_quaternion_array(quats)
+    half_angles = numpy.arccos(numpy.clip(q[:, 0], -1.0, 1.0))
+    sin_half_angles = numpy.sin(half_angles)
+    sin_half_angles[numpy.abs(sin_half_angles) < 0.0005] = 1.0
+
+    axis_angles = numpy.empty((len(q), 4), dtype=numpy.float64)
+    axis_angles[:, 0] = half_angles * 2.0
+    axis_angles[:, 1:] = q[:, 1:] / sin_half_angles[:, None]
+    is_null_axis = ~axis_angles[:, 1:].any(axis=1)
+    axis_angles[is_null_axis, 2] = 1.0
+    return axis_angles
+
+
+def axis_angle_to_quaternion_array(axis_angles: numpy.ndarray) -> numpy.ndarray:
+    """
+    Converts axis angles (angle, x, y, z) with shape (N, 4) to quaternions (w, x, y, z).
+    Null axes give the identity.
+    """
+    axis_angles = numpy.asarray(axis_angles, dtype=numpy.float64).reshape(-1, 4)
+    axes = axis_angles[:, 1:]
+    lengths = numpy.linalg.norm(axes, axis=1)
+    is_null_axis = lengths == 0.0
+    lengths[is_null_axis] = 1.0
+
+    half_angles = axis_angles[:, 0] * 0.5
+    quats = numpy.empty((len(axis_angles), 4), dtype=numpy.float64)
+    quats[:, 0] = numpy.cos(half_angles)
+    quats[:, 1:] = axes / lengths[:, None] * numpy.sin(half_angles)[:, None]
+    quats[is_null_axis] = (1.0, 0.0, 0.0, 0.0)
+    return quats
@@ -18,13 +18,43 @@
 
 
 import bpy
+import bisect
 import mathutils
-from typing import Dict
+import numpy
+from typing import Dict, List, Optional
+
+# Smallest value change that keys an axis without key on the frame.
+missing_key_tolerance = 1e-6
+
+def get_key_index_at_frame(fcurve: bpy.types.FCurve, frame: float) -> int:
+    """
+    Returns the index of the key of the fcurve on the frame, -1 if there is none.
+    Keys are sorted by frame, the index is found with a binary search.
+    """
+    key_count = len(fcurve.keyframe_points)
+    if key_count == 0:
+        return -1
+    cos = numpy.empty(key_count * 2, dtype=numpy.float32)
+    fcurve.keyframe_points.foreach_get("co", cos)
+    key_frames = cos[0::2]
+    frame = numpy.float32(frame)
+    index = int(numpy.searchsorted(key_frames, frame))
+    if index < key_count and key_frames[index] == frame:
+        return index
+    return -1
 
 class EulerFrame:
     def __init__(self, frame: float):
         self.frame = frame
         self.euler = mathutils.Euler()
+        # Index of the keyframe in the axis FCurve, -1 when the axis has no key on this frame.
+        self.key_indices: List[int] = [-1, -1, -1]
+
+    def has_key_on_axis(self, axis: int) -> bool:
+        return self.key_indices[axis] != -1
+
+    def is_fully_keyed(self) -> bool:
+        return all(index != -1 for index in self.key_indices)
 
     def get_key_str(self):
         return f"({self.frame}) ->  X{self.euler.x}, Y{self.euler.y}, Z{self.euler.z}"
@@ -32,68 +62,421 @@ class EulerFrame:
     def get_euler(self):
         return self.euler
 
+class QuaternionFrame(EulerFrame):
+    """
+    Quaternion keys of a frame. The value is stored in euler like EulerFrame
+    so the EulerGroup extraction and write back are reused as is.
+    """
+
+    def __init__(self, frame: float):
+        self.frame = frame
+        self.euler = mathutils.Quaternion()
+        self.key_indices: List[int] = [-1, -1, -1, -1]
+
+    def get_key_str(self):
+        return f"({self.frame}) ->  W{self.euler.w}, X{self.euler.x}, Y{self.euler.y}, Z{self.euler.z}"
+
+    def get_quaternion(self):
+        return self.euler
+
 class EulerGroup:
+    # Number of array_index used by the rotation data path.
+    channel_count = 3
+
     def __init__(self, source_data):
         self.source_data = source_data
         self.selected_data_path = None
+        # FCurve used for each axis (array_index).
+        self.fcurves: Dict[int, bpy.types.FCurve] = {}
         self.euler_frames: Dict[float, EulerFrame] = {}
+        # Frames of euler_frames kept in ascending order (bisect index).
+        self.sorted_frames: List[float] = []
+        self.rotation_order = "XYZ"
+
+    def set_rotation_order(self, rotation_order: str):
+        self.rotation_order = rotation_order
+        for euler_frame in self.euler_frames.values():
+            euler_frame.euler.order = rotation_order
+
+    def create_frame(self, frame: float) -> EulerFrame:
+        euler_frame = EulerFrame(frame)
+        euler_frame.euler.order = self.rotation_order
+        return euler_frame
+
+    def create_value(self, values: List[float]):
+        return mathutils.Euler(values, self.rotation_order)
+
+    def try_add_new_key(self, fcurve: bpy.types.FCurve, keyframe: bpy.types.Keyframe, key_index: int = -1):
+        if not self.try_set_data_path(fcurve):
+            return
 
-    def try_add_new_key(self, fcurve: bpy.types.FCurve, keyframe: bpy.types.Keyframe):
+        if key_index == -1:
+            key_index = get_key_index_at_frame(fcurve, keyframe.co[0])
+        self.add_key_value(fcurve.array_index, keyframe.co[0], keyframe.co[1], key_index)
+
+    def try_set_data_path(self, fcurve: bpy.types.FCurve) -> bool:
+        """
+        Sets the target data path on first call.
+        Returns False when the curve uses another data path.
+        """
         if self.selected_data_path is None:
             # Set the target data path
             self.selected_data_path = fcurve.data_path
         else:
             # Add only curve from the same data path
             if fcurve.data_path != self.selected_data_path:
-                return
-            
+                return False
 
-        array_index = fcurve.array_index
-        frame = keyframe.co[0]
-        value = keyframe.co[1]
+        if fcurve.array_index < self.channel_count:
+            self.fcurves[fcurve.array_index] = fcurve
+        return True
+
+    def add_key_value(self, array_index: int, frame: float, value: float, key_index: int):
+        if array_index >= self.channel_count:
+            return
 
         if frame not in self.euler_frames:
-            new_euler_frame = self.euler_frames[frame] = EulerFrame(frame)
+            self.euler_frames[frame] = self.create_frame(frame)
+            bisect.insort(self.sorted_frames, frame)
+
+        euler_frame = self.euler_frames[frame]
+        euler_frame.euler[array_index] = value
+        euler_frame.key_indices[array_index] = key_index
+
+    def add_fcurve_keys(self, fcurve: bpy.types.FCurve, only_selected: bool = True) -> int:
+        """
+        Reads all the keys of the fcurve in one pass with foreach_get.
+        Returns the number of added keys.
+        """
+        key_count = len(fcurve.keyframe_points)
+        if key_count == 0:
+            return 0
+
+        if only_selected:
+            selects = numpy.zeros(key_count, dtype=bool)
+            fcurve.keyframe_points.foreach_get("select_control_point", selects)
+            key_indices = numpy.flatnonzero(selects)
+        else:
+            key_indices = numpy.arange(key_count)
+
+        if len(key_indices) == 0:
+            return 0
+        if not self.try_set_data_path(fcurve):
+            return 0
 
-        if array_index == 0:
-            self.euler_frames[frame].euler.x = value
-        elif array_index == 1:
-            self.euler_frames[frame].euler.y = value
-        elif array_index == 2:
-            self.euler_frames[frame].euler.z = value
+        cos = numpy.empty(key_count * 2, dtype=numpy.float32)
+        fcurve.keyframe_points.foreach_get("co", cos)
+        cos = cos.reshape(key_count, 2)
+
+        array_index = fcurve.array_index
+        for key_index, (frame, value) in zip(key_indices.tolist(), cos[key_indices].tolist()):
+            self.add_key_value(array_index, frame, value, key_index)
+        return len(key_indices)
+
+    def get_axis_fcurve(self, axis: int) -> Optional[bpy.types.FCurve]:
+        if axis in self.fcurves:
+            return self.fcurves[axis]
+        if self.selected_data_path is None:
+            return None
+        fcurve = self.source_data.fcurves.find(self.selected_data_path, index=axis)
+        if fcurve is not None:
+            self.fcurves[axis] = fcurve
+        return fcurve
+
+    def fill_missing_channels(self):
+        """
+        Frames keyed only on some axes get the missing values by evaluating the other curves,
+        instead of keeping the default 0.0 from mathutils.Euler().
+        """
+        for axis in range(self.channel_count):
+            missing_keys = [key for key in self.get_sorted_keys() if not key.has_key_on_axis(axis)]
+            if not missing_keys:
+                continue
+
+            fcurve = self.get_axis_fcurve(axis)
+            if fcurve is None:
+                # No curve for this axis, the property keeps its default value.
+                continue
+
+            # One pass on the curve for all the missing frames.
+            evaluate = fcurve.evaluate
+            values = [evaluate(key.frame) for key in missing_keys]
+            for key, value in zip(missing_keys, values):
+                key.euler[axis] = value
+
+    def create_axis_fcurve(self, axis: int) -> bpy.types.FCurve:
+        """
+        Creates the curve of an axis without curve, in the group of the other axes curves.
+        """
+        group_name = next((fcurve.group.name for fcurve in self.fcurves.values() if fcurve.group is not None), None)
+        if group_name:
+            fcurve = self.source_data.fcurves.new(self.selected_data_path, index=axis, action_group=group_name)
+        else:
+            fcurve = self.source_data.fcurves.new(self.selected_data_path, index=axis)
+        self.fcurves[axis] = fcurve
+        return fcurve
+
+    def update_axis_key_indices(self, axis: int):
+        """
+        Reads the key indices of the axis curve again, after keys were inserted.
+        """
+        fcurve = self.get_axis_fcurve(axis)
+        if fcurve is None:
+            for euler_frame in self.euler_frames.values():
+                euler_frame.key_indices[axis] = -1
+            return
+        key_count = len(fcurve.keyframe_points)
+        cos = numpy.empty(key_count * 2, dtype=numpy.float32)
+        fcurve.keyframe_points.foreach_get("co", cos)
+        key_frames = cos[0::2]
+        frames = numpy.array(self.sorted_frames, dtype=numpy.float32)
+        positions = numpy.minimum(numpy.searchsorted(key_frames, frames), max(key_count - 1, 0))
+        found = key_frames[positions] == frames if key_count else numpy.zeros(len(frames), dtype=bool)
+        for frame, position, is_found in zip(self.sorted_frames, positions.tolist(), found.tolist()):
+            self.euler_frames[frame].key_indices[axis] = position if is_found else -1
+
+    def update_key_indices(self):
+        """
+        Reads the key indices of all the axes again, after the curves were replaced.
+        """
+        for axis in range(self.channel_count):
+            self.update_axis_key_indices(axis)
+
+    def insert_axis_keys(self, axis: int, frames: List[float]):
+        """
+        Keys the axis on the frames with their current value. The axis curve is created if missing.
+        """
+        if not frames:
+            return
+        fcurve = self.get_axis_fcurve(axis)
+        if fcurve is None:
+            fcurve = self.create_axis_fcurve(axis)
+        for frame in frames:
+            fcurve.keyframe_points.insert(frame, self.euler_frames[frame].euler[axis], options={'FAST'})
+        fcurve.update()
+        self.update_axis_key_indices(axis)
+
+    def insert_changed_missing_keys(self, frames: List[float], new_values: numpy.ndarray):
+        """
+        Keys the axes without key whose new value differs from their evaluated value,
+        otherwise only the keyed axes would move and the frame would get another rotation.
+        new_values has the shape (len(frames), channel_count).
+        """
+        if not frames:
+            return
+        new_values = numpy.asarray(new_values, dtype=numpy.float64).reshape(len(frames), self.channel_count)
+        frame_datas = [self.euler_frames[frame] for frame in frames]
+        values = numpy.array([list(frame_data.euler) for frame_data in frame_datas], dtype=numpy.float64)
+        missing = numpy.array([frame_data.key_indices for frame_data in frame_datas], dtype=numpy.int64) == -1
+        changed = missing & (numpy.abs(new_values - values) > missing_key_tolerance)
+        for axis in range(self.channel_count):
+            self.insert_axis_keys(axis, [frames[index] for index in numpy.flatnonzero(changed[:, axis]).tolist()])
+
+    def get_key_count(self) -> int:
+        return len(self.sorted_frames)
+
+    def get_first_frame(self) -> Optional[float]:
+        """
+        Returns the earliest keyed frame, or None if the group is empty.
+        """
+        if not self.sorted_frames:
+            return None
+        return self.sorted_frames[0]
+
+    def get_last_frame(self) -> Optional[float]:
+        """
+        Returns the latest keyed frame, or None if the group is empty.
+        """
+        if not self.sorted_frames:
+            return None
+        return self.sorted_frames[-1]
+
+    def get_first_key(self) -> Optional[EulerFrame]:
+        first_frame = self.get_first_frame()
+        if first_frame is None:
+            return None
+        return self.euler_frames[first_frame]
+
+    def get_last_key(self) -> Optional[EulerFrame]:
+        last_frame = self.get_last_frame()
+        if last_frame is None:
+            return None
+        return self.euler_frames[last_frame]
+
+    def get_frames_in_range(self, frame_start: float, frame_end: float) -> List[float]:
+        """
+        Returns the keyed frames between frame_start and frame_end (both included), in ascending order.
+        """
+        start_index = bisect.bisect_left(self.sorted_frames, frame_start)
+        end_index = bisect.bisect_right(self.sorted_frames, frame_end)
+        return self.sorted_frames[start_index:end_index]
+
+    def get_keys_in_range(self, frame_start: float, frame_end: float) -> List[EulerFrame]:
+        """
+        Returns the EulerFrame between frame_start and frame_end (both included), in ascending order.
+        """
+        return [self.euler_frames[frame] for frame in self.get_frames_in_range(frame_start, frame_end)]
+
+    def get_sorted_keys(self) -> List[EulerFrame]:
+        return [self.euler_frames[frame] for frame in self.sorted_frames]
+
+    def get_previous_key(self, frame: float) -> Optional[EulerFrame]:
+        """
+        Returns the closest key strictly before the frame, or None.
+        """
+        index = bisect.bisect_left(self.sorted_frames, frame)
+        if index == 0:
+            return None
+        return self.euler_frames[self.sorted_frames[index - 1]]
+
+    def get_next_key(self, frame: float) -> Optional[EulerFrame]:
+        """
+        Returns the closest key strictly after the frame, or None.
+        """
+        index = bisect.bisect_right(self.sorted_frames, frame)
+        if index >= len(self.sorted_frames):
+            return None
+        return self.euler_frames[self.sorted_frames[index]]
+
+    def keep_frames_in_range(self, frame_start: float, frame_end: float):
+        """
+        Removes all keys outside of the frame window.
+        """
+        start_index = bisect.bisect_left(self.sorted_frames, frame_start)
+        end_index = bisect.bisect_right(self.sorted_frames, frame_end)
+        for frame in self.sorted_frames[:start_index] + self.sorted_frames[end_index:]:
+            del self.euler_frames[frame]
+        self.sorted_frames = self.sorted_frames[start_index:end_index]
 
     def apply_euler_on_frame(self, frame, new_euler: mathutils.Euler) -> bool:
-        frame_data = self.euler_frames[frame] 
-        for fcurve in self.source_data.fcurves:
-            fcurve: bpy.types.FCurve
-            array_index = fcurve.array_index
-            if fcurve.data_path == self.selected_data_path:
-                for keyframe in fcurve.keyframe_points:
-                    if keyframe.co[0] == frame: 
-                        if array_index == 0:
-                            offset = new_euler.x - self.euler_frames[frame].euler.x
-                            keyframe.co[1] += offset
-                            keyframe.handle_left.y += offset
-                            keyframe.handle_right.y += offset
-                            print("s1")
-                        elif array_index == 1:
-                            offset = new_euler.y - self.euler_frames[frame].euler.y
-                            keyframe.co[1] += offset
-                            keyframe.handle_left.y += offset
-                            keyframe.handle_right.y += offset
-                            print("s2")
-                        elif array_index == 2:
-                            offset = new_euler.z - self.euler_frames[frame].euler.z
-                            keyframe.co[1] += offset
-                            keyframe.handle_left.y += offset
-                            keyframe.handle_right.y += offset
-                            print("s3")
-        return False
+        """
+        Moves the keys of the frame to the new euler value.
+        Axes without key on this frame are keyed when their value changes.
+        """
+        self.insert_changed_missing_keys([frame], [list(new_euler)])
+        frame_data = self.euler_frames[frame]
+        applied = False
+        for axis in range(self.channel_count):
+            if not frame_data.has_key_on_axis(axis):
+                continue
+            fcurve = self.get_axis_fcurve(axis)
+            if fcurve is None:
+                continue
+
+            keyframe = fcurve.keyframe_points[frame_data.key_indices[axis]]
+            offset = new_euler[axis] - frame_data.euler[axis]
+            keyframe.co[1] += offset
+            keyframe.handle_left.y += offset
+            keyframe.handle_right.y += offset
+            frame_data.euler[axis] = new_euler[axis]
+            applied = True
+        return applied
+
+    def apply_eulers_on_frames(self, new_eulers: Dict[float, mathutils.Euler]):
+        """
+        Bulk version of apply_euler_on_frame.
+        Each axis curve is read and written once with foreach_get / foreach_set.
+        """
+        self.insert_changed_missing_keys(list(new_eulers.keys()), [list(new_euler) for new_euler in new_eulers.values()])
+        for axis in range(self.channel_count):
+            key_indices: List[int] = []
+            offsets: List[float] = []
+            for frame, new_euler in new_eulers.items():
+                frame_data = self.euler_frames[frame]
+                if frame_data.has_key_on_axis(axis):
+                    key_indices.append(frame_data.key_indices[axis])
+                    offsets.append(new_euler[axis] - frame_data.euler[axis])
+                    frame_data.euler[axis] = new_euler[axis]
+
+            self.move_axis_keys(axis, key_indices, offsets)
+
+    def get_frame_array(self) -> numpy.ndarray:
+        return numpy.array(self.sorted_frames, dtype=numpy.float64)
+
+    def get_euler_array(self) -> numpy.ndarray:
+        """
+        Returns the euler values with shape (N, channel_count), sorted by frame.
+        """
+        eulers = numpy.empty((len(self.sorted_frames), self.channel_count), dtype=numpy.float64)
+        for index, frame in enumerate(self.sorted_frames):
+            eulers[index] = self.euler_frames[frame].euler
+        return eulers
+
+    def get_key_index_array(self) -> numpy.ndarray:
+        """
+        Returns the keyframe index of each axis with shape (N, channel_count), sorted by frame. -1 when not keyed.
+        """
+        key_indices = numpy.empty((len(self.sorted_frames), self.channel_count), dtype=numpy.int64)
+        for index, frame in enumerate(self.sorted_frames):
+            key_indices[index] = self.euler_frames[frame].key_indices
+        return key_indices
+
+    def set_euler_array(self, eulers: numpy.ndarray):
+        """
+        Sets the stored euler values without modifying the curves.
+        """
+        for frame, euler in zip(self.sorted_frames, numpy.asarray(eulers).tolist()):
+            self.euler_frames[frame].euler = self.create_value(euler)
+
+    def apply_euler_array(self, new_eulers: numpy.ndarray):
+        """
+        Array version of apply_eulers_on_frames.
+        new_eulers has the shape (N, channel_count) and is sorted by frame like get_euler_array().
+        """
+        new_eulers = numpy.asarray(new_eulers, dtype=numpy.float64)
+        self.insert_changed_missing_keys(self.sorted_frames, new_eulers)
+        offsets = new_eulers - self.get_euler_array()
+        key_indices = self.get_key_index_array()
+        for axis in range(self.channel_count):
+            keyed = key_indices[:, axis] != -1
+            self.move_axis_keys(axis, key_indices[keyed, axis], offsets[keyed, axis])
+        self.set_euler_array(new_eulers)
+
+    def move_axis_keys(self, axis: int, key_indices, offsets):
+        """
+        Adds the offsets on the value and handles of the keys of the axis curve.
+        """
+        if len(key_indices) == 0:
+            return
+        fcurve = self.get_axis_fcurve(axis)
+        if fcurve is None:
+            return
+
+        keyframe_points = fcurve.keyframe_points
+        key_count = len(keyframe_points)
+        offsets = numpy.asarray(offsets, dtype=numpy.float32)
+        for prop_name in ("co", "handle_left", "handle_right"):
+            values = numpy.empty(key_count * 2, dtype=numpy.float32)
+            keyframe_points.foreach_get(prop_name, values)
+            values = values.reshape(key_count, 2)
+            values[key_indices, 1] += offsets
+            keyframe_points.foreach_set(prop_name, values.ravel())
+        fcurve.update()
 
     def print_all_keys(self):
-        for frame_key in self.euler_frames:
+        for frame_key in self.sorted_frames:
             frame_data = self.euler_frames[frame_key]
             frame_data_str = frame_data.get_key_str()
             print(f"[{frame_data.frame}] {frame_data_str}")
 
 
+class QuaternionGroup(EulerGroup):
+    """
+    EulerGroup for the 4 channels (W, X, Y, Z) of a rotation_quaternion data path.
+    """
+
+    channel_count = 4
+
+    def __init__(self, source_data):
+        super().__init__(source_data)
+        self.rotation_order = "QUATERNION"
+
+    def set_rotation_order(self, rotation_order: str):
+        # Quaternions have no order.
+        pass
+
+    def create_frame(self, frame: float) -> QuaternionFrame:
+        return QuaternionFrame(frame)
+
+    def create_value(self, values: List[float]):
+        return mathutils.Quaternion(values)
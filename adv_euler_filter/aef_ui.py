@@ -17,6 +17,7 @@
 # ======================= END GPL LICENSE BLOCK =============================
 
 import os
+import math
 import bpy
 import addon_utils
 import time
@@ -28,6 +29,17 @@ from . import aef_utils
 from . import aef_ui_utils
 from . import languages
 from . import aef_types
+from . import aef_eulerfilter_utils
+from . import aef_filter_session
+from . import aef_batch
+from . import aef_analysis
+from . import aef_rotation_convert
+from . import aef_rotation_utils
+from . import aef_bake
+from . import aef_keyframe_reduce
+from . import aef_hierarchy_filter
+from . import aef_mirror_filter
+from bpy_extras.io_utils import ExportHelper
 
 
 class AEF_PT_GraphCurveFilter(bpy.types.Panel):
@@ -59,6 +71,369 @@ class AEF_PT_GraphCurveFilter(bpy.types.Panel):
             aef_utils.apply_euler_filer_last_to_first(euler_group)
             return {'FINISHED'}
 
+    class AEF_OT_SessionApplyMethod(bpy.types.Operator):
+        bl_label = "Try Method"
+        bl_idname = "object.aef_session_apply_method"
+        bl_description = "Clic to filter all the selected keys with this method. Other methods can be tried or reverted instantly"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        reverse: bpy.props.BoolProperty(
+            name="Right -> Left",
+            default=False,
+            )
+
+        def execute(self, context):
+            action = context.object.animation_data.action
+            session = aef_filter_session.get_session(action, check_selection=True)
+            if session is None:
+                euler_group = aef_utils.create_euler_group_from_select()
+                session = aef_filter_session.start_session(action, [euler_group])
+            session.apply_method(self.method, self.reverse)
+            return {'FINISHED'}
+
+    class AEF_OT_SessionRevert(bpy.types.Operator):
+        bl_label = "Revert"
+        bl_idname = "object.aef_session_revert"
+        bl_description = "Clic to restore the curves saved at the first try"
+
+        def execute(self, context):
+            action = context.object.animation_data.action
+            aef_filter_session.end_session(action, revert=True)
+            return {'FINISHED'}
+
+    class AEF_OT_SessionValidate(bpy.types.Operator):
+        bl_label = "Validate"
+        bl_idname = "object.aef_session_validate"
+        bl_description = "Clic to keep the current filter result"
+
+        def execute(self, context):
+            action = context.object.animation_data.action
+            aef_filter_session.end_session(action, revert=False)
+            return {'FINISHED'}
+
+    class AEF_OT_ApplyFilterOnNLA(bpy.types.Operator):
+        bl_label = "Filter All NLA Actions"
+        bl_idname = "object.aef_apply_filter_on_nla"
+        bl_description = "Clic to filter all euler curves of the active action and of the actions used in the NLA tracks"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        reduce_keys: bpy.props.BoolProperty(
+            name="Reduce Keys",
+            description="Remove the keys that can be rebuilt within the tolerance after the filter",
+            default=False,
+            )
+
+        reduce_tolerance: bpy.props.FloatProperty(
+            name="Tolerance",
+            subtype='ANGLE',
+            default=aef_keyframe_reduce.default_tolerance,
+            min=0.0,
+            precision=4,
+            )
+
+        def execute(self, context):
+            reduce_tolerance = self.reduce_tolerance if self.reduce_keys else None
+            action_count = aef_utils.apply_euler_filter_on_object_nla(context.object, self.method, reduce_tolerance=reduce_tolerance)
+            self.report({'INFO'}, f"{action_count} action(s) filtered.")
+            return {'FINISHED'}
+
+    class AEF_OT_FilterLibraryActions(bpy.types.Operator):
+        bl_label = "Filter All File Actions"
+        bl_idname = "object.aef_filter_library_actions"
+        bl_description = "Clic to filter the euler curves of all the actions of the file. Each action is filtered one time. Esc to cancel"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        reduce_keys: bpy.props.BoolProperty(
+            name="Reduce Keys",
+            description="Remove the keys that can be rebuilt within the tolerance after the filter",
+            default=False,
+            )
+
+        reduce_tolerance: bpy.props.FloatProperty(
+            name="Tolerance",
+            subtype='ANGLE',
+            default=aef_keyframe_reduce.default_tolerance,
+            min=0.0,
+            precision=4,
+            )
+
+        _timer = None
+
+        def execute(self, context):
+            if aef_batch.running_job is not None:
+                self.report({'WARNING'}, "A filter job is already running.")
+                return {'CANCELLED'}
+
+            reduce_tolerance = self.reduce_tolerance if self.reduce_keys else None
+            self.job = aef_batch.start_library_filter_job(self.method, reduce_tolerance=reduce_tolerance)
+            window_manager = context.window_manager
+            window_manager.progress_begin(0, 100)
+            self._timer = window_manager.event_timer_add(0.1, window=context.window)
+            window_manager.modal_handler_add(self)
+            return {'RUNNING_MODAL'}
+
+        def modal(self, context, event):
+            if event.type == 'ESC' and not self.job.finished:
+                aef_batch.stop_filter_job(restore=True)
+                self.finish(context)
+                self.report({'INFO'}, "Filter job cancelled, curves restored.")
+                return {'CANCELLED'}
+
+            if event.type == 'TIMER':
+                progress = self.job.get_progress()
+                context.window_manager.progress_update(round(progress * 100))
+                context.workspace.status_text_set(f"Filtering actions {round(progress * 100)}% (Esc to cancel)")
+
+                if self.job.finished:
+                    self.finish(context)
+                    if self.job.cancelled:
+                        self.report({'INFO'}, "Filter job cancelled, curves restored.")
+                        return {'CANCELLED'}
+                    self.report({'INFO'}, f"{self.job.filtered_count} action(s) filtered.")
+                    return {'FINISHED'}
+
+            return {'PASS_THROUGH'}
+
+        def finish(self, context):
+            window_manager = context.window_manager
+            window_manager.event_timer_remove(self._timer)
+            window_manager.progress_end()
+            context.workspace.status_text_set(None)
+
+    class AEF_OT_StopLibraryFilter(bpy.types.Operator):
+        bl_label = "Cancel"
+        bl_idname = "object.aef_stop_library_filter"
+        bl_description = "Clic to cancel the running filter job and restore the curves"
+
+        def execute(self, context):
+            aef_batch.stop_filter_job(restore=True)
+            return {'FINISHED'}
+
+    class AEF_OT_AnalyzeEulerBreaks(bpy.types.Operator):
+        bl_label = "Analyze Euler Breaks"
+        bl_idname = "object.aef_analyze_euler_breaks"
+        bl_description = "Clic to list the euler breaks of all the animated objects of the scene. The curves are not modified"
+
+        threshold: bpy.props.FloatProperty(
+            name="Threshold",
+            subtype='ANGLE',
+            default=math.pi,
+            min=0.0,
+            )
+
+        def execute(self, context):
+            report = aef_analysis.analyze_scene(context.scene, self.threshold)
+            aef_analysis.last_report = report
+            self.report({'INFO'}, f"{len(report.breaks)} euler break(s) found in {report.analyzed_actions} action(s).")
+            return {'FINISHED'}
+
+    class AEF_OT_ExportEulerBreaks(bpy.types.Operator, ExportHelper):
+        bl_label = "Export Report"
+        bl_idname = "object.aef_export_euler_breaks"
+        bl_description = "Clic to export the last euler break report as JSON or CSV"
+
+        filename_ext = ".json"
+
+        filter_glob: bpy.props.StringProperty(
+            default="*.json;*.csv",
+            options={'HIDDEN'},
+            )
+
+        file_format: bpy.props.EnumProperty(
+            name="Format",
+            items=[
+                ("JSON", "JSON", ""),
+                ("CSV", "CSV", ""),
+                ],
+            default="JSON",
+            )
+
+        def check(self, context):
+            self.filename_ext = ".csv" if self.file_format == "CSV" else ".json"
+            return ExportHelper.check(self, context)
+
+        def execute(self, context):
+            report = aef_analysis.last_report
+            if report is None:
+                self.report({'WARNING'}, "No euler break report to export.")
+                return {'CANCELLED'}
+            if self.file_format == "CSV":
+                report.export_csv(self.filepath)
+            else:
+                report.export_json(self.filepath)
+            self.report({'INFO'}, f"Report exported to {self.filepath}")
+            return {'FINISHED'}
+
+    class AEF_OT_ConvertRotationMode(bpy.types.Operator):
+        bl_label = "Convert Rotation Mode"
+        bl_idname = "object.aef_convert_rotation_mode"
+        bl_description = "Clic to convert the rotation curves of the selected bones (or of the object) to the rotation mode. The active and NLA actions are converted"
+
+        target_mode: bpy.props.EnumProperty(
+            name="Rotation Mode",
+            items=[(mode, mode, "") for mode in aef_rotation_convert.rotation_modes],
+            default="QUATERNION",
+            )
+
+        def execute(self, context):
+            obj = context.object
+            bone_names = None
+            if context.mode == 'POSE':
+                bone_names = [pose_bone.name for pose_bone in context.selected_pose_bones]
+            converted_count = aef_rotation_convert.convert_object_rotation_mode(obj, self.target_mode, bone_names)
+            self.report({'INFO'}, f"{converted_count} rotation curve group(s) converted to {self.target_mode}.")
+            return {'FINISHED'}
+
+    class AEF_OT_RetargetEulerOrder(bpy.types.Operator):
+        bl_label = "Change Euler Order"
+        bl_idname = "object.aef_retarget_euler_order"
+        bl_description = "Clic to convert the selected euler curves to another order while keeping the orientation of each key"
+
+        target_order: bpy.props.EnumProperty(
+            name="Euler Order",
+            items=[("BEST", "Best (Least Gimbal)", "Use the order with the rotations the farthest from gimbal lock for each curve")]
+                + [(order, order, "") for order in aef_rotation_utils.euler_orders],
+            default="BEST",
+            )
+
+        def execute(self, context):
+            obj = context.object
+            data_paths = aef_rotation_convert.get_selected_euler_data_paths(obj.animation_data.action)
+            target_order = None if self.target_order == "BEST" else self.target_order
+            retargeted = aef_rotation_convert.retarget_euler_order(obj, data_paths, target_order)
+            orders = ", ".join(f"{aef_utils.get_bone_name_from_data_path(data_path) or data_path}: {new_order}" for data_path, new_order in retargeted)
+            self.report({'INFO'}, f"{len(retargeted)} euler curve group(s) converted. " + orders)
+            return {'FINISHED'}
+
+    class AEF_OT_BakeVisualRotation(bpy.types.Operator):
+        bl_label = "Bake Visual Rotation"
+        bl_idname = "object.aef_bake_visual_rotation"
+        bl_description = "Clic to bake the visual rotation of the selected bones on the scene frame range in filtered euler curves"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        @classmethod
+        def poll(cls, context):
+            return context.mode == 'POSE' and context.object is not None and context.object.animation_data is not None and context.object.animation_data.action is not None
+
+        def execute(self, context):
+            obj = context.object
+            scene = context.scene
+            bone_names = [pose_bone.name for pose_bone in context.selected_pose_bones]
+            frames = aef_bake.get_frame_range_frames(scene.frame_start, scene.frame_end, scene.frame_step)
+            aef_bake.bake_visual_euler_rotation(obj, obj.animation_data.action, bone_names, frames, self.method)
+            self.report({'INFO'}, f"{len(bone_names)} bone(s) baked on {len(frames)} frame(s).")
+            return {'FINISHED'}
+
+    class AEF_OT_ApplyQuaternionFilter(bpy.types.Operator):
+        bl_label = "Fix Quaternion Flips"
+        bl_idname = "object.aef_apply_quaternion_filter"
+        bl_description = "Clic to fix the sign flips (q / -q) of the quaternion curves of the active action and of the NLA actions"
+
+        reverse: bpy.props.BoolProperty(
+            name="Right -> Left",
+            default=False,
+            )
+
+        def execute(self, context):
+            actions = bbpl.anim_utils.get_animation_data_actions(context.object.animation_data)
+            fixed_count = aef_utils.apply_quaternion_filter_on_actions(actions, self.reverse)
+            self.report({'INFO'}, f"{fixed_count} quaternion curve group(s) fixed.")
+            return {'FINISHED'}
+
+    class AEF_OT_ReduceKeys(bpy.types.Operator):
+        bl_label = "Reduce Keys"
+        bl_idname = "object.aef_reduce_keys"
+        bl_description = "Clic to remove the keys of the selected curves that can be rebuilt within the tolerance"
+
+        tolerance: bpy.props.FloatProperty(
+            name="Tolerance",
+            subtype='ANGLE',
+            default=aef_keyframe_reduce.default_tolerance,
+            min=0.0,
+            precision=4,
+            )
+
+        def execute(self, context):
+            removed_count = 0
+            for fcurve in context.object.animation_data.action.fcurves:
+                if fcurve.select:
+                    removed_count += aef_keyframe_reduce.reduce_fcurve_keys(fcurve, self.tolerance)
+            self.report({'INFO'}, f"{removed_count} key(s) removed.")
+            return {'FINISHED'}
+
+    class AEF_OT_ApplyHierarchicalFilter(bpy.types.Operator):
+        bl_label = "Filter Armature Hierarchy"
+        bl_idname = "object.aef_apply_hierarchical_filter"
+        bl_description = "Clic to filter all the euler curves of the active action, parent bones first"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        validate: bpy.props.BoolProperty(
+            name="Validate World Space",
+            description="Compare the bones world rotation between the keys before and after the filter and restore the bones that flip",
+            default=False,
+            )
+
+        @classmethod
+        def poll(cls, context):
+            obj = context.object
+            return obj is not None and obj.type == 'ARMATURE' and obj.animation_data is not None and obj.animation_data.action is not None
+
+        def execute(self, context):
+            obj = context.object
+            result = aef_hierarchy_filter.apply_hierarchical_filter(obj, obj.animation_data.action, self.method, validate=self.validate)
+            if result.rejected_bones:
+                self.report({'WARNING'}, f"{len(result.rejected_bones)} bone(s) restored: " + ", ".join(result.rejected_bones))
+            else:
+                self.report({'INFO'}, f"{len(result.filtered_bones)} curve group(s) filtered.")
+            return {'FINISHED'}
+
+    class AEF_OT_ApplyMirrorFilter(bpy.types.Operator):
+        bl_label = "Filter Mirror Bones"
+        bl_idname = "object.aef_apply_mirror_filter"
+        bl_description = "Clic to filter all the euler curves of the active action, left and right bones together so they stay symmetrical"
+
+        method: bpy.props.EnumProperty(
+            name="Method",
+            items=[(method, method, "") for method in aef_eulerfilter_utils.euler_methods],
+            default="UNWRAP",
+            )
+
+        @classmethod
+        def poll(cls, context):
+            obj = context.object
+            return obj is not None and obj.type == 'ARMATURE' and obj.animation_data is not None and obj.animation_data.action is not None
+
+        def execute(self, context):
+            obj = context.object
+            result = aef_mirror_filter.apply_mirror_filter(obj, obj.animation_data.action, self.method)
+            self.report({'INFO'}, f"{len(result.mirror_pairs)} mirror pair(s) and {len(result.single_groups)} single curve group(s) filtered.")
+            return {'FINISHED'}
+
     def draw(self, contex):
         layout = self.layout
 
@@ -78,8 +453,46 @@ class AEF_PT_GraphCurveFilter(bpy.types.Panel):
             icon="HELP"
             )
         
+        job = aef_batch.running_job
+        if job is not None:
+            job_row = layout.row()
+            job_row.label(text=f"Filtering actions... {round(job.get_progress() * 100)}%")
+            job_row.operator("object.aef_stop_library_filter")
+        else:
+            layout.operator("object.aef_filter_library_actions")
+
+        analysis_box = layout.box()
+        analysis_row = analysis_box.row(align=True)
+        analysis_row.operator("object.aef_analyze_euler_breaks")
+        report = aef_analysis.last_report
+        if report is not None:
+            analysis_row.operator("object.aef_export_euler_breaks", text="", icon="EXPORT")
+            summaries = report.get_data_path_summary()
+            analysis_box.label(text=f"{len(report.breaks)} break(s) in {len(summaries)} curve(s)")
+            for summary in summaries[:10]:
+                name = summary["bone"] if summary["bone"] else summary["data_path"]
+                analysis_box.label(
+                    text=f"{name}: {summary['break_count']} break(s), {summary['max_jump_degrees']:.0f}° [{summary['frame_start']:.0f}-{summary['frame_end']:.0f}]",
+                    icon="ERROR"
+                    )
+            if len(summaries) > 10:
+                analysis_box.label(text=f"... {len(summaries) - 10} more (see exported report)")
+
         obj = bpy.context.object
-        if not obj or not obj.animation_data or not obj.animation_data.action:
+        if not obj or not obj.animation_data:
+            return None
+
+        if len(obj.animation_data.nla_tracks) > 0:
+            layout.operator("object.aef_apply_filter_on_nla")
+        if obj.type == 'ARMATURE' and obj.animation_data.action:
+            layout.operator("object.aef_apply_hierarchical_filter")
+            layout.operator("object.aef_apply_mirror_filter")
+
+        convert_row = layout.row(align=True)
+        convert_row.operator_menu_enum("object.aef_convert_rotation_mode", "target_mode", text="Convert Rotation Mode")
+        convert_row.operator("object.aef_apply_quaternion_filter")
+
+        if not obj.animation_data.action:
             return None
 
         preview = False
@@ -87,15 +500,30 @@ class AEF_PT_GraphCurveFilter(bpy.types.Panel):
             print("ssssssssssssssssssss")
             euler_group = aef_utils.create_euler_group_from_select()
             euler_group.print_all_keys()
-            euler_values = list(euler_group.euler_frames.values())
-            derniere = euler_values[-1]
-            avant_derniere = euler_values[-2]
+            derniere = euler_group.get_last_key()
+            avant_derniere = euler_group.get_previous_key(derniere.frame)
 
             new_euler = aef_utils.calculate_euler_filter(avant_derniere.get_euler(), derniere.get_euler())
             print(f"(FIXED {derniere.frame}) ->  X{new_euler.x}, Y{new_euler.y}, Z{new_euler.z}")
         
         new_filter_button = layout.operator("object.aef_apply_filter_left_right")
         new_filter_button = layout.operator("object.aef_apply_filter_right_left")
+        layout.operator_menu_enum("object.aef_retarget_euler_order", "target_order", text="Change Euler Order")
+        layout.operator("object.aef_bake_visual_rotation")
+        layout.operator("object.aef_reduce_keys")
+
+        session_box = layout.box()
+        session_box.label(text="Filter all selected keys (Left -> Right)")
+        session_row = session_box.row(align=True)
+        for method in aef_eulerfilter_utils.euler_methods:
+            session_row.operator("object.aef_session_apply_method", text=method).method = method
+
+        session = aef_filter_session.find_session(obj.animation_data.action)
+        if session is not None and session.current_method is not None:
+            session_box.label(text="Current try: " + session.current_method)
+            session_row = session_box.row(align=True)
+            session_row.operator("object.aef_session_revert")
+            session_row.operator("object.aef_session_validate")
 
         return None
 
@@ -103,6 +531,21 @@ classes = (
     AEF_PT_GraphCurveFilter,
     AEF_PT_GraphCurveFilter.AEF_OT_ApplyFilterLeftRight,
     AEF_PT_GraphCurveFilter.AEF_OT_ApplyFilterRightLeft,
+    AEF_PT_GraphCurveFilter.AEF_OT_SessionApplyMethod,
+    AEF_PT_GraphCurveFilter.AEF_OT_SessionRevert,
+    AEF_PT_GraphCurveFilter.AEF_OT_SessionValidate,
+    AEF_PT_GraphCurveFilter.AEF_OT_ApplyFilterOnNLA,
+    AEF_PT_GraphCurveFilter.AEF_OT_FilterLibraryActions,
+    AEF_PT_GraphCurveFilter.AEF_OT_StopLibraryFilter,
+    AEF_PT_GraphCurveFilter.AEF_OT_AnalyzeEulerBreaks,
+    AEF_PT_GraphCurveFilter.AEF_OT_ExportEulerBreaks,
+    AEF_PT_GraphCurveFilter.AEF_OT_ConvertRotationMode,
+    AEF_PT_GraphCurveFilter.AEF_OT_RetargetEulerOrder,
+    AEF_PT_GraphCurveFilter.AEF_OT_BakeVisualRotation,
+    AEF_PT_GraphCurveFilter.AEF_OT_ApplyQuaternionFilter,
+    AEF_PT_GraphCurveFilter.AEF_OT_ReduceKeys,
+    AEF_PT_GraphCurveFilter.AEF_OT_ApplyHierarchicalFilter,
+    AEF_PT_GraphCurveFilter.AEF_OT_ApplyMirrorFilter,
 )
 
 
@@ -118,3 +561,7 @@ def unregister():
 
     for cls in reversed(classes):
         unregister_class(cls)
+
+    aef_filter_session.clear_sessions()
+    aef_batch.stop_filter_job(restore=False)
+    aef_analysis.last_report = None
@@ -19,8 +19,14 @@
 
 import bpy
 import mathutils
+import numpy
+from typing import Dict, Iterator, List, Optional
+from . import bbpl
 from . import aef_types
 from . import aef_eulerfilter_utils
+from . import aef_rotation_utils
+from . import aef_filter_cache
+from . import aef_keyframe_reduce
 
 
 def create_euler_group_from_select() -> aef_types.EulerGroup:
@@ -30,25 +36,206 @@ def create_euler_group_from_select() -> aef_types.EulerGroup:
     euler_group = aef_types.EulerGroup(action)
     # Get euler data from selected curves
     for fcurve in action.fcurves:
-        for keyframe in fcurve.keyframe_points:
-            if keyframe.select_control_point:
-                euler_group.try_add_new_key(fcurve, keyframe)
+        euler_group.add_fcurve_keys(fcurve, only_selected=True)
 
+    euler_group.set_rotation_order(get_rotation_order_from_owner(obj, euler_group.selected_data_path))
+
+    # Axes without key on a frame use the evaluated curve value.
+    euler_group.fill_missing_channels()
     return euler_group
 
+def get_bone_name_from_data_path(data_path: str) -> str:
+    """
+    Returns the bone name of a pose bone data path (pose.bones["name"].rotation_euler), or an empty string.
+    """
+    start = data_path.find('["')
+    end = data_path.rfind('"]')
+    if data_path.startswith("pose.bones") and start > 0 and end > start:
+        return data_path[start+2:end]
+    return ""
+
+def get_rotation_order_from_owner(owner: bpy.types.ID, data_path: str) -> str:
+    """
+    Returns the euler order of the Object or PoseBone animated by the data path, XYZ when not found.
+    """
+    if owner is None or data_path is None:
+        return "XYZ"
+
+    owner_path = data_path.rpartition(".")[0]
+    try:
+        target = owner.path_resolve(owner_path) if owner_path else owner
+    except ValueError:
+        return "XYZ"
+
+    rotation_mode = getattr(target, "rotation_mode", "XYZ")
+    if rotation_mode in aef_rotation_utils.euler_orders:
+        return rotation_mode
+    return "XYZ"
+
 def apply_euler_filer_first_to_last(euler_group: aef_types.EulerGroup):
-    euler_values = list(euler_group.euler_frames.values())
-    first_key = euler_values[0]
-    last_key = euler_values[-1]
+    if euler_group.get_key_count() < 2:
+        return
+    first_key = euler_group.get_first_key()
+    last_key = euler_group.get_last_key()
 
     new_euler = aef_eulerfilter_utils.calculate_euler_filter(first_key.get_euler(), last_key.get_euler())
     euler_group.apply_euler_on_frame(last_key.frame, new_euler)
 
 def apply_euler_filer_last_to_first(euler_group: aef_types.EulerGroup):
-    euler_values = list(euler_group.euler_frames.values())
-    first_key = euler_values[0]
-    last_key = euler_values[-1]
+    if euler_group.get_key_count() < 2:
+        return
+    first_key = euler_group.get_first_key()
+    last_key = euler_group.get_last_key()
 
     new_euler = aef_eulerfilter_utils.calculate_euler_filter(last_key.get_euler(), first_key.get_euler())
     euler_group.apply_euler_on_frame(first_key.frame, new_euler)
 
+def apply_euler_filter_on_all_keys(euler_group: aef_types.EulerGroup, method: str = None, reverse: bool = False):
+    """
+    Filters every key of the group from the previous one (from the next one when reverse is True).
+    """
+    if euler_group.get_key_count() < 2:
+        return
+
+    eulers = euler_group.get_euler_array()
+    new_eulers = aef_eulerfilter_utils.calculate_euler_filter_array(eulers, euler_group.rotation_order, method, reverse)
+    euler_group.apply_euler_array(new_eulers)
+
+def get_action_euler_fcurves(action: bpy.types.Action) -> Dict[str, List[bpy.types.FCurve]]:
+    """
+    Returns the rotation_euler curves of the action by data path.
+    """
+    euler_fcurves: Dict[str, List[bpy.types.FCurve]] = {}
+    for fcurve in action.fcurves:
+        data_path = fcurve.data_path
+        if not data_path.endswith("rotation_euler") or fcurve.array_index > 2:
+            continue
+        euler_fcurves.setdefault(data_path, []).append(fcurve)
+    return euler_fcurves
+
+def iter_euler_groups_from_action(action: bpy.types.Action, owner: Optional[bpy.types.ID] = None, only_selected: bool = False) -> Iterator[aef_types.EulerGroup]:
+    """
+    Yields one EulerGroup per rotation_euler data path of the action, extracted only when requested.
+    The owner is used to get the euler order.
+    """
+    for data_path, fcurves in get_action_euler_fcurves(action).items():
+        euler_group = aef_types.EulerGroup(action)
+        for fcurve in fcurves:
+            euler_group.add_fcurve_keys(fcurve, only_selected=only_selected)
+        if euler_group.get_key_count() == 0:
+            continue
+        euler_group.set_rotation_order(get_rotation_order_from_owner(owner, data_path))
+        euler_group.fill_missing_channels()
+        yield euler_group
+
+def get_action_quaternion_fcurves(action: bpy.types.Action) -> Dict[str, List[bpy.types.FCurve]]:
+    """
+    Returns the rotation_quaternion curves of the action by data path.
+    """
+    quaternion_fcurves: Dict[str, List[bpy.types.FCurve]] = {}
+    for fcurve in action.fcurves:
+        data_path = fcurve.data_path
+        if not data_path.endswith("rotation_quaternion") or fcurve.array_index > 3:
+            continue
+        quaternion_fcurves.setdefault(data_path, []).append(fcurve)
+    return quaternion_fcurves
+
+def iter_quaternion_groups_from_action(action: bpy.types.Action, only_selected: bool = False) -> Iterator[aef_types.QuaternionGroup]:
+    """
+    Yields one QuaternionGroup per rotation_quaternion data path of the action.
+    """
+    for fcurves in get_action_quaternion_fcurves(action).values():
+        quaternion_group = aef_types.QuaternionGroup(action)
+        for fcurve in fcurves:
+            quaternion_group.add_fcurve_keys(fcurve, only_selected=only_selected)
+        if quaternion_group.get_key_count() == 0:
+            continue
+        quaternion_group.fill_missing_channels()
+        yield quaternion_group
+
+def apply_quaternion_filter_on_all_keys(quaternion_group: aef_types.QuaternionGroup, reverse: bool = False) -> bool:
+    """
+    Fixes the sign flips of the group. Returns True when keys were modified.
+    """
+    if quaternion_group.get_key_count() < 2:
+        return False
+
+    quats = quaternion_group.get_euler_array()
+    new_quats = aef_eulerfilter_utils.calculate_quaternion_filter_array(quats, reverse)
+    if numpy.array_equal(new_quats, quats):
+        return False
+
+    # The channels without key of the flipped frames are keyed by apply_euler_array().
+    quaternion_group.apply_euler_array(new_quats)
+    return True
+
+def apply_quaternion_filter_on_actions(actions: List[bpy.types.Action], reverse: bool = False) -> int:
+    """
+    Fixes the sign flips of all the quaternion curves of the actions. Returns the number of fixed groups.
+    """
+    fixed_count = 0
+    for action in {action.as_pointer(): action for action in actions}.values():
+        for quaternion_group in iter_quaternion_groups_from_action(action):
+            if apply_quaternion_filter_on_all_keys(quaternion_group, reverse):
+                fixed_count += 1
+    return fixed_count
+
+def create_euler_groups_from_action(action: bpy.types.Action, owner: Optional[bpy.types.ID] = None, only_selected: bool = False) -> List[aef_types.EulerGroup]:
+    """
+    Returns one EulerGroup per rotation_euler data path of the action.
+    """
+    return list(iter_euler_groups_from_action(action, owner, only_selected))
+
+def euler_group_needs_filter(euler_group: aef_types.EulerGroup, filter_cache: Optional[aef_filter_cache.ActionFilterCache], method: str = None, reverse: bool = False) -> bool:
+    """
+    False when the curves did not change since the last filter with the same method,
+    or, with the UNWRAP method, when they have no jump above pi.
+    (The QUAD methods also canonicalize continuous curves)
+    """
+    if filter_cache is not None and filter_cache.is_up_to_date(euler_group, method, reverse):
+        return False
+    if (method if method is not None else aef_eulerfilter_utils.euler_method) != "UNWRAP":
+        return True
+    return not aef_filter_cache.is_euler_group_continuous(euler_group)
+
+def apply_euler_filter_on_actions(
+    actions: List[bpy.types.Action],
+    owner: Optional[bpy.types.ID] = None,
+    method: str = None,
+    reverse: bool = False,
+    use_cache: bool = False,
+    reduce_tolerance: Optional[float] = None
+) -> int:
+    """
+    Filters all the euler curves of the actions.
+    Each action is extracted and filtered only once, even if listed multiple times.
+    With use_cache, curves unchanged since the last filter, or already continuous with UNWRAP, are skipped.
+    With reduce_tolerance, the keys of the filtered curves are reduced after the filter.
+    Returns the number of filtered actions.
+    """
+    filtered_actions = set()
+    for action in actions:
+        if action is None or action.as_pointer() in filtered_actions:
+            continue
+        filtered_actions.add(action.as_pointer())
+
+        filter_cache = aef_filter_cache.ActionFilterCache(action) if use_cache else None
+        for euler_group in iter_euler_groups_from_action(action, owner):
+            modified = filter_cache is None or euler_group_needs_filter(euler_group, filter_cache, method, reverse)
+            if modified:
+                apply_euler_filter_on_all_keys(euler_group, method, reverse)
+                if reduce_tolerance is not None:
+                    aef_keyframe_reduce.reduce_euler_group_keys(euler_group, reduce_tolerance)
+            if filter_cache is not None:
+                filter_cache.mark_filtered(euler_group, method, reverse, modified)
+        if filter_cache is not None:
+            filter_cache.save()
+    return len(filtered_actions)
+
+def apply_euler_filter_on_object_nla(obj: bpy.types.Object, method: str = None, reverse: bool = False, include_active: bool = True, reduce_tolerance: Optional[float] = None) -> int:
+    """
+    Filters the active action and every action used by the NLA tracks of the object.
+    Actions shared by multiple strips are filtered only once.
+    """
+    actions = bbpl.anim_utils.get_animation_data_actions(obj.animation_data, include_active=include_active, include_nla=True)
+    return apply_euler_filter_on_actions(actions, obj, method, reverse, reduce_tolerance=reduce_tolerance)
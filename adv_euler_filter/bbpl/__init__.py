@@ -33,6 +33,8 @@ from . import blender_addon
 from . import save_data
 from . import blender_extension
 from . import basics
+from . import armature_index
+from . import object_index
 from . import utils
 from . import rig_bone_visual
 from . import skin_utils
@@ -56,6 +58,10 @@ if "save_data" in locals():
     importlib.reload(save_data)
 if "basics" in locals():
     importlib.reload(basics)
+if "armature_index" in locals():
+    importlib.reload(armature_index)
+if "object_index" in locals():
+    importlib.reload(object_index)
 if "utils" in locals():
     importlib.reload(utils)
 if "rig_bone_visual" in locals():
@@ -83,12 +89,16 @@ def register():
     backward_compatibility.register()
     blender_rig.register()
     blender_addon.register()
+    armature_index.register()
+    object_index.register()
 
 
 def unregister():
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)  # type: ignore
 
+    object_index.unregister()
+    armature_index.unregister()
     blender_addon.unregister()
     blender_rig.unregister()
     backward_compatibility.unregister()
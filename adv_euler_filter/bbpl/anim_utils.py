@@ -24,8 +24,10 @@
 
 import bpy
 import mathutils
-from typing import List, Optional, Union
+import numpy
+from typing import Any, Dict, List, Optional, Tuple, Union
 from . import scene_utils
+from .save_data import scope_save
 
 
 class NLA_Save:
@@ -76,6 +78,42 @@ class NLA_Save:
             new_nla_track = target.animation_data.nla_tracks.new()
             nla_track.paste_data_on(new_nla_track)
 
+def get_nla_strips_recursive(strips: bpy.types.NlaStrips) -> List[bpy.types.NlaStrip]:
+    """
+    Returns the strips and the strips inside meta strips.
+    """
+    all_strips: List[bpy.types.NlaStrip] = []
+    for strip in strips:
+        all_strips.append(strip)
+        if strip.type == 'META':
+            all_strips.extend(get_nla_strips_recursive(strip.strips))
+    return all_strips
+
+def get_animation_data_actions(animation_data: bpy.types.AnimData, include_active: bool = True, include_nla: bool = True) -> List[bpy.types.Action]:
+    """
+    Returns the actions used by the animation data (active action and NLA strips).
+    Each action is listed only one time even if used by multiple strips.
+    """
+    actions: List[bpy.types.Action] = []
+    if animation_data is None:
+        return actions
+
+    found_actions = set()
+
+    def add_action(action: Optional[bpy.types.Action]):
+        if action is not None and action.as_pointer() not in found_actions:
+            found_actions.add(action.as_pointer())
+            actions.append(action)
+
+    if include_active:
+        add_action(animation_data.action)
+
+    if include_nla:
+        for nla_track in animation_data.nla_tracks:
+            for strip in get_nla_strips_recursive(nla_track.strips):
+                add_action(strip.action)
+    return actions
+
 class ProxyCopy_NLATrack:
     """
     Proxy class for copying bpy.types.NlaTrack.
@@ -237,25 +275,18 @@ class ProxyCopy_StripFCurve():
 
     def __init__(self, fcurve: bpy.types.FCurve):
         self.data_path = fcurve.data_path
-        self.keyframe_points: List[ProxyCopy_Keyframe] = []
-        for keyframe_point in fcurve.keyframe_points:
-            self.keyframe_points.append(ProxyCopy_Keyframe(keyframe_point))
+        self.keyframes = PackedKeyframes(fcurve.keyframe_points)
 
     def print_stored_keys(self):
-        for key in self.keyframe_points:
-            key.print_stored_key()
+        self.keyframes.print_stored_keys()
 
 
     def paste_data_on(self, strips: bpy.types.NlaStrip, override=False):
         #Found the corrected curve
         for fcurve in strips.fcurves:
             if self.data_path == "influence" and fcurve.data_path == "influence":
-                if override == True:
-                    fcurve.keyframe_points.clear()
                 # Create the curve with use_animated_influence
-                for key in self.keyframe_points:
-                    new_key = fcurve.keyframe_points.insert(frame=key.co[0], value=key.co[1], keyframe_type=key.type)
-                    key.paste_data_on(new_key)
+                self.keyframes.paste_data_on(fcurve, clear=override)
 
 
 class ProxyCopy_FCurve():
@@ -267,15 +298,114 @@ class ProxyCopy_FCurve():
 
     def __init__(self, fcurve: bpy.types.FCurve):
         self.data_path = fcurve.data_path
-        self.keyframe_points: List[ProxyCopy_Keyframe] = []
-        for keyframe_point in fcurve.keyframe_points:
-            self.keyframe_points.append(ProxyCopy_Keyframe(keyframe_point))
+        self.keyframes = PackedKeyframes(fcurve.keyframe_points)
 
-    def paste_data_on(self, fcurve: bpy.types.FCurve):
+    def paste_data_on(self, fcurve: bpy.types.FCurve, clear: bool = False):
         fcurve.data_path = self.data_path
-        for key in self.keyframe_points:
-            new_key = fcurve.keyframe_points.insert(frame=key.co[0], value=key.co[1], keyframe_type=key.type)
-            key.paste_data_on(new_key)
+        self.keyframes.paste_data_on(fcurve, clear=clear)
+
+
+class PackedKeyframes():
+    """
+    Packed copy of all the keyframe points of a FCurve.
+
+    Keys are stored in NumPy arrays read with foreach_get
+    and written back with keyframe_points.add() and foreach_set.
+    """
+
+    # Property name, numpy type, values per key.
+    packed_props = (
+        ("co", numpy.float32, 2),
+        ("handle_left", numpy.float32, 2),
+        ("handle_right", numpy.float32, 2),
+        ("handle_left_type", numpy.int32, 1),
+        ("handle_right_type", numpy.int32, 1),
+        ("interpolation", numpy.int32, 1),
+        ("easing", numpy.int32, 1),
+        ("type", numpy.int32, 1),
+        ("amplitude", numpy.float32, 1),
+        ("back", numpy.float32, 1),
+        ("period", numpy.float32, 1),
+        ("select_control_point", bool, 1),
+        ("select_left_handle", bool, 1),
+        ("select_right_handle", bool, 1),
+    )
+
+    def __init__(self, keyframe_points: Optional[bpy.types.FCurveKeyframePoints] = None):
+        self.key_count = 0
+        self.arrays: Dict[str, numpy.ndarray] = {}
+        if keyframe_points is not None:
+            self.save_keyframes(keyframe_points)
+
+    def save_keyframes(self, keyframe_points: bpy.types.FCurveKeyframePoints):
+        self.key_count = len(keyframe_points)
+        self.arrays = read_keyframe_arrays(keyframe_points, self.key_count)
+
+    def get_co(self) -> numpy.ndarray:
+        """
+        Returns the (frame, value) array of the keys with shape (key_count, 2).
+        """
+        return self.arrays["co"].reshape(self.key_count, 2)
+
+    def copy_keys(self, key_mask: numpy.ndarray) -> "PackedKeyframes":
+        """
+        Returns a PackedKeyframes with only the keys where key_mask is True.
+        """
+        packed_keyframes = PackedKeyframes()
+        packed_keyframes.key_count = int(numpy.count_nonzero(key_mask))
+        for prop_name, _, prop_size in self.packed_props:
+            packed_keyframes.arrays[prop_name] = self.arrays[prop_name].reshape(self.key_count, prop_size)[key_mask].ravel()
+        return packed_keyframes
+
+    def print_stored_keys(self):
+        cos = self.get_co()
+        for index in range(self.key_count):
+            print(cos[index], self.arrays["type"][index], self.arrays["interpolation"][index])
+
+    def paste_data_on(self, fcurve: bpy.types.FCurve, clear: bool = False):
+        """
+        Pastes the saved keys on the fcurve.
+        When clear is False the keys are added to the existing keys of the curve.
+        """
+        keyframe_points = fcurve.keyframe_points
+        if clear and len(keyframe_points) == self.key_count:
+            # Same key count, restore the values in place.
+            for prop_name, _, _ in self.packed_props:
+                keyframe_points.foreach_set(prop_name, self.arrays[prop_name])
+            fcurve.update()
+            return
+
+        current_count = 0 if clear else len(keyframe_points)
+        if current_count == 0:
+            new_arrays = self.arrays
+        else:
+            # foreach_set writes the whole collection, so the current keys are merged first.
+            # Current keys on a pasted frame are replaced like keyframe_points.insert() does.
+            current_arrays = read_keyframe_arrays(keyframe_points, current_count)
+            current_frames = current_arrays["co"].reshape(current_count, 2)[:, 0]
+            kept = ~numpy.isin(current_frames, self.get_co()[:, 0])
+            new_arrays = {}
+            for prop_name, _, prop_size in self.packed_props:
+                kept_values = current_arrays[prop_name].reshape(current_count, prop_size)[kept].ravel()
+                new_arrays[prop_name] = numpy.concatenate((kept_values, self.arrays[prop_name]))
+
+        keyframe_points.clear()
+        keyframe_points.add(len(new_arrays["co"]) // 2)
+        for prop_name, _, _ in self.packed_props:
+            keyframe_points.foreach_set(prop_name, new_arrays[prop_name])
+        fcurve.update()
+
+
+def read_keyframe_arrays(keyframe_points: bpy.types.FCurveKeyframePoints, key_count: int) -> Dict[str, numpy.ndarray]:
+    """
+    Reads all the packed properties of the keyframe points with foreach_get.
+    """
+    arrays: Dict[str, numpy.ndarray] = {}
+    for prop_name, prop_type, prop_size in PackedKeyframes.packed_props:
+        values = numpy.empty(key_count * prop_size, dtype=prop_type)
+        keyframe_points.foreach_get(prop_name, values)
+        arrays[prop_name] = values
+    return arrays
 
 
 class ProxyCopy_Keyframe():
@@ -316,6 +446,51 @@ class ProxyCopy_Keyframe():
 
 
 
+# Copyable attribute names per RNA type, priority vars and ignore list.
+copyable_attributes_cache: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], List[str]] = {}
+
+def is_copyable_attribute_name(key: str) -> bool:
+    return not key.startswith("_") \
+        and not key.startswith("error_") \
+        and key != "rna_type" \
+        and key != "bl_rna"
+
+def order_copyable_attributes(keys: List[str], priority_vars: List[str], ignore_list: List[str]) -> List[str]:
+    """
+    Returns the keys to copy, priority vars first, without the ignored keys.
+    """
+    attributes: List[str] = []
+    for priority_var in priority_vars:
+        if priority_var not in ignore_list:
+            if priority_var in keys:
+                attributes.append(priority_var)
+
+    for key in keys:
+        if key not in ignore_list and key not in attributes:
+            if is_copyable_attribute_name(key):
+                attributes.append(key)
+    return attributes
+
+def get_copyable_attributes(a, priority_vars: List[str] = [], ignore_list: List[str] = []) -> List[str]:
+    """
+    Returns the ordered list of the attributes to copy from a.
+    For RNA structs the list is built once per RNA type from bl_rna.properties (read only properties excluded)
+    and reused for all the next copies.
+    """
+    bl_rna = getattr(a, "bl_rna", None)
+    if bl_rna is None:
+        # Not a RNA struct, use reflection.
+        keys = [key for key in dir(a) if not callable(getattr(a, key))]
+        return order_copyable_attributes(keys, priority_vars, ignore_list)
+
+    cache_key = (bl_rna.identifier, tuple(priority_vars), tuple(ignore_list))
+    attributes = copyable_attributes_cache.get(cache_key)
+    if attributes is None:
+        keys = [prop.identifier for prop in bl_rna.properties if not prop.is_readonly]
+        attributes = order_copyable_attributes(keys, priority_vars, ignore_list)
+        copyable_attributes_cache[cache_key] = attributes
+    return attributes
+
 def copy_attributes(a, b, priority_vars = [], ignore_list = [], print_fails = True):
     def copyattr(source, target, attr_name):
         try:
@@ -324,22 +499,9 @@ def copy_attributes(a, b, priority_vars = [], ignore_list = [], print_fails = Tr
             if print_fails:
                 print(f"Error copying attribute '{attr_name}' from {str(source)} to from {str(target)}")
                 print(f": {e}")
-    
-    # Filter only attributes (not functions)
-    keys = [key for key in dir(a) if not callable(getattr(a, key))]
-
-    for priority_var in priority_vars:
-        if priority_var not in ignore_list:
-            if priority_var in keys:
-                copyattr(a, b, priority_var)
 
-    for key in keys:
-        if key not in ignore_list:
-            if not key.startswith("_") \
-            and not key.startswith("error_") \
-            and key != "rna_type" \
-            and key != "bl_rna":
-                copyattr(a, b, key)
+    for key in get_copyable_attributes(a, priority_vars, ignore_list):
+        copyattr(a, b, key)
 
 def copy_fcurve_attr(a :bpy.types.FCurve, b :bpy.types.FCurve, print_fails = True):
     if not isinstance(a, bpy.types.FCurve) or not isinstance(b, bpy.types.FCurve):
@@ -462,7 +624,7 @@ def copy_drivers(src: bpy.types.Object, dst: bpy.types.Object):
 
                 # Copy keyframes
                 copy_fcurve = ProxyCopy_FCurve(d1)
-                copy_fcurve.paste_data_on(d2)
+                copy_fcurve.paste_data_on(d2, clear=True)
 
 
 class AnimationManagment():
@@ -568,6 +730,31 @@ def reset_armature_pose(obj: bpy.types.Object):
         b.location = mathutils.Vector((0, 0, 0))
 
 
+def get_constraint_copyable_attributes(constraint: bpy.types.Constraint) -> List[str]:
+    # Targets need to be set before the sub targets.
+    priority_vars = [
+        "target",
+        "subtarget",
+        "pole_target",
+        "pole_subtarget",
+    ]
+    ignore_list = [
+        "active",
+        "type",
+    ]
+    return get_copyable_attributes(constraint, priority_vars, ignore_list)
+
+def get_snapshot_value(value: Any) -> Any:
+    """
+    Returns a value that stay valid when the source struct is removed.
+    """
+    if isinstance(value, (mathutils.Vector, mathutils.Matrix, mathutils.Euler, mathutils.Quaternion, mathutils.Color)):
+        return value.copy()
+    if isinstance(value, bpy.types.bpy_prop_array):
+        return value[:]
+    return value
+
+
 class ProxyCopy_Constraint:
     """
     Proxy class for copying Blender PoseBoneConstraints.
@@ -585,6 +772,7 @@ class ProxyCopy_Constraint:
         Returns:
             None
         """
+        self.attributes: Dict[str, Any] = {}
         if constraint:
             self.type = constraint.type
             self.name = constraint.name
@@ -594,11 +782,14 @@ class ProxyCopy_Constraint:
             self.mute = constraint.mute
             self.target_space = constraint.target_space
             self.owner_space = constraint.owner_space
-            # Add more constraint parameters here as needed
 
             if self.type == 'CHILD_OF':
                 self.inverse_matrix = constraint.inverse_matrix.copy() 
 
+            # All the other constraint parameters, the list is cached per constraint type.
+            for attr_name in get_constraint_copyable_attributes(constraint):
+                self.attributes[attr_name] = get_snapshot_value(getattr(constraint, attr_name))
+
 
     def paste_data_on(self, target_constraint):
         """
@@ -611,15 +802,12 @@ class ProxyCopy_Constraint:
             None
         """
         if target_constraint:
-            #target_constraint.type = self.type
-            target_constraint.name = self.name
-            target_constraint.target = self.target
-            target_constraint.subtarget = self.subtarget
-            target_constraint.influence = self.influence
-            target_constraint.mute = self.mute
-            target_constraint.target_space = self.target_space
-            target_constraint.owner_space = self.owner_space
-            # Copy more constraint parameters here as needed
+            for attr_name, value in self.attributes.items():
+                try:
+                    setattr(target_constraint, attr_name, value)
+                except (AttributeError, TypeError, ValueError):
+                    # Some values are read only depending other values (Ex: subtarget without armature target).
+                    pass
 
             if self.type == 'CHILD_OF':
                 target_constraint.inverse_matrix = self.inverse_matrix 
@@ -725,3 +913,113 @@ class RigConstraintManagment():
         """
         for bone_name, constraints in self.saved_bones_constraints.items():
             constraints.set_bone_constraints_data(armature, bone_name, replace)
+
+
+class VisualPoseCache():
+    """
+    Visual pose matrices of armature bones on a list of frames.
+
+    The scene is stepped once per frame and all the bones matrices are read
+    with one pose.bones.foreach_get("matrix") into a preallocated (frames, bones, 4, 4) array.
+    Matrices use the Blender memory layout (matrix[column][row]), in armature space.
+    """
+
+    def __init__(self, armature: bpy.types.Object, bone_names: Optional[List[str]] = None):
+        self.armature = armature
+        pose_bones = armature.pose.bones
+        pose_bone_indices = {pose_bone.name: index for index, pose_bone in enumerate(pose_bones)}
+        if bone_names is None:
+            bone_names = list(pose_bone_indices.keys())
+
+        # Parents are captured too, they are needed to get the local matrices.
+        self.bone_names: List[str] = []
+        for bone_name in bone_names:
+            pose_bone = pose_bones.get(bone_name)
+            if pose_bone is None:
+                continue
+            if pose_bone.parent is not None and pose_bone.parent.name not in bone_names and pose_bone.parent.name not in self.bone_names:
+                self.bone_names.append(pose_bone.parent.name)
+            if bone_name not in self.bone_names:
+                self.bone_names.append(bone_name)
+
+        self.bone_indices: Dict[str, int] = {bone_name: index for index, bone_name in enumerate(self.bone_names)}
+        self.pose_indices = numpy.array([pose_bone_indices[bone_name] for bone_name in self.bone_names], dtype=numpy.int64)
+        self.parent_indices = numpy.array([
+            self.bone_indices.get(pose_bones[bone_name].parent.name, -1) if pose_bones[bone_name].parent else -1
+            for bone_name in self.bone_names
+        ], dtype=numpy.int64)
+
+        self.frames = numpy.empty(0, dtype=numpy.float64)
+        self.matrices = numpy.empty((0, len(self.bone_names), 4, 4), dtype=numpy.float32)
+        # Local matrices of the bones with a non default parent inheritance, by cache index.
+        self.local_overrides: Dict[int, numpy.ndarray] = {}
+
+    def get_custom_inheritance_indices(self) -> List[int]:
+        bones = self.armature.data.bones
+        indices = []
+        for index, bone_name in enumerate(self.bone_names):
+            bone = bones[bone_name]
+            if bone.parent is not None and (not bone.use_inherit_rotation or bone.inherit_scale != 'FULL'):
+                indices.append(index)
+        return indices
+
+    def capture(self, scene: bpy.types.Scene, frames: List[float]):
+        """
+        Steps the scene on each frame and captures the bones matrices.
+        The frame is saved and restored with a ScopedSceneSave limited to the armature.
+        """
+        pose_bones = self.armature.pose.bones
+        buffer = numpy.empty(len(pose_bones) * 16, dtype=numpy.float32)
+        self.frames = numpy.asarray(frames, dtype=numpy.float64)
+        self.matrices = numpy.empty((len(frames), len(self.bone_names), 4, 4), dtype=numpy.float32)
+        custom_indices = self.get_custom_inheritance_indices()
+        self.local_overrides = {index: numpy.empty((len(frames), 4, 4), dtype=numpy.float32) for index in custom_indices}
+
+        with scope_save.ScopedSceneSave(objects=[self.armature]):
+            for frame_index, frame in enumerate(self.frames.tolist()):
+                scene.frame_set(int(frame // 1), subframe=frame % 1)
+                pose_bones.foreach_get("matrix", buffer)
+                self.matrices[frame_index] = buffer.reshape(-1, 4, 4)[self.pose_indices]
+                for index in custom_indices:
+                    pose_bone = pose_bones[self.bone_names[index]]
+                    local_matrix = self.armature.convert_space(pose_bone=pose_bone, matrix=pose_bone.matrix, from_space='POSE', to_space='LOCAL')
+                    self.local_overrides[index][frame_index] = numpy.array(local_matrix, dtype=numpy.float32).T
+
+    def get_bone_matrices(self, bone_name: str) -> Optional[numpy.ndarray]:
+        """
+        Returns the captured matrices of the bone with shape (frames, 4, 4).
+        """
+        index = self.bone_indices.get(bone_name)
+        if index is None:
+            return None
+        return self.matrices[:, index]
+
+    def get_world_matrices(self) -> numpy.ndarray:
+        """
+        Returns the captured matrices in world space, using the current armature matrix_world.
+        """
+        world_matrix = numpy.array(self.armature.matrix_world, dtype=numpy.float64).T
+        return (self.matrices.astype(numpy.float64) @ world_matrix).astype(numpy.float32)
+
+    def get_local_matrices(self) -> numpy.ndarray:
+        """
+        Returns the matrix_basis of the bones on each captured frame with shape (frames, bones, 4, 4).
+        """
+        bones = self.armature.data.bones
+        # Transposed to work with the math layout (matrix[row][column]).
+        rest = numpy.array([numpy.array(bones[bone_name].matrix_local).reshape(4, 4) for bone_name in self.bone_names], dtype=numpy.float64)
+        pose = self.matrices.astype(numpy.float64).transpose(0, 1, 3, 2)
+
+        has_parent = self.parent_indices >= 0
+        parent_indices = numpy.where(has_parent, self.parent_indices, 0)
+        rest_relative = rest.copy()
+        rest_relative[has_parent] = numpy.linalg.inv(rest[parent_indices[has_parent]]) @ rest[has_parent]
+
+        parent_pose = pose[:, parent_indices]
+        parent_pose[:, ~has_parent] = numpy.eye(4)
+        local = numpy.linalg.inv(rest_relative)[None] @ numpy.linalg.inv(parent_pose) @ pose
+        local = local.transpose(0, 1, 3, 2).astype(numpy.float32)
+
+        for index, local_matrices in self.local_overrides.items():
+            local[:, index] = local_matrices
+        return local
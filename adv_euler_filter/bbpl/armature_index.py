@@ -0,0 +1,355 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+# ----------------------------------------------
+#  BBPL -> BleuRaven Blender Python Library
+#  BleuRaven.fr
+#  XavierLoux.com
+# ----------------------------------------------
+
+import bpy
+import bisect
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+class BoneNameIndex():
+    """
+    Sorted views of the bone names for pattern queries.
+
+    - sorted_names / sorted_name_indices: names sorted with their bone index, for prefix range queries.
+    - sorted_reversed_names / sorted_reversed_name_indices: same with reversed names, for suffix range queries.
+    Results are returned in the bones order.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.sorted_names: List[str] = sorted(names)
+        name_to_index = {name: index for index, name in enumerate(names)}
+        self.sorted_name_indices: List[int] = [name_to_index[name] for name in self.sorted_names]
+        self.sorted_reversed_names: List[str] = sorted(name[::-1] for name in names)
+        self.sorted_reversed_name_indices: List[int] = [name_to_index[name[::-1]] for name in self.sorted_reversed_names]
+
+    def get_prefix_indices(self, sorted_values: List[str], sorted_indices: List[int], prefix: str) -> List[int]:
+        indices = []
+        position = bisect.bisect_left(sorted_values, prefix)
+        while position < len(sorted_values) and sorted_values[position].startswith(prefix):
+            indices.append(sorted_indices[position])
+            position += 1
+        return sorted(indices)
+
+    def get_starts_with_indices(self, prefix: str) -> List[int]:
+        """
+        O(log n + matches)
+        """
+        return self.get_prefix_indices(self.sorted_names, self.sorted_name_indices, prefix)
+
+    def get_ends_with_indices(self, suffix: str) -> List[int]:
+        """
+        O(log n + matches)
+        """
+        return self.get_prefix_indices(self.sorted_reversed_names, self.sorted_reversed_name_indices, suffix[::-1])
+
+    def get_contains_indices(self, substring: str) -> List[int]:
+        return [index for index, name in enumerate(self.names) if substring in name]
+
+    def get_names_starting_with(self, prefix: str) -> List[str]:
+        return [self.names[index] for index in self.get_starts_with_indices(prefix)]
+
+    def get_names_ending_with(self, suffix: str) -> List[str]:
+        return [self.names[index] for index in self.get_ends_with_indices(suffix)]
+
+    def get_names_containing(self, substring: str) -> List[str]:
+        return [name for name in self.names if substring in name]
+
+    def get_contains_batch(self, substrings: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns the names containing each substring, in one pass on the names.
+        A compiled pattern of all the substrings skips the names matching none of them.
+        """
+        results: Dict[str, List[str]] = {substring: [] for substring in substrings if substring}
+        if not results:
+            return results
+        any_pattern = re.compile("|".join(re.escape(substring) for substring in results))
+        for name in self.names:
+            if any_pattern.search(name) is None:
+                continue
+            for substring, names in results.items():
+                if substring in name:
+                    names.append(name)
+        return results
+
+
+class ArmatureIndex():
+    """
+    Flat index of the bone hierarchy of an armature, built once in O(bones).
+
+    - parents: parent index of each bone (-1 for roots).
+    - child_offsets / child_indices: children of bone i are child_indices[child_offsets[i]:child_offsets[i+1]],
+      in the same order as bone.children.
+    - preorder / tin / tout: Euler tour, the subtree of bone i is preorder[tin[i]:tout[i]].
+    """
+
+    def __init__(self, bones):
+        self.names: List[str] = [bone.name for bone in bones]
+        self.name_to_index: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        self.parents: List[int] = [
+            self.name_to_index[bone.parent.name] if bone.parent is not None else -1
+            for bone in bones
+        ]
+        bone_count = len(self.names)
+
+        # Children as offsets in one flat list. (Stable, so the children keep the bones order)
+        child_counts = [0] * (bone_count + 1)
+        for parent in self.parents:
+            if parent != -1:
+                child_counts[parent + 1] += 1
+        self.child_offsets: List[int] = [0] * (bone_count + 1)
+        for index in range(bone_count):
+            self.child_offsets[index + 1] = self.child_offsets[index] + child_counts[index + 1]
+        self.child_indices: List[int] = [0] * self.child_offsets[bone_count]
+        fill_positions = self.child_offsets[:-1]
+        for index, parent in enumerate(self.parents):
+            if parent != -1:
+                self.child_indices[fill_positions[parent]] = index
+                fill_positions[parent] += 1
+
+        # Euler tour with an iterative depth first search.
+        self.preorder: List[int] = []
+        self.tin: List[int] = [0] * bone_count
+        self.tout: List[int] = [0] * bone_count
+        self.depths: List[int] = [0] * bone_count
+        roots = [index for index, parent in enumerate(self.parents) if parent == -1]
+        for root in roots:
+            stack: List[Tuple[int, bool]] = [(root, False)]
+            while stack:
+                index, is_exit = stack.pop()
+                if is_exit:
+                    self.tout[index] = len(self.preorder)
+                    continue
+                self.tin[index] = len(self.preorder)
+                self.preorder.append(index)
+                stack.append((index, True))
+                for child in reversed(self.get_children_indices(index)):
+                    self.depths[child] = self.depths[index] + 1
+                    stack.append((child, False))
+
+        # Built on the first name query.
+        self.name_index: Optional[BoneNameIndex] = None
+
+    def get_name_index(self) -> BoneNameIndex:
+        if self.name_index is None:
+            self.name_index = BoneNameIndex(self.names)
+        return self.name_index
+
+    def get_names_starting_with(self, prefix: str) -> List[str]:
+        return self.get_name_index().get_names_starting_with(prefix)
+
+    def get_names_ending_with(self, suffix: str) -> List[str]:
+        return self.get_name_index().get_names_ending_with(suffix)
+
+    def get_names_containing(self, substring: str) -> List[str]:
+        return self.get_name_index().get_names_containing(substring)
+
+    def get_index(self, bone_name: str) -> Optional[int]:
+        return self.name_to_index.get(bone_name)
+
+    def get_children_indices(self, index: int) -> List[int]:
+        return self.child_indices[self.child_offsets[index]:self.child_offsets[index + 1]]
+
+    def get_children(self, bone_name: str) -> List[str]:
+        return [self.names[child] for child in self.get_children_indices(self.name_to_index[bone_name])]
+
+    def get_parent(self, bone_name: str) -> Optional[str]:
+        parent = self.parents[self.name_to_index[bone_name]]
+        return self.names[parent] if parent != -1 else None
+
+    def is_ancestor(self, ancestor_name: str, bone_name: str) -> bool:
+        """
+        O(1). A bone is its own ancestor.
+        """
+        ancestor = self.name_to_index[ancestor_name]
+        index = self.name_to_index[bone_name]
+        return self.tin[ancestor] <= self.tin[index] < self.tout[ancestor]
+
+    def get_ancestors(self, bone_name: str) -> List[str]:
+        """
+        Returns the parents of the bone, closest first. O(depth)
+        """
+        ancestors = []
+        parent = self.parents[self.name_to_index[bone_name]]
+        while parent != -1:
+            ancestors.append(self.names[parent])
+            parent = self.parents[parent]
+        return ancestors
+
+    def get_subtree(self, bone_name: str) -> List[str]:
+        """
+        Returns the bone and all its descendants in depth first order. O(subtree)
+        """
+        index = self.name_to_index[bone_name]
+        return [self.names[child] for child in self.preorder[self.tin[index]:self.tout[index]]]
+
+    def get_path(self, start_bone_name: str, end_bone_name: str) -> Optional[List[str]]:
+        """
+        Returns the bone names from the start bone down to the end bone, or None when
+        the end bone is not a descendant of the start bone. O(depth)
+        """
+        if not self.is_ancestor(start_bone_name, end_bone_name):
+            return None
+        start = self.name_to_index[start_bone_name]
+        index = self.name_to_index[end_bone_name]
+        path = [index]
+        while index != start:
+            index = self.parents[index]
+            path.append(index)
+        return [self.names[index] for index in reversed(path)]
+
+    def get_path_to_end(self, start_bone_name: str) -> List[str]:
+        """
+        Returns the bone names from the start bone to the end of the chain, following the first child. O(depth)
+        """
+        index = self.name_to_index[start_bone_name]
+        path = [self.names[index]]
+        while self.child_offsets[index] != self.child_offsets[index + 1]:
+            index = self.child_indices[self.child_offsets[index]]
+            path.append(self.names[index])
+        return path
+
+
+# Built indexes by armature data. (Armature.as_pointer() -> (signature, index))
+armature_indexes: Dict[int, Tuple[tuple, ArmatureIndex]] = {}
+
+
+def get_armature_bones(armature: bpy.types.Object):
+    if armature.mode == 'EDIT':
+        return armature.data.edit_bones
+    return armature.data.bones
+
+
+def get_armature_signature(armature: bpy.types.Object) -> tuple:
+    """
+    Cheap check of the cached index: (is edit mode, bone count). O(1)
+    Renamed or reparented bones are handled by the invalidation events
+    (mode change, armature data update, clear_armature_index()).
+    """
+    return (armature.mode == 'EDIT', len(get_armature_bones(armature)))
+
+
+def get_armature_index(armature: bpy.types.Object) -> ArmatureIndex:
+    """
+    Returns the index of the armature bones, built on first use and kept until
+    the armature data is updated, the mode changes or clear_armature_index() is called.
+    Callers that change the bones in a script without depsgraph update should call clear_armature_index().
+    """
+    key = armature.data.as_pointer()
+    signature = get_armature_signature(armature)
+    cached = armature_indexes.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    armature_index = ArmatureIndex(get_armature_bones(armature))
+    armature_indexes[key] = (signature, armature_index)
+    return armature_index
+
+
+# Built name indexes by armature data. (Armature.as_pointer() -> (signature, index))
+bone_name_indexes: Dict[int, Tuple[tuple, BoneNameIndex]] = {}
+
+
+def get_bone_name_index(armature: bpy.types.Object) -> BoneNameIndex:
+    """
+    Returns the name index of the armature bones, for name queries only.
+    Checked and invalidated like get_armature_index(), renamed bones rebuild the index.
+    """
+    key = armature.data.as_pointer()
+    signature = get_armature_signature(armature)
+    cached = bone_name_indexes.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    name_index = BoneNameIndex(get_armature_bones(armature).keys())
+    bone_name_indexes[key] = (signature, name_index)
+    return name_index
+
+
+def clear_armature_index(armature: Optional[bpy.types.Object] = None):
+    """
+    Clears the index of the armature, or all the indexes when armature is None.
+    """
+    if armature is None:
+        armature_indexes.clear()
+        bone_name_indexes.clear()
+    else:
+        armature_indexes.pop(armature.data.as_pointer(), None)
+        bone_name_indexes.pop(armature.data.as_pointer(), None)
+
+
+# Owner of the mode change subscription.
+msgbus_owner = object()
+
+
+def on_object_mode_change():
+    armature_indexes.clear()
+    bone_name_indexes.clear()
+
+
+def subscribe_mode_change():
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Object, "mode"),
+        owner=msgbus_owner,
+        args=(),
+        notify=on_object_mode_change,
+    )
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update_post(scene, depsgraph):
+    if not armature_indexes and not bone_name_indexes:
+        return
+    if not depsgraph.id_type_updated('ARMATURE'):
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Armature):
+            key = update.id.original.as_pointer()
+            armature_indexes.pop(key, None)
+            bone_name_indexes.pop(key, None)
+
+
+@bpy.app.handlers.persistent
+def on_load_post(dummy):
+    # Subscriptions are removed when a file is loaded.
+    armature_indexes.clear()
+    bone_name_indexes.clear()
+    subscribe_mode_change()
+
+
+def register():
+    subscribe_mode_change()
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    if on_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    armature_indexes.clear()
+    bone_name_indexes.clear()
@@ -30,6 +30,7 @@ import bmesh
 import addon_utils
 import pathlib
 from typing import Optional, List, Any
+from . import object_index
 
 
 def check_plugin_is_activated(plugin_name: str) -> bool:
@@ -96,16 +97,8 @@ def get_childs(obj: bpy.types.Object) -> List[bpy.types.Object]:
     if scene is None:
         return []
 
-    childs_obj: List[bpy.types.Object] = []
-    for child_obj in scene.objects:
-        # Only include objects that are not linked from external libraries
-        if not child_obj.library:
-            parent = child_obj.parent
-            if parent is not None:
-                if parent.name == obj.name:
-                    childs_obj.append(child_obj)
-
-    return childs_obj
+    # Only include objects that are not linked from external libraries
+    return object_index.get_scene_object_index(scene).get_children(obj, include_library=False)
 
 def get_armature_root_bone(obj: bpy.types.Object) -> Optional[bpy.types.Bone]:
     """
@@ -173,21 +166,8 @@ def get_recursive_childs(target_obj: bpy.types.Object) -> List[bpy.types.Object]
     if scene is None:
         return []
 
-    def get_recursive_parent(parent: bpy.types.Object, start_obj: bpy.types.Object) -> bool:
-        if start_obj.parent:
-            if start_obj.parent == parent:
-                return True
-            else:
-                if get_recursive_parent(parent, start_obj.parent):
-                    return True
-        return False
-
-
-    save_objs: List[bpy.types.Object] = []
-    for obj in scene.objects:
-        if get_recursive_parent(target_obj, obj):
-            save_objs.append(obj)
-    return save_objs
+    # Walks only the descendants, in the scene objects order.
+    return object_index.get_scene_object_index(scene).get_recursive_children(target_obj)
 
 
 def convert_to_convex_hull(obj: bpy.types.Object) -> None:
@@ -314,32 +294,28 @@ def get_obj_childs(obj: bpy.types.Object) -> List[bpy.types.Object]:
     if scene is None:
         return []
 
-    childs_obj: List[bpy.types.Object] = []
-    for childObj in scene.objects:
-        if childObj.library is None:  # type: ignore
-            pare = childObj.parent
-            if pare is not None:
-                if pare.name == obj.name:
-                    childs_obj.append(childObj)
-
-    return childs_obj
+    return object_index.get_scene_object_index(scene).get_children(obj, include_library=False)
 
 def get_recursive_obj_childs(obj: bpy.types.Object, include_self: bool = False) -> List[bpy.types.Object]:
     # Get all recursive childs of a object
     # include_self is True obj is index 0
 
 
+    scene = bpy.context.scene
+    if scene is None:
+        return []
+
     save_objects: List[bpy.types.Object] = []
+    scene_object_index = object_index.get_scene_object_index(scene)
 
-    def tryAppend(obj: bpy.types.Object) -> None:
-        if obj.name in bpy.context.scene.objects:  # type: ignore
-            save_objects.append(obj)
+    if include_self and obj.name in scene.objects:  # type: ignore
+        save_objects.append(obj)
 
-    if include_self:
-        tryAppend(obj)
+    # Children of the index are always in the scene.
+    def append_childs(parent: bpy.types.Object) -> None:
+        for newobj in scene_object_index.get_children(parent, include_library=False):
+            append_childs(newobj)
+            save_objects.append(newobj)
 
-    for newobj in get_obj_childs(obj):
-        for childs in get_recursive_obj_childs(newobj):
-            tryAppend(childs)
-        tryAppend(newobj)
+    append_childs(obj)
     return save_objects
@@ -24,8 +24,9 @@
 
 import bpy
 import mathutils
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Tuple, Union
 from .. import utils
+from .. import armature_index
 
 
 def create_safe_bone(armature: bpy.types.Object, bone_name: str, collection_name: str = "") -> Optional[bpy.types.EditBone]:
@@ -59,45 +60,71 @@ def create_safe_bone(armature: bpy.types.Object, bone_name: str, collection_name
 
     return bone
 
+def build_mirror_bone_name_tables() -> Tuple[Dict[str, Tuple[int, str, bool]], List[int], List[Tuple[int, str, str]]]:
+    """
+    Returns the mirror patterns of get_mirror_bone_name() as lookup tables:
+    - {suffix: (priority, mirror suffix, needs separator)}
+    - the suffix lengths, longest first
+    - [(priority, prefix, mirror prefix)]
+    Patterns are tested longest first, the priority keeps that order when several match.
+    """
+    bases = [("l", "r"), ("left", "right")]
+    seps = [".", "_", ""]
+    patterns = []
+    for sep in seps:
+        for l, r in bases:
+            for lcase, rcase in [
+                (l.lower(), r.lower()),
+                (l.upper(), r.upper()),
+                (l.capitalize(), r.capitalize()),
+            ]:
+                patterns.append((sep + lcase, sep + rcase))
+    patterns.sort(key=lambda x: len(x[0]), reverse=True)
+
+    suffix_table: Dict[str, Tuple[int, str, bool]] = {}
+    prefix_table: List[Tuple[int, str, str]] = []
+    for priority, (lpat, rpat) in enumerate(patterns):
+        # Single letter l/r only when not glued to the name. (armr is not a right arm)
+        suffix_table.setdefault(lpat, (priority * 2, rpat, len(lpat) == 1 and lpat in "lr"))
+        suffix_table.setdefault(rpat, (priority * 2, lpat, len(rpat) == 1 and rpat in "lr"))
+        if lpat.startswith(("Left", "RIGHT", "LEFT", "Right")):
+            prefix_table.append((priority * 2 + 1, lpat, rpat))
+            prefix_table.append((priority * 2 + 1, rpat, lpat))
+    suffix_lengths = sorted({len(suffix) for suffix in suffix_table}, reverse=True)
+    return suffix_table, suffix_lengths, prefix_table
+
+# Built once at import.
+mirror_suffix_table, mirror_suffix_lengths, mirror_prefix_table = build_mirror_bone_name_tables()
+
+
+def get_single_mirror_bone_name(bone: str) -> str:
+    best_priority = None
+    best_name = bone
+    for suffix_length in mirror_suffix_lengths:
+        suffix = bone[-suffix_length:]
+        if len(suffix) != suffix_length or suffix not in mirror_suffix_table:
+            continue
+        priority, mirror_suffix, needs_separator = mirror_suffix_table[suffix]
+        if needs_separator and len(bone) > 1 and bone[-2].isalnum():
+            continue
+        if best_priority is None or priority < best_priority:
+            best_priority = priority
+            best_name = bone[:-suffix_length] + mirror_suffix
+    for priority, prefix, mirror_prefix in mirror_prefix_table:
+        if best_priority is not None and priority > best_priority:
+            break
+        if bone.startswith(prefix):
+            return mirror_prefix + bone[len(prefix):]
+    return best_name
+
 def get_mirror_bone_name(original_bones: Union[str, List[str]]) -> Union[str, List[str]]:
     """
     Returns the mirror name of a bone or a list of bones.
     Automatically handles .l/.r, .L/.R, _l/_r, _L/_R, _left/_right, Left/Right, etc.
     """
-    from typing import Union
-    bones: List[str] = [original_bones] if isinstance(original_bones, str) else original_bones
-
-    def mirror_name(bone: str) -> str:
-        bases = [("l", "r"), ("left", "right")]
-        seps = [".", "_", ""]
-        patterns = []
-        for sep in seps:
-            for l, r in bases:
-                for lcase, rcase in [
-                    (l.lower(), r.lower()),
-                    (l.upper(), r.upper()),
-                    (l.capitalize(), r.capitalize()),
-                ]:
-                    patterns.append((sep + lcase, sep + rcase))
-        patterns.sort(key=lambda x: len(x[0]), reverse=True)
-        for lpat, rpat in patterns:
-            if bone.endswith(lpat):
-                if len(lpat) == 1 and lpat in "lr" and len(bone) > 1 and bone[-2].isalnum():
-                    continue
-                return bone[:-len(lpat)] + rpat
-            if bone.endswith(rpat):
-                if len(rpat) == 1 and rpat in "lr" and len(bone) > 1 and bone[-2].isalnum():
-                    continue
-                return bone[:-len(rpat)] + lpat
-            if lpat.startswith(("Left", "RIGHT", "LEFT", "Right")):
-                if bone.startswith(lpat):
-                    return rpat + bone[len(lpat):]
-                if bone.startswith(rpat):
-                    return lpat + bone[len(rpat):]
-        return bone
-
-    mirrored = [mirror_name(b) for b in bones]
-    return mirrored[0] if isinstance(original_bones, str) else mirrored
+    if isinstance(original_bones, str):
+        return get_single_mirror_bone_name(original_bones)
+    return [get_single_mirror_bone_name(bone) for bone in original_bones]
 
 def get_name_with_new_prefix(name, old_prefix, new_prefix):
     """
@@ -230,6 +257,7 @@ if bpy.app.version <= (3, 6, 0):
             new_bone_name = get_name_with_new_prefix(bone_name, old_prefix, new_prefix)  # Modify the bone name
             new_bone_name = no_num(new_bone_name)  # Remove the number index from the bone name
             armature.data.bones[bone_name].name = new_bone_name  # Rename the bone
+        armature_index.clear_armature_index(armature)  # Bone names changed
 
         armature.data.pose_position = 'POSE'  # Set the pose position back to pose mode
         return new_bone_names
@@ -254,6 +282,7 @@ class Orig_prefixhanBone():
             for bone in self.armature.data.edit_bones:
                 if bone.name == self.name:
                     bone.parent = self.armature.data.edit_bones[self.new_parent_name]
+                    armature_index.clear_armature_index(self.armature)
                     # print(bone.name, " child for ", self.new_parent_name)  # Debug
         else:
             print("Error: new_parent not set in Orig_prefixhanBone for " + self.name)
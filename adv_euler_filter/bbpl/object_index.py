@@ -0,0 +1,165 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+# ----------------------------------------------
+#  BBPL -> BleuRaven Blender Python Library
+#  BleuRaven.fr
+#  XavierLoux.com
+# ----------------------------------------------
+
+import bpy
+from typing import Dict, List, Optional
+
+
+class SceneObjectIndex():
+    """
+    Parent -> children index of the objects of a scene, built in one pass over scene.objects.
+
+    Objects are referenced by name. Parents that are not in the scene are indexed too
+    (so a child is still found through them) but are never returned.
+    Children lists keep the scene.objects order.
+    """
+
+    def __init__(self, scene: bpy.types.Scene):
+        self.objects: List[bpy.types.Object] = list(scene.objects)
+        # Position in scene.objects by object name.
+        self.scene_positions: Dict[str, int] = {obj.name: index for index, obj in enumerate(self.objects)}
+        # Child names by parent name.
+        self.children: Dict[str, List[str]] = {}
+        self.out_of_scene_objects: Dict[str, bpy.types.Object] = {}
+
+        indexed_parents = set()
+        for obj in self.objects:
+            child = obj
+            parent = child.parent
+            while parent is not None:
+                self.children.setdefault(parent.name, []).append(child.name)
+                if parent.name in self.scene_positions or parent.name in indexed_parents:
+                    break
+                # Parent out of the scene, its own parents are indexed once.
+                indexed_parents.add(parent.name)
+                self.out_of_scene_objects[parent.name] = parent
+                child = parent
+                parent = child.parent
+
+    def get_object(self, name: str) -> Optional[bpy.types.Object]:
+        position = self.scene_positions.get(name)
+        if position is None:
+            return None
+        return self.objects[position]
+
+    def get_children(self, obj: bpy.types.Object, include_library: bool = False) -> List[bpy.types.Object]:
+        """
+        Returns the direct children of the object in the scene.
+        """
+        children = []
+        for child_name in self.children.get(obj.name, []):
+            child = self.get_object(child_name)
+            if child is not None and (include_library or not child.library):
+                children.append(child)
+        return children
+
+    def get_descendant_names(self, obj: bpy.types.Object) -> List[str]:
+        """
+        Returns the names of all the descendants, including the objects out of the scene. O(descendants)
+        """
+        descendant_names: List[str] = []
+        stack = list(reversed(self.children.get(obj.name, [])))
+        while stack:
+            name = stack.pop()
+            descendant_names.append(name)
+            stack.extend(reversed(self.children.get(name, [])))
+        return descendant_names
+
+    def get_recursive_children(self, obj: bpy.types.Object, include_library: bool = True) -> List[bpy.types.Object]:
+        """
+        Returns all the descendants of the object in the scene, in the scene.objects order.
+        O(descendants log descendants)
+        """
+        positions = sorted(
+            self.scene_positions[name]
+            for name in self.get_descendant_names(obj)
+            if name in self.scene_positions
+        )
+        return [self.objects[position] for position in positions if include_library or not self.objects[position].library]
+
+
+# Built indexes by scene. (Scene.as_pointer() -> (signature, index))
+scene_object_indexes: Dict[int, tuple] = {}
+
+
+def get_scene_signature(scene: bpy.types.Scene) -> tuple:
+    """
+    Cheap check of the cached index: (object count,).
+    Reparented, renamed, added or removed objects are handled by the invalidation events
+    (depsgraph update, file load, clear_scene_object_index()).
+    """
+    return (len(scene.objects),)
+
+
+def get_scene_object_index(scene: bpy.types.Scene) -> SceneObjectIndex:
+    """
+    Returns the object index of the scene, built on first use and kept until
+    objects, collections or the scene are updated or clear_scene_object_index() is called.
+    Scripts that parent, rename, add or remove objects without depsgraph update should call clear_scene_object_index().
+    """
+    key = scene.as_pointer()
+    signature = get_scene_signature(scene)
+    cached = scene_object_indexes.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    scene_object_index = SceneObjectIndex(scene)
+    scene_object_indexes[key] = (signature, scene_object_index)
+    return scene_object_index
+
+
+def clear_scene_object_index(scene: Optional[bpy.types.Scene] = None):
+    """
+    Clears the index of the scene, or all the indexes when scene is None.
+    """
+    if scene is None:
+        scene_object_indexes.clear()
+    else:
+        scene_object_indexes.pop(scene.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update_post(scene, depsgraph):
+    if not scene_object_indexes:
+        return
+    if depsgraph.id_type_updated('OBJECT') or depsgraph.id_type_updated('COLLECTION') or depsgraph.id_type_updated('SCENE'):
+        scene_object_indexes.clear()
+
+
+@bpy.app.handlers.persistent
+def on_load_post(dummy):
+    scene_object_indexes.clear()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    if on_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update_post)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    scene_object_indexes.clear()
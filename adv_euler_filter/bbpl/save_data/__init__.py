@@ -26,8 +26,11 @@ import importlib
 
 from . import scene_save
 from . import select_save
+from . import scope_save
 
 if "scene_save" in locals():
     importlib.reload(scene_save)
 if "select_save" in locals():
-    importlib.reload(select_save)
\ No newline at end of file
+    importlib.reload(select_save)
+if "scope_save" in locals():
+    importlib.reload(scope_save)
\ No newline at end of file
@@ -23,7 +23,8 @@
 # ----------------------------------------------
 
 import bpy
-from typing import List, TYPE_CHECKING, Optional
+import numpy
+from typing import Dict, List, TYPE_CHECKING, Optional
 from . import select_save
 from .. import utils
 
@@ -107,12 +108,217 @@ class SavedViewLayerChildren():
             self.hide_viewport = child_col.hide_viewport
 
 
+def read_bool_property(items, prop_name: str) -> numpy.ndarray:
+    """
+    Returns a boolean property of all the items. Uses foreach_get on Blender collections.
+    """
+    values = numpy.empty(len(items), dtype=bool)
+    if isinstance(items, bpy.types.bpy_prop_collection):
+        items.foreach_get(prop_name, values)
+    else:
+        values[:] = [getattr(item, prop_name) for item in items]
+    return values
+
+
+def write_bool_property_diff(items, prop_name: str, saved_values: numpy.ndarray) -> int:
+    """
+    Writes only the saved values that differ from the current values.
+    Returns the number of written items.
+    """
+    changed_indices = numpy.flatnonzero(read_bool_property(items, prop_name) != saved_values).tolist()
+    for index in changed_indices:
+        setattr(items[index], prop_name, bool(saved_values[index]))
+    return len(changed_indices)
+
+
+def get_valid_indices(items: list) -> List[int]:
+    """
+    Returns the indices of the items that have not been removed.
+    """
+    valid_indices: List[int] = []
+    for index, item in enumerate(items):
+        try:
+            item.name
+            valid_indices.append(index)
+        except ReferenceError:
+            pass
+    return valid_indices
+
+
+class PackedSceneState():
+    """
+    Visibility and selection state of the scene in packed arrays.
+    Flags are read with foreach_get when the collection supports it and
+    the restore compares with the current state and writes only the differences.
+    Items are restored by reference, or by name with use_names or when the number of items changed.
+    """
+
+    object_properties = ("hide_select", "hide_viewport")
+    collection_properties = ("hide_select", "hide_viewport")
+    layer_collection_properties = ("exclude", "hide_viewport")
+
+    def __init__(self):
+        self.objects: List[bpy.types.Object] = []
+        self.object_names: List[str] = []
+        self.object_values: Dict[str, numpy.ndarray] = {}
+        self.object_hides = numpy.zeros(0, dtype=bool)
+        self.selected_objects: List[bpy.types.Object] = []
+        self.selected_object_names: List[str] = []
+        self.selected_pointers = set()
+        self.active_object: Optional[bpy.types.Object] = None
+        self.active_object_name = ""
+        self.collections: List[bpy.types.Collection] = []
+        self.collection_names: List[str] = []
+        self.collection_values: Dict[str, numpy.ndarray] = {}
+        # Layer collections by view layer name.
+        self.layer_collection_names: Dict[str, List[str]] = {}
+        self.layer_collection_values: Dict[str, Dict[str, numpy.ndarray]] = {}
+
+    def save(self, scene: bpy.types.Scene, view_layer: bpy.types.ViewLayer):
+        self.objects = list(scene.objects)
+        self.object_names = scene.objects.keys()
+        for prop_name in self.object_properties:
+            self.object_values[prop_name] = read_bool_property(scene.objects, prop_name)
+        # hide_get() depends on the view layer, no foreach_get.
+        self.object_hides = numpy.array([obj.hide_get() for obj in self.objects], dtype=bool)
+        # Only the selected objects are listed.
+        self.selected_objects = list(view_layer.objects.selected)
+        self.selected_object_names = [obj.name for obj in self.selected_objects]
+        self.selected_pointers = {obj.as_pointer() for obj in self.selected_objects}
+        self.active_object = view_layer.objects.active
+        self.active_object_name = self.active_object.name if self.active_object else ""
+
+        self.collections = list(bpy.data.collections)
+        self.collection_names = bpy.data.collections.keys()
+        for prop_name in self.collection_properties:
+            self.collection_values[prop_name] = read_bool_property(bpy.data.collections, prop_name)
+
+        for vlayer in scene.view_layers:
+            layer_collections = utils.get_layer_collections_recursive(vlayer.layer_collection)
+            self.layer_collection_names[vlayer.name] = [layer_collection.name for layer_collection in layer_collections]
+            self.layer_collection_values[vlayer.name] = {
+                prop_name: read_bool_property(layer_collections, prop_name)
+                for prop_name in self.layer_collection_properties
+            }
+
+    def get_current_items(
+        self,
+        saved_items: list,
+        saved_names: List[str],
+        current_items,
+        saved_values: Dict[str, numpy.ndarray],
+        print_removed_items: bool = False,
+        use_names: bool = False
+    ):
+        """
+        Returns the items to restore and their saved values.
+        When the collection did not change the collection itself is used (foreach_get).
+        With use_names or when the number of items changed, the saved names are found in the collection,
+        otherwise the saved items that still exist are used.
+        """
+        if use_names or len(current_items) != len(saved_items):
+            current_names = current_items.keys()
+            if current_names == saved_names:
+                return current_items, saved_values
+            current_indices = {name: index for index, name in enumerate(current_names)}
+            found_indices = [index for index, name in enumerate(saved_names) if name in current_indices]
+            if print_removed_items and len(found_indices) != len(saved_names):
+                print(f"/!\\ {len(saved_names) - len(found_indices)} item(s) not found.")
+            items = [current_items[current_indices[saved_names[index]]] for index in found_indices]
+            return items, {prop_name: values[found_indices] for prop_name, values in saved_values.items()}
+
+        if list(current_items) == saved_items:
+            return current_items, saved_values
+        valid_indices = get_valid_indices(saved_items)
+        if print_removed_items and len(valid_indices) != len(saved_items):
+            print(f"/!\\ {len(saved_items) - len(valid_indices)} item(s) have been removed.")
+        items = [saved_items[index] for index in valid_indices]
+        return items, {prop_name: values[valid_indices] for prop_name, values in saved_values.items()}
+
+    def reset_visibility(self, scene: bpy.types.Scene, print_removed_items: bool = False, use_names: bool = False):
+        """
+        Reset the hide flags of the objects, collections and view layer collections.
+        """
+        objects, object_values = self.get_current_items(
+            self.objects,
+            self.object_names,
+            scene.objects,
+            dict(self.object_values, hide=self.object_hides),
+            print_removed_items,
+            use_names
+        )
+        for prop_name in self.object_properties:
+            write_bool_property_diff(objects, prop_name, object_values[prop_name])
+        view_layer_objects = bpy.context.view_layer.objects
+        for index, obj in enumerate(objects):
+            if obj.name in view_layer_objects and obj.hide_get() != object_values["hide"][index]:
+                obj.hide_set(bool(object_values["hide"][index]))
+
+        collections, collection_values = self.get_current_items(
+            self.collections,
+            self.collection_names,
+            bpy.data.collections,
+            self.collection_values,
+            print_removed_items,
+            use_names
+        )
+        for prop_name in self.collection_properties:
+            write_bool_property_diff(collections, prop_name, collection_values[prop_name])
+
+        for vlayer in scene.view_layers:
+            if vlayer.name not in self.layer_collection_names:
+                continue
+            layer_collections = {
+                layer_collection.name: layer_collection
+                for layer_collection in utils.get_layer_collections_recursive(vlayer.layer_collection)
+            }
+            saved_names = self.layer_collection_names[vlayer.name]
+            found_indices = [index for index, name in enumerate(saved_names) if name in layer_collections]
+            found_layer_collections = [layer_collections[saved_names[index]] for index in found_indices]
+            for prop_name, values in self.layer_collection_values[vlayer.name].items():
+                write_bool_property_diff(found_layer_collections, prop_name, values[found_indices])
+
+    def reset_select(self, view_layer: bpy.types.ViewLayer, use_names: bool = False):
+        """
+        Reset the selected and active objects. Only the objects whose selection changed are written.
+        """
+        view_layer_objects = view_layer.objects
+        if use_names:
+            selected_names = set(self.selected_object_names)
+            for obj in list(view_layer_objects.selected):
+                if obj.name not in selected_names:
+                    obj.select_set(False)
+            for name in self.selected_object_names:
+                obj = view_layer_objects.get(name)
+                if obj is not None and not obj.select_get():
+                    obj.select_set(True)
+            view_layer_objects.active = view_layer_objects.get(self.active_object_name)
+            return
+
+        for obj in list(view_layer_objects.selected):
+            if obj.as_pointer() not in self.selected_pointers:
+                obj.select_set(False)
+        for index in get_valid_indices(self.selected_objects):
+            obj = self.selected_objects[index]
+            if obj.name in view_layer_objects and not obj.select_get():
+                obj.select_set(True)
+        if self.active_object is None or get_valid_indices([self.active_object]):
+            view_layer_objects.active = self.active_object
+
+
 class UserSceneSave():
     """
     Manager for saving and resetting the user scene.
+    With packed, the scene state is saved in packed arrays (PackedSceneState)
+    and only the differences are written back at reset.
     """
 
-    def __init__(self):
+    def __init__(self, packed: bool = False):
+        self.packed = packed
+        self.packed_state: Optional[PackedSceneState] = None
+        self.bone_selects: Optional[numpy.ndarray] = None
+        self.bone_select_names: List[str] = []
+
         # Select
         self.user_select_class = select_save.UserSelectSave()
 
@@ -151,14 +357,18 @@ class UserSceneSave():
         self.use_simplify = bpy.context.scene.render.use_simplify
 
         # Data
-        for obj in scene.objects:
-            self.objects.append(SavedObject(obj))
-        for col in bpy.data.collections:
-            self.collections.append(SavedCollection(col))
-        for vlayer in scene.view_layers:
-            layer_collections = utils.get_layer_collections_recursive(vlayer.layer_collection)
-            for layer_collection in layer_collections:
-                self.view_layer_collections.append(SavedViewLayerChildren(vlayer, layer_collection))
+        if self.packed:
+            self.packed_state = PackedSceneState()
+            self.packed_state.save(scene, bpy.context.view_layer)
+        else:
+            for obj in scene.objects:
+                self.objects.append(SavedObject(obj))
+            for col in bpy.data.collections:
+                self.collections.append(SavedCollection(col))
+            for vlayer in scene.view_layers:
+                layer_collections = utils.get_layer_collections_recursive(vlayer.layer_collection)
+                for layer_collection in layer_collections:
+                    self.view_layer_collections.append(SavedViewLayerChildren(vlayer, layer_collection))
         for action in bpy.data.actions:
             self.action_names.append(action.name)
         for collection in bpy.data.collections:
@@ -170,14 +380,24 @@ class UserSceneSave():
                 if self.user_select_class.user_active.data.bones.active:  # type: ignore
                     self.user_bone_active = self.user_select_class.user_active.data.bones.active  # type: ignore
                     self.user_bone_active_name = self.user_select_class.user_active.data.bones.active.name  # type: ignore
-                for bone in self.user_select_class.user_active.data.bones:  # type: ignore
-                    self.object_bones.append(SavedBones(bone))
+                if self.packed:
+                    self.bone_selects = read_bool_property(self.user_select_class.user_active.data.bones, "select")  # type: ignore
+                    self.bone_select_names = self.user_select_class.user_active.data.bones.keys()  # type: ignore
+                else:
+                    for bone in self.user_select_class.user_active.data.bones:  # type: ignore
+                        self.object_bones.append(SavedBones(bone))
 
     def reset_select(self, use_names: bool = False):
         """
         Reset the user selection based on object references.
         """
-        self.user_select_class.reset_select(use_names)
+        if self.packed_state is not None and bpy.context is not None:
+            self.user_select_class.save_mode(use_names)
+            utils.safe_mode_set("OBJECT", bpy.ops.object)  # type: ignore
+            self.packed_state.reset_select(bpy.context.view_layer, use_names)
+            self.user_select_class.reset_mode_at_save()
+        else:
+            self.user_select_class.reset_select(use_names)
         self.reset_bones_select(use_names)
 
     def reset_bones_select(self, use_names: bool = False):
@@ -185,7 +405,24 @@ class UserSceneSave():
         Reset bone selection by name (works only in pose mode).
         """
         # Work only in pose mode!
-        if len(self.object_bones) > 0:
+        if self.bone_selects is not None:
+            user_active = self.user_select_class.get_user_active(use_names)
+            if user_active and user_active.mode == "POSE":
+                bones = user_active.data.bones  # type: ignore
+                bone_names = bones.keys()
+                if bone_names == self.bone_select_names:
+                    write_bool_property_diff(bones, "select", self.bone_selects)
+                else:
+                    # Bones changed since the save, match them by name.
+                    bone_selects = read_bool_property(bones, "select")
+                    bone_indices = {name: index for index, name in enumerate(bone_names)}
+                    for name, select in zip(self.bone_select_names, self.bone_selects.tolist()):
+                        if name in bone_indices:
+                            bone_selects[bone_indices[name]] = select
+                    write_bool_property_diff(bones, "select", bone_selects)
+                if self.user_bone_active_name in bones:
+                    bones.active = bones[self.user_bone_active_name]
+        elif len(self.object_bones) > 0:
             user_active = self.user_select_class.get_user_active(use_names)
             if user_active:
                 if bpy.ops.object.mode_set.poll():  # type: ignore
@@ -220,6 +457,10 @@ class UserSceneSave():
 
         bpy.context.scene.render.use_simplify = self.use_simplify
 
+        if self.packed_state is not None:
+            self.packed_state.reset_visibility(scene, print_removed_items, use_names)
+            return
+
         # Reset hide and select
         for obj in self.objects:
             try:
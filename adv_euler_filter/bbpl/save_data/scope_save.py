@@ -0,0 +1,223 @@
+# ====================== BEGIN GPL LICENSE BLOCK ============================
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#  All rights reserved.
+#
+# ======================= END GPL LICENSE BLOCK =============================
+
+# ----------------------------------------------
+#  BBPL -> BleuRaven Blender Python Library
+#  BleuRaven.fr
+#  XavierLoux.com
+# ----------------------------------------------
+
+import bpy
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Scopes currently saving, the touch functions save the items in each of them.
+active_scopes: List["ScopedSceneSave"] = []
+
+
+class ScopedSceneSave():
+    """
+    Saves and resets only the items an operation will modify, instead of the whole scene like UserSceneSave.
+
+    - objects: select, hide, hide_select, hide_viewport.
+    - bones: select and hide of the given bones, by armature.
+    - collections: hide_select, hide_viewport and the exclude / hide_viewport of their layer collections.
+    - the scene frame, the active object and the selected objects. (O(selected))
+
+    Objects and collections modified outside of the declared scope are saved on their first touch
+    (touch_object(), touch_collection()) while the scope is active.
+    Can be used as a context manager: saved on enter and reset on exit.
+    """
+
+    def __init__(
+        self,
+        objects: Iterable[bpy.types.Object] = (),
+        bones: Optional[Dict[bpy.types.Object, Iterable[str]]] = None,
+        collections: Iterable[bpy.types.Collection] = (),
+        save_frame: bool = True
+    ):
+        self.scope_objects = list(objects)
+        self.scope_bones = dict(bones) if bones else {}
+        self.scope_collections = list(collections)
+        self.save_frame = save_frame
+
+        # Saved states by as_pointer().
+        self.object_states: Dict[int, Tuple[bpy.types.Object, Tuple[bool, bool, bool, bool]]] = {}
+        self.bone_states: Dict[int, Tuple[bpy.types.Object, Dict[str, Tuple[bool, bool]]]] = {}
+        self.collection_states: Dict[int, Tuple[bpy.types.Collection, Tuple[bool, bool], List[Tuple[bpy.types.LayerCollection, bool, bool]]]] = {}
+
+        self.frame: Optional[Tuple[int, float]] = None
+        self.active_object: Optional[bpy.types.Object] = None
+        self.selected_objects: List[bpy.types.Object] = []
+        self.selected_pointers = set()
+
+    def save_object(self, obj: bpy.types.Object):
+        key = obj.as_pointer()
+        if key not in self.object_states:
+            self.object_states[key] = (obj, (obj.select_get(), obj.hide_get(), obj.hide_select, obj.hide_viewport))
+
+    def save_bones(self, armature: bpy.types.Object, bone_names: Iterable[str]):
+        key = armature.as_pointer()
+        if key not in self.bone_states:
+            self.bone_states[key] = (armature, {})
+        bone_states = self.bone_states[key][1]
+        bones = armature.data.bones  # type: ignore
+        for bone_name in bone_names:
+            if bone_name not in bone_states:
+                bone = bones.get(bone_name)
+                if bone is not None:
+                    bone_states[bone_name] = (bone.select, bone.hide)
+
+    def save_collection(self, collection: bpy.types.Collection):
+        key = collection.as_pointer()
+        if key in self.collection_states:
+            return
+        layer_collections = []
+        for vlayer in bpy.context.scene.view_layers:
+            stack = [vlayer.layer_collection]
+            while stack:
+                layer_collection = stack.pop()
+                if layer_collection.collection == collection:
+                    layer_collections.append((layer_collection, layer_collection.exclude, layer_collection.hide_viewport))
+                stack.extend(layer_collection.children)
+        self.collection_states[key] = (collection, (collection.hide_select, collection.hide_viewport), layer_collections)
+
+    def save_current_scene(self):
+        """
+        Save the state of the scope.
+        """
+        if bpy.context is None:
+            return
+
+        scene = bpy.context.scene
+        view_layer = bpy.context.view_layer
+        if self.save_frame:
+            self.frame = (scene.frame_current, scene.frame_subframe)
+        self.active_object = view_layer.objects.active
+        self.selected_objects = list(view_layer.objects.selected)
+        self.selected_pointers = {obj.as_pointer() for obj in self.selected_objects}
+
+        for obj in self.scope_objects:
+            self.save_object(obj)
+        for armature, bone_names in self.scope_bones.items():
+            self.save_bones(armature, bone_names)
+        for collection in self.scope_collections:
+            self.save_collection(collection)
+
+        if self not in active_scopes:
+            active_scopes.append(self)
+
+    def reset_scene_at_save(self, print_removed_items: bool = False):
+        """
+        Reset the saved items. Only the values that changed are written.
+        """
+        if self in active_scopes:
+            active_scopes.remove(self)
+        if bpy.context is None:
+            return
+
+        scene = bpy.context.scene
+        view_layer = bpy.context.view_layer
+
+        # Collections first, they change the visibility of their objects.
+        for collection, (hide_select, hide_viewport), layer_collections in self.collection_states.values():
+            try:
+                if collection.hide_select != hide_select:
+                    collection.hide_select = hide_select
+                if collection.hide_viewport != hide_viewport:
+                    collection.hide_viewport = hide_viewport
+                for layer_collection, exclude, layer_hide_viewport in layer_collections:
+                    if layer_collection.exclude != exclude:
+                        layer_collection.exclude = exclude
+                    if layer_collection.hide_viewport != layer_hide_viewport:
+                        layer_collection.hide_viewport = layer_hide_viewport
+            except ReferenceError:
+                if print_removed_items:
+                    print("/!\\ a saved collection has been removed.")
+
+        for obj, (select, hide, hide_select, hide_viewport) in self.object_states.values():
+            try:
+                if obj.hide_select != hide_select:
+                    obj.hide_select = hide_select
+                if obj.hide_viewport != hide_viewport:
+                    obj.hide_viewport = hide_viewport
+                if obj.name in view_layer.objects:
+                    if obj.hide_get() != hide:
+                        obj.hide_set(hide)
+                    if obj.select_get() != select:
+                        obj.select_set(select)
+            except ReferenceError:
+                if print_removed_items:
+                    print("/!\\ a saved object has been removed.")
+
+        for armature, bone_states in self.bone_states.values():
+            try:
+                bones = armature.data.bones  # type: ignore
+                for bone_name, (select, hide) in bone_states.items():
+                    bone = bones.get(bone_name)
+                    if bone is None:
+                        continue
+                    if bone.select != select:
+                        bone.select = select
+                    if bone.hide != hide:
+                        bone.hide = hide
+            except ReferenceError:
+                if print_removed_items:
+                    print("/!\\ a saved armature has been removed.")
+
+        # Selection, only the objects whose selection changed are written.
+        for obj in list(view_layer.objects.selected):
+            if obj.as_pointer() not in self.selected_pointers:
+                obj.select_set(False)
+        for obj in self.selected_objects:
+            try:
+                if obj.name in view_layer.objects and not obj.select_get():
+                    obj.select_set(True)
+            except ReferenceError:
+                pass
+        try:
+            if view_layer.objects.active != self.active_object:
+                view_layer.objects.active = self.active_object
+        except ReferenceError:
+            pass
+
+        if self.frame is not None and (scene.frame_current, scene.frame_subframe) != self.frame:
+            scene.frame_set(self.frame[0], subframe=self.frame[1])
+
+    def __enter__(self):
+        self.save_current_scene()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.reset_scene_at_save()
+        return False
+
+
+def touch_object(obj: bpy.types.Object):
+    """
+    Call before modifying an object: it is saved in the active scopes that did not save it yet.
+    """
+    for scope in active_scopes:
+        scope.save_object(obj)
+
+
+def touch_collection(collection: bpy.types.Collection):
+    """
+    Call before modifying a collection: it is saved in the active scopes that did not save it yet.
+    """
+    for scope in active_scopes:
+        scope.save_collection(collection)
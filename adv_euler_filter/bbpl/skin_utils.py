@@ -24,47 +24,76 @@
 
 
 import bpy
-from typing import List, Dict, Any
+import mathutils
+import numpy
+from typing import List, Dict, Any, Tuple
 from .. import bbpl
 
+def get_bone_name_indices(armature: bpy.types.Object) -> Dict[str, int]:
+    """
+    Returns the index of each bone in armature.data.bones by name.
+    """
+    return {bone_name: index for index, bone_name in enumerate(armature.data.bones.keys())}  # type: ignore
+
+
+def get_bones_deforms(armature: bpy.types.Object) -> numpy.ndarray:
+    """
+    Returns the deform flag of each bone in armature.data.bones as a boolean array.
+    """
+    bones = armature.data.bones  # type: ignore
+    use_deforms = numpy.empty(len(bones), dtype=bool)
+    bones.foreach_get("use_deform", use_deforms)
+    return use_deforms
+
+
+def set_bones_deforms_array(armature: bpy.types.Object, use_deforms: numpy.ndarray) -> None:
+    """
+    Set the deform flag of each bone in armature.data.bones from a boolean array.
+    """
+    armature.data.bones.foreach_set("use_deform", numpy.asarray(use_deforms, dtype=bool))  # type: ignore
+
+
 def save_defoms_bones(armature: bpy.types.Object) -> Dict[str, bool]:
     """
     Save the deform flag for each bone in the armature.
     Returns a dictionary of bone names and their deform flags.
     """
-    saved_bones: Dict[str, bool] = {}
-
-    for bone in armature.data.bones:  # type: ignore
-        saved_bones[bone.name] = bone.use_deform  # type: ignore
-    return saved_bones
+    return dict(zip(armature.data.bones.keys(), get_bones_deforms(armature).tolist()))  # type: ignore
 
 
 def reset_deform_bones(armature: bpy.types.Object, saved_bones: Dict[str, bool]) -> None:
     """
     Reset the deform flags for each bone in the armature using the saved data.
+    Bones that no longer exist are skipped.
     """
+    use_deforms = get_bones_deforms(armature)
+    bone_name_indices = get_bone_name_indices(armature)
     for bone_name, use_deform in saved_bones.items():
-        armature.data.bones[bone_name].use_deform = use_deform  # type: ignore
+        if bone_name in bone_name_indices:
+            use_deforms[bone_name_indices[bone_name]] = use_deform
+    set_bones_deforms_array(armature, use_deforms)
 
 
 def set_all_bones_deforms(armature: bpy.types.Object, use_deform: bool) -> None:
     """
     Set the deform flag for all bones in the armature.
     """
-    for bone in armature.data.bones:  # type: ignore
-        bone.use_deform = use_deform
+    set_bones_deforms_array(armature, numpy.full(len(armature.data.bones), use_deform, dtype=bool))  # type: ignore
 
 
 def set_bones_deforms(armature: bpy.types.Object, bone_name_list: List[str], use_deform: bool) -> None:
     """
     Set the deform flag for the specified bones in the armature.
     """
-    bone_list: List[bpy.types.Bone] = []
-    for bone_name in bone_name_list:
-        if bone_name in armature.data.bones:  # type: ignore
-            bone_list.append(armature.data.bones[bone_name])  # type: ignore
-    for bone in bone_list:
-        bone.use_deform = use_deform
+    if not bone_name_list:
+        return
+    bone_name_indices = get_bone_name_indices(armature)
+    indices = [bone_name_indices[bone_name] for bone_name in bone_name_list if bone_name in bone_name_indices]
+    if not indices:
+        return
+    use_deforms = get_bones_deforms(armature)
+    use_deforms[indices] = use_deform
+    set_bones_deforms_array(armature, use_deforms)
 
 
 def remove_vertex_groups(obj: bpy.types.Object) -> None:
@@ -75,37 +104,99 @@ def remove_vertex_groups(obj: bpy.types.Object) -> None:
         obj.vertex_groups.remove(vertex_group)  # type: ignore
 
 
-def copy_rig_group(obj: bpy.types.Object, source: bpy.types.Object) -> None:
+def get_world_vertex_positions(obj: bpy.types.Object) -> numpy.ndarray:
     """
-    Copy the rigging weights from the source object to the target object.
+    Returns the world space vertex positions of a mesh object with shape (N, 3).
     """
-    bbpl.utils.mode_set_on_target(obj, "OBJECT")
+    mesh: bpy.types.Mesh = obj.data  # type: ignore
+    co = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", co)
+    matrix = numpy.array(obj.matrix_world, dtype=numpy.float64)
+    return co.reshape(-1, 3).astype(numpy.float64) @ matrix[:3, :3].T + matrix[:3, 3]
 
-    mod_name = "MAR_RigWeightTransfer"
 
-    for old_mod in obj.modifiers:
-        if old_mod.name == mod_name:
-            obj.modifiers.remove(old_mod)  # type: ignore
+def get_vertex_weight_entries(obj: bpy.types.Object) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Returns the vertex group weights of a mesh object as flat arrays (offsets, group indices, weights).
+    The entries of vertex i are at [offsets[i]:offsets[i+1]].
+    """
+    mesh: bpy.types.Mesh = obj.data  # type: ignore
+    counts = numpy.zeros(len(mesh.vertices) + 1, dtype=numpy.int64)
+    group_indices: List[int] = []
+    weights: List[float] = []
+    for vertex in mesh.vertices:
+        vertex_groups = vertex.groups
+        counts[vertex.index + 1] = len(vertex_groups)
+        for element in vertex_groups:
+            group_indices.append(element.group)
+            weights.append(element.weight)
+    offsets = numpy.cumsum(counts)
+    return offsets, numpy.array(group_indices, dtype=numpy.int64), numpy.array(weights, dtype=numpy.float32)
+
+
+def get_nearest_vertex_indices(source_positions: numpy.ndarray, target_positions: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns the index of the nearest source vertex for each target vertex, using a KD-tree.
+    """
+    kd_tree = mathutils.kdtree.KDTree(len(source_positions))
+    for index, co in enumerate(source_positions.tolist()):
+        kd_tree.insert(co, index)
+    kd_tree.balance()
+    return numpy.array([kd_tree.find(co)[1] for co in target_positions.tolist()], dtype=numpy.int64)
+
+
+def write_vertex_weight_entries(
+    vertex_groups: List[bpy.types.VertexGroup],
+    vertex_indices: numpy.ndarray,
+    group_indices: numpy.ndarray,
+    weights: numpy.ndarray
+) -> None:
+    """
+    Writes the weight entries with one VertexGroup.add() call per group and weight value.
+    """
+    if len(vertex_indices) == 0:
+        return
+    order = numpy.lexsort((weights, group_indices))
+    vertex_indices = vertex_indices[order]
+    group_indices = group_indices[order]
+    weights = weights[order]
+    breaks = numpy.flatnonzero((group_indices[1:] != group_indices[:-1]) | (weights[1:] != weights[:-1])) + 1
+    starts = numpy.concatenate(([0], breaks))
+    ends = numpy.concatenate((breaks, [len(vertex_indices)]))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        vertex_groups[group_indices[start]].add(vertex_indices[start:end].tolist(), float(weights[start]), 'REPLACE')
 
-    remove_vertex_groups(obj)
 
-    mod = obj.modifiers.new(name=mod_name, type='DATA_TRANSFER')  # type: ignore
-    while obj.modifiers[0].name != mod_name:
-        bpy.ops.object.modifier_move_up(modifier=mod_name)  # type: ignore
+def copy_rig_group(obj: bpy.types.Object, source: bpy.types.Object) -> None:
+    """
+    Copy the rigging weights from the source object to the target object.
+    Each target vertex takes the weights of the nearest source vertex in world space.
+    Works on the mesh data, no operator or context is needed.
+    """
+    if obj.mode == "EDIT":
+        bbpl.utils.mode_set_on_target(obj, "OBJECT")
 
+    remove_vertex_groups(obj)
+    vertex_groups = [obj.vertex_groups.new(name=vertex_group.name) for vertex_group in source.vertex_groups]
+    if len(obj.data.vertices) == 0 or len(source.data.vertices) == 0:  # type: ignore
+        return
+
+    nearest_indices = get_nearest_vertex_indices(get_world_vertex_positions(source), get_world_vertex_positions(obj))
+    offsets, group_indices, weights = get_vertex_weight_entries(source)
 
-    mod.object = source  # type: ignore
-    mod.use_vert_data = True  # type: ignore
-    mod.data_types_verts = {'VGROUP_WEIGHTS'}  # type: ignore
-    bpy.ops.object.datalayout_transfer(modifier=mod_name, data_type="VGROUP_WEIGHTS")  # type: ignore
-    bpy.ops.object.modifier_apply(modifier=mod_name)  # type: ignore
+    # Gather the source entries of each target vertex.
+    entry_counts = (offsets[1:] - offsets[:-1])[nearest_indices]
+    target_vertex_indices = numpy.repeat(numpy.arange(len(nearest_indices)), entry_counts)
+    entry_starts = numpy.repeat(offsets[:-1][nearest_indices] - (numpy.cumsum(entry_counts) - entry_counts), entry_counts)
+    entries = entry_starts + numpy.arange(len(target_vertex_indices))
+    write_vertex_weight_entries(vertex_groups, target_vertex_indices, group_indices[entries], weights[entries])
 
 
 def apply_auto_rig_parent(
-    armature: bpy.types.Object, 
-    target_objects: List[bpy.types.Object], 
-    parent_type: str = 'ARMATURE_AUTO', 
-    white_list_bones: List[str] = [], 
+    armature: bpy.types.Object,
+    target_objects: List[bpy.types.Object],
+    parent_type: str = 'ARMATURE_AUTO',
+    white_list_bones: List[str] = [],
     black_list_bones: List[str] = []
 ) -> None:
     """
@@ -115,11 +206,14 @@ def apply_auto_rig_parent(
 
     save_defom = save_defoms_bones(armature)
 
+    # Deform flags are built in one array and written once.
+    use_deforms = get_bones_deforms(armature)
     if len(white_list_bones) > 0:
-        set_all_bones_deforms(armature, False)
-
-    set_bones_deforms(armature, white_list_bones, True)
-    set_bones_deforms(armature, black_list_bones, False)
+        use_deforms[:] = False
+    bone_name_indices = get_bone_name_indices(armature)
+    use_deforms[[bone_name_indices[name] for name in white_list_bones if name in bone_name_indices]] = True
+    use_deforms[[bone_name_indices[name] for name in black_list_bones if name in bone_name_indices]] = False
+    set_bones_deforms_array(armature, use_deforms)
 
     for obj in target_objects:
         for modifier in obj.modifiers:
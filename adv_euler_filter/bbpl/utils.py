@@ -27,6 +27,8 @@ import copy
 import bpy
 import mathutils
 from typing import List, Optional, Dict, Any, Tuple, Union
+from . import armature_index as armature_index_utils
+from .save_data import scope_save
 
 def select_specific_object_list(active: Optional[bpy.types.Object], objs: List[bpy.types.Object]) -> List[bpy.types.Object]:
     """
@@ -54,16 +56,19 @@ def select_specific_object_list(active: Optional[bpy.types.Object], objs: List[b
 
     # Deselect all
     for obj in bpy.context.selected_objects:
+        scope_save.touch_object(obj)
         obj.select_set(False)
     view_layer.objects.active = None
 
     # Select specific objects
     for obj in objs:
         if obj.name in view_layer.objects:
+            scope_save.touch_object(obj)
             obj.select_set(True)  # type: ignore
             selected_objs.append(obj)
 
     # Set active at end
+    scope_save.touch_object(active)
     active.select_set(True)  # type: ignore
     view_layer.objects.active = active
     selected_objs.append(active)
@@ -95,10 +100,12 @@ def select_specific_object(active: Optional[bpy.types.Object]) -> Optional[bpy.t
 
     # Deselect all
     for obj in bpy.context.selected_objects:
+        scope_save.touch_object(obj)
         obj.select_set(False)
     view_layer.objects.active = None
 
     # Select specific object and set active
+    scope_save.touch_object(active)
     active.select_set(True)  # type: ignore
     view_layer.objects.active = active
     return active
@@ -149,6 +156,7 @@ def mode_set_on_target(target_object: Optional[bpy.types.Object] = None, target_
             bpy.ops.object.mode_set(mode='OBJECT')  # type: ignore
 
         if target_object:
+            scope_save.touch_object(target_object)
             target_object.select_set(state=True)  # type: ignore
             bpy.context.view_layer.objects.active = target_object
 
@@ -293,8 +301,9 @@ def set_visual_bones_pos_packed(
     Set the visual positions, rotations, and scales of multiple bones using a packed position list,
     allowing control over which values to apply.
     """
+    bones_by_name = {bone.name: bone for bone in target_bones}
     for pl in position_list:
-        target_bone = find_item_in_list_by_name(pl[0], target_bones)
+        target_bone = bones_by_name.get(pl[0])
         if target_bone is not None:
             loc = mathutils.Vector(pl[1])  # type: ignore
             rot = mathutils.Euler(pl[2], 'XYZ')  # type: ignore
@@ -330,6 +339,7 @@ def set_collection_exclude(collection: bpy.types.Collection, exclude: bool):
         return
 
     if bpy.context:
+        scope_save.touch_collection(collection)
         for vl in scene.view_layers:
             for layer in get_recursive_layer_collection(vl.layer_collection):
                 if layer.collection == collection:
@@ -638,39 +648,15 @@ def get_bone_path(armature: bpy.types.Object, start_bone_name: str, end_bone_nam
     :param armature: The armature object.
     :param start_bone_name: The name of the starting bone.
     :param end_bone_name: The name of the ending bone.
-    :return: List of bone names between start_bone and end_bone, or an empty list if no path is found.
+    :return: List of bone names between start_bone and end_bone, an empty list if a bone is missing, or None if no path is found.
     """
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    # Initialize the bones
-    if start_bone_name not in bones or end_bone_name not in bones:
+    armature_index = armature_index_utils.get_armature_index(armature)
+    if start_bone_name not in armature_index.name_to_index or end_bone_name not in armature_index.name_to_index:
         return []
 
-    start_bone = bones[start_bone_name]
-    end_bone = bones[end_bone_name]
-
-
-    # Depth-First Search to find the path from start_bone to end_bone
-    def find_path(current_bone: Union[bpy.types.EditBone, bpy.types.PoseBone, bpy.types.Bone], path: List[str]) -> Optional[List[str]]:
-        path.append(current_bone.name)
-
-        # Check if we've reached the end bone
-        if current_bone == end_bone:
-            return path
-
-        # Explore each child recursively
-        for child in current_bone.children:
-            result = find_path(child, path[:])  # Use a copy of the current path
-            if result:  # If a valid path is found, return it
-                return result
-        
-        return None  # Return None if no path is found from this branch
-
-    # Start the recursive search
-    all_bones = find_path(start_bone, [])
-    return all_bones
+    # Walks up from the end bone, O(depth).
+    return armature_index.get_path(start_bone_name, end_bone_name)
     
 def get_bone_path_to_end(armature: bpy.types.Object, start_bone_name: str) -> List[str]:
     """
@@ -681,22 +667,8 @@ def get_bone_path_to_end(armature: bpy.types.Object, start_bone_name: str) -> Li
     :return: List of bone names from start_bone to the last child.
     """
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    # Initialize the bones
-    start_bone = bones[start_bone_name]
-
-    # Traverse bones from start_bone to the last child in the chain
-    current_bone = start_bone
-    bone_path = [current_bone.name]
-
-    while current_bone.children:
-        # Use first child only
-        current_bone = current_bone.children[0]
-        bone_path.append(current_bone.name)
-
-    return bone_path
+    # Use first child only
+    return armature_index_utils.get_armature_index(armature).get_path_to_end(start_bone_name)
 
 def get_bone_and_children(armature: bpy.types.Object, start_bone_name: str) -> List[str]:
     """
@@ -707,23 +679,8 @@ def get_bone_and_children(armature: bpy.types.Object, start_bone_name: str) -> L
     :return: List of bone names, including the start bone and all its descendants.
     """
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    # Initialize the bones
-    start_bone = bones[start_bone_name]
-    
-
-    # Recursive function to collect all children bones
-    def collect_children(bone: Union[bpy.types.EditBone, bpy.types.PoseBone, bpy.types.Bone]) -> List[str]:
-        bone_list = [bone.name]
-        for child in bone.children:
-            bone_list.extend(collect_children(child))
-        return bone_list
-
-    # Get all bones starting from the start_bone
-    all_bones = collect_children(start_bone)
-    return all_bones
+    # Slice of the Euler tour of the armature index.
+    return armature_index_utils.get_armature_index(armature).get_subtree(start_bone_name)
 
 def get_bones_name_contains(armature: bpy.types.Object, name_filter: str) -> List[str]:
     """
@@ -732,10 +689,7 @@ def get_bones_name_contains(armature: bpy.types.Object, name_filter: str) -> Lis
     if not name_filter:
         return []
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    return [bone.name for bone in bones if name_filter in bone.name]
+    return armature_index_utils.get_bone_name_index(armature).get_names_containing(name_filter)
 
 def get_bones_name_starts_with(armature: bpy.types.Object, name_filter: str) -> List[str]:
     """
@@ -744,10 +698,8 @@ def get_bones_name_starts_with(armature: bpy.types.Object, name_filter: str) ->
     if not name_filter:
         return []
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    return [bone.name for bone in bones if bone.name.startswith(name_filter)]
+    # Range query on the sorted names.
+    return armature_index_utils.get_bone_name_index(armature).get_names_starting_with(name_filter)
 
 def get_bones_name_ends_with(armature: bpy.types.Object, name_filter: str) -> List[str]:
     """
@@ -756,10 +708,8 @@ def get_bones_name_ends_with(armature: bpy.types.Object, name_filter: str) -> Li
     if not name_filter:
         return []
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-
-    return [bone.name for bone in bones if bone.name.endswith(name_filter)]
+    # Range query on the sorted reversed names.
+    return armature_index_utils.get_bone_name_index(armature).get_names_ending_with(name_filter)
 
 def get_bones_name_contains_starts_with(armature: bpy.types.Object, contains_filter: str, startswith_filter: str) -> List[str]:
     """
@@ -768,13 +718,8 @@ def get_bones_name_contains_starts_with(armature: bpy.types.Object, contains_fil
     if not contains_filter or not startswith_filter:
         return []
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
-    
-    return [
-        b.name for b in bones
-        if contains_filter in b.name and b.name.startswith(startswith_filter)
-    ]
+    name_index = armature_index_utils.get_bone_name_index(armature)
+    return [name for name in name_index.get_names_starting_with(startswith_filter) if contains_filter in name]
 
 def get_bones_name_contains_ends_with(armature: bpy.types.Object, contains_filter: str, endswith_filter: str) -> List[str]:
     """
@@ -783,10 +728,25 @@ def get_bones_name_contains_ends_with(armature: bpy.types.Object, contains_filte
     if not contains_filter or not endswith_filter:
         return []
 
-    # Access bones directly.
-    bones = get_bones_from_armature(armature)
+    name_index = armature_index_utils.get_bone_name_index(armature)
+    return [name for name in name_index.get_names_ending_with(endswith_filter) if contains_filter in name]
 
-    return [
-        b.name for b in bones
-        if contains_filter in b.name and b.name.endswith(endswith_filter)
-    ]
\ No newline at end of file
+def get_bones_name_contains_batch(armature: bpy.types.Object, name_filters: List[str]) -> Dict[str, List[str]]:
+    """
+    Returns the bones whose names contain each substring, in one pass on the bone names.
+    """
+    return armature_index_utils.get_bone_name_index(armature).get_contains_batch(name_filters)
+
+def get_bones_name_starts_with_batch(armature: bpy.types.Object, name_filters: List[str]) -> Dict[str, List[str]]:
+    """
+    Returns the bones whose names start with each string.
+    """
+    name_index = armature_index_utils.get_bone_name_index(armature)
+    return {name_filter: name_index.get_names_starting_with(name_filter) for name_filter in name_filters if name_filter}
+
+def get_bones_name_ends_with_batch(armature: bpy.types.Object, name_filters: List[str]) -> Dict[str, List[str]]:
+    """
+    Returns the bones whose names end with each string.
+    """
+    name_index = armature_index_utils.get_bone_name_index(armature)
+    return {name_filter: name_index.get_names_ending_with(name_filter) for name_filter in name_filters if name_filter}
\ No newline at end of file
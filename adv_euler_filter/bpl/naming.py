@@ -23,7 +23,7 @@
 #  XavierLoux.com
 # ----------------------------------------------
 
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 def get_mirror_arrays() -> Tuple[List[str], List[str]]:
     def add_mirror(source_suffixes: List[str], mirror_suffixes: List[str], source: str, mirror: str):
@@ -48,22 +48,56 @@ def get_mirror_arrays() -> Tuple[List[str], List[str]]:
     return source_suffixes, mirror_suffixes
 
 
-def contain_laterality_suffix(string: str) -> bool:
+def build_laterality_tables() -> Tuple[Dict[str, Tuple[str, str]], List[int]]:
+    """
+    Returns the laterality suffixes as {suffix: (side, mirror suffix)}
+    and the suffix lengths, longest first.
+    """
     source_suffixes, mirror_suffixes = get_mirror_arrays()
-    return any(string.endswith(suffix) for suffix in source_suffixes + mirror_suffixes)
+    suffix_table: Dict[str, Tuple[str, str]] = {}
+    # Sources and mirrors alternate, the first of each pair is the left side.
+    for index, (suffix, mirror_suffix) in enumerate(zip(source_suffixes, mirror_suffixes)):
+        suffix_table.setdefault(suffix, ("LEFT" if index % 2 == 0 else "RIGHT", mirror_suffix))
+    suffix_lengths = sorted({len(suffix) for suffix in suffix_table}, reverse=True)
+    return suffix_table, suffix_lengths
+
+# Built once at import, a name is matched with one dict lookup per suffix length.
+laterality_suffix_table, laterality_suffix_lengths = build_laterality_tables()
+
+
+def find_laterality_suffix(string: str) -> str:
+    for suffix_length in laterality_suffix_lengths:
+        suffix = string[-suffix_length:]
+        if len(suffix) == suffix_length and suffix in laterality_suffix_table:
+            return suffix
+    return ""
+
+def contain_laterality_suffix(string: str) -> bool:
+    return find_laterality_suffix(string) != ""
 
 def remove_laterality_suffix(string: str) -> str:
-    source_suffixes, mirror_suffixes = get_mirror_arrays()
-    all_suffixes = source_suffixes + mirror_suffixes
-    for suffix in all_suffixes:
-        if string.endswith(suffix):
-            return string[:-len(suffix)]
+    suffix = find_laterality_suffix(string)
+    if suffix:
+        return string[:-len(suffix)]
     return string
 
 def get_laterality_suffix(string: str) -> str:
-    source_suffixes, mirror_suffixes = get_mirror_arrays()
-    all_suffixes = source_suffixes + mirror_suffixes
-    for suffix in all_suffixes:
-        if string.endswith(suffix):
-            return suffix
-    return ""
\ No newline at end of file
+    return find_laterality_suffix(string)
+
+def get_laterality_info(string: str) -> Tuple[str, str, str]:
+    """
+    Returns (stem, side, mirror name) of a name.
+    Side is "LEFT", "RIGHT" or "" when the name has no laterality suffix, the mirror name is then the name.
+    """
+    suffix = find_laterality_suffix(string)
+    if not suffix:
+        return string, "", string
+    side, mirror_suffix = laterality_suffix_table[suffix]
+    stem = string[:-len(suffix)]
+    return stem, side, stem + mirror_suffix
+
+def get_laterality_infos(strings: List[str]) -> List[Tuple[str, str, str]]:
+    """
+    Returns (stem, side, mirror name) for each name, in a single pass.
+    """
+    return [get_laterality_info(string) for string in strings]
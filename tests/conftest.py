@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The addon is imported as the adv_euler_filter package from the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
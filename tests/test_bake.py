@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+# The addon needs the Python of Blender or the bpy module (pip install bpy).
+bpy = pytest.importorskip("bpy")
+
+from adv_euler_filter import aef_bake
+
+
+BONE_NAME = "Bone"
+DATA_PATH = f'pose.bones["{BONE_NAME}"].rotation_euler'
+
+
+@pytest.fixture
+def armature():
+    armature_data = bpy.data.armatures.new("AEF_TestArmature")
+    obj = bpy.data.objects.new("AEF_TestArmature", armature_data)
+    bpy.context.scene.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bone = armature_data.edit_bones.new(BONE_NAME)
+    edit_bone.head = (0.0, 0.0, 0.0)
+    edit_bone.tail = (0.0, 1.0, 0.0)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    obj.pose.bones[BONE_NAME].rotation_mode = 'XYZ'
+
+    obj.animation_data_create()
+    obj.animation_data.action = bpy.data.actions.new("AEF_TestAction")
+    yield obj
+
+    action = obj.animation_data.action
+    bpy.data.objects.remove(obj)
+    bpy.data.armatures.remove(armature_data)
+    bpy.data.actions.remove(action)
+
+
+def key_rotation(action, frame, values):
+    for axis, value in enumerate(values):
+        fcurve = action.fcurves.find(DATA_PATH, index=axis) or action.fcurves.new(DATA_PATH, index=axis)
+        fcurve.keyframe_points.insert(frame, value)
+
+
+def get_keys(action, axis):
+    fcurve = action.fcurves.find(DATA_PATH, index=axis)
+    return {round(keyframe.co[0], 3): keyframe.co[1] for keyframe in fcurve.keyframe_points}
+
+
+def test_bake_keeps_keys_outside_the_baked_range(armature):
+    action = armature.animation_data.action
+    key_rotation(action, 0.0, (0.1, 0.2, 0.3))
+    key_rotation(action, 10.0, (0.4, 0.5, 0.6))
+    key_rotation(action, 15.0, (0.7, 0.8, 0.9))
+    key_rotation(action, 30.0, (1.0, 1.1, 1.2))
+
+    frames = aef_bake.get_frame_range_frames(10, 20)
+    aef_bake.bake_visual_euler_rotation(armature, action, [BONE_NAME], frames)
+
+    for axis, (first_value, last_value) in enumerate(((0.1, 1.0), (0.2, 1.1), (0.3, 1.2))):
+        keys = get_keys(action, axis)
+        # Keys outside of the range are kept, the baked range has one key per frame.
+        assert math.isclose(keys[0.0], first_value, abs_tol=1e-6)
+        assert math.isclose(keys[30.0], last_value, abs_tol=1e-6)
+        assert sorted(keys) == [0.0] + [float(frame) for frame in range(10, 21)] + [30.0]
+    assert math.isclose(get_keys(action, 0)[15.0], 0.7, abs_tol=1e-4)
@@ -0,0 +1,62 @@
+import math
+
+import numpy
+import pytest
+
+# The addon needs the Python of Blender or the bpy module (pip install bpy).
+pytest.importorskip("bpy")
+
+from adv_euler_filter import aef_eulerfilter_utils
+from adv_euler_filter import aef_rotation_utils
+
+
+MIRROR_SIGNS = numpy.array((1.0, -1.0, -1.0))
+
+
+def get_continuous_eulers(order, rng, key_count=30):
+    """
+    Continuous euler curve with the middle angle kept away from the gimbal lock.
+    """
+    middle_axis = aef_rotation_utils.euler_order_infos[order][0][1]
+    times = numpy.linspace(0.0, 1.0, key_count)[:, None]
+    eulers = rng.uniform(-1.0, 1.0, 3) + times * rng.uniform(-2.0, 2.0, 3)
+    eulers[:, middle_axis] = numpy.clip(eulers[:, middle_axis], -1.2, 1.2)
+    return eulers
+
+
+@pytest.mark.parametrize("order", aef_rotation_utils.euler_orders)
+@pytest.mark.parametrize("reverse", (False, True))
+def test_symmetric_curves_stay_symmetric_on_the_alternate_solution(order, reverse):
+    rng = numpy.random.default_rng(0)
+    for _ in range(50):
+        # Reference key and all the keys on the alternate solution, with some whole turns.
+        eulers = aef_eulerfilter_utils.get_alternate_euler_array(get_continuous_eulers(order, rng), order)
+        eulers += 2 * math.pi * rng.integers(-1, 2, 3)
+        mirror_eulers = eulers * MIRROR_SIGNS
+
+        filtered, mirror_filtered = aef_eulerfilter_utils.calculate_mirror_euler_filter_arrays(
+            eulers, mirror_eulers, order, "UNWRAP", reverse, MIRROR_SIGNS
+        )
+
+        numpy.testing.assert_allclose(mirror_filtered, filtered * MIRROR_SIGNS, atol=1e-9)
+        # The curves were already continuous, the filter keeps them.
+        numpy.testing.assert_allclose(filtered, eulers, atol=1e-9)
+
+
+@pytest.mark.parametrize("order", aef_rotation_utils.euler_orders)
+def test_mirror_curve_on_the_other_solution_is_aligned(order):
+    rng = numpy.random.default_rng(1)
+    eulers = get_continuous_eulers(order, rng)
+    mirror_eulers = aef_eulerfilter_utils.get_alternate_euler_array(eulers * MIRROR_SIGNS, order)
+
+    filtered, mirror_filtered = aef_eulerfilter_utils.calculate_mirror_euler_filter_arrays(
+        eulers, mirror_eulers, order, "UNWRAP", False, MIRROR_SIGNS
+    )
+
+    numpy.testing.assert_allclose(mirror_filtered, filtered * MIRROR_SIGNS, atol=1e-9)
+    # Same rotations as the source mirror curve.
+    numpy.testing.assert_allclose(
+        aef_rotation_utils.euler_to_matrix_array(mirror_filtered, order),
+        aef_rotation_utils.euler_to_matrix_array(mirror_eulers, order),
+        atol=1e-9,
+    )